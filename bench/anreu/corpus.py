@@ -0,0 +1,151 @@
+import os
+import random
+import zlib
+from typing import Dict, List, Optional
+
+RECEIPT_LINES = [
+    "Australian National Registry of Emissions Units",
+    "Transfer Confirmation",
+    "Transfer Date: 2024-05-27",
+    "From Account: Seller Pty Ltd (ACC123)",
+    "To Account: Buyer Pty Ltd (ACC456)",
+    "ACCU1000000 to ACCU1000099",
+    "Vintage: 2024",
+    "Project ID: CAR-2024-001",
+    "Facility: XYZ Reforestation Project",
+]
+
+FILLER_WORDS = (
+    "registry holding account unit transaction balance statement period "
+    "reference schedule compliance emissions carbon credit issuance surrender"
+).split()
+
+# Benchmark scenarios: page count, which page carries the receipt fields
+# ("first", "last" or None for none) and which pages are image-only scans
+SCENARIOS: Dict[str, Dict[str, object]] = {
+    "receipt_1p": {"pages": 1, "field_page": "first"},
+    "statement_20p_fields_first": {"pages": 20, "field_page": "first"},
+    "statement_20p_fields_last": {"pages": 20, "field_page": "last"},
+    "statement_100p_fields_last": {"pages": 100, "field_page": "last"},
+    "statement_500p_fields_first": {"pages": 500, "field_page": "first"},
+    "mixed_scan_20p_fields_last": {"pages": 20, "field_page": "last", "image_every": 2},
+    "scanned_5p": {"pages": 5, "field_page": None, "image_every": 1},
+}
+
+QUICK_SCENARIOS = ("receipt_1p", "statement_20p_fields_first", "statement_20p_fields_last", "mixed_scan_20p_fields_last")
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _text_stream(lines: List[str]) -> bytes:
+    body = " T* ".join(f"({_escape(line)}) Tj" for line in lines)
+    return f"BT /F1 10 Tf 13 TL 56 750 Td {body} ET".encode("latin-1")
+
+
+def _filler_lines(rng: random.Random, count: int = 30) -> List[str]:
+    return [" ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(6, 12))) for _ in range(count)]
+
+
+def make_receipt_pdf(
+    pages: int = 1,
+    field_page: Optional[str] = "first",
+    image_every: int = 0,
+    seed: int = 0,
+) -> bytes:
+    """
+    Build a synthetic ANREU-style PDF entirely in memory.
+
+    Text pages use the standard Helvetica font, so no font files are needed.
+    Image-only pages carry a single greyscale noise image and no text
+    layer, standing in for scanned pages. The output is deterministic for
+    a given set of arguments.
+
+    Args:
+        pages (int): Number of pages, at least 1
+        field_page (Optional[str]): "first" or "last" page holds the receipt
+            fields; None leaves them out
+        image_every (int): Make every n-th page image-only (0 for none); the
+            field page always keeps its text layer
+        seed (int): Seed for the filler text and image noise
+
+    Returns:
+        The PDF file contents
+    """
+    if pages < 1:
+        raise ValueError("pages must be at least 1")
+    rng = random.Random(seed)
+    field_index = {"first": 0, "last": pages - 1, None: None}[field_page]
+
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    def add_stream(header: str, data: bytes) -> int:
+        return add(f"<< {header} /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream")
+
+    catalog = add(b"")  # filled in once the page tree exists
+    page_tree = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    noise = bytes(rng.getrandbits(8) for _ in range(200 * 200))
+    image = add_stream(
+        "/Type /XObject /Subtype /Image /Width 200 /Height 200 /ColorSpace /DeviceGray "
+        "/BitsPerComponent 8 /Filter /FlateDecode",
+        zlib.compress(noise),
+    )
+
+    kids = []
+    for index in range(pages):
+        image_only = image_every and index != field_index and index % image_every == image_every - 1
+        if image_only:
+            content = b"q 480 0 0 640 66 76 cm /Im1 Do Q"
+        elif index == field_index:
+            content = _text_stream(RECEIPT_LINES + _filler_lines(rng, 20))
+        else:
+            content = _text_stream([f"Statement page {index + 1} of {pages}"] + _filler_lines(rng))
+        contents = add_stream("/Filter /FlateDecode", zlib.compress(content))
+        kids.append(add(
+            f"<< /Type /Page /Parent {page_tree} 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font} 0 R >> /XObject << /Im1 {image} 0 R >> >> "
+            f"/Contents {contents} 0 R >>".encode()
+        ))
+
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {page_tree} 0 R >>".encode()
+    objects[page_tree - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {pages} >>".encode()
+    )
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def write_corpus(directory: str, scenarios: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Write one PDF per scenario into directory.
+
+    Args:
+        directory (str): Output directory, created if missing
+        scenarios (Optional[List[str]]): Scenario names; defaults to all
+
+    Returns:
+        Mapping of scenario name to PDF path
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name in scenarios or SCENARIOS:
+        path = os.path.join(directory, f"{name}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_receipt_pdf(**SCENARIOS[name]))
+        paths[name] = path
+    return paths
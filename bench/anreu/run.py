@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from bench.anreu.corpus import QUICK_SCENARIOS, SCENARIOS, write_corpus
+
+MODES = ("single", "incremental", "batch")
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process and its finished children."""
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(mode: str, path: str, docs: int, workers: int) -> Dict[str, object]:
+    """
+    Parse docs copies of one PDF in the given mode; runs in a fresh process.
+
+    For the batch mode a document's latency is the time from the start of
+    the batch until its result is yielded.
+    """
+    from src.anreu.anreu_parser import parse_anreu_pdf, parse_anreu_pdfs
+
+    logging.getLogger("src.anreu").setLevel(logging.ERROR)
+    latencies = []
+    outcomes: Dict[str, int] = {}
+    started = time.perf_counter()
+    if mode == "batch":
+        for _, result in parse_anreu_pdfs([path] * docs, workers=workers):
+            latencies.append(time.perf_counter() - started)
+            outcome = result.get("error", "ok")
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    else:
+        for _ in range(docs):
+            doc_started = time.perf_counter()
+            result = parse_anreu_pdf(path, incremental=mode == "incremental")
+            latencies.append(time.perf_counter() - doc_started)
+            outcome = result.get("error", "ok")
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        "docs": docs,
+        "docs_per_sec": round(docs / elapsed, 3),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "outcomes": outcomes,
+    }
+
+
+def run_benchmarks(
+    corpus_dir: str,
+    scenarios: List[str],
+    modes: List[str],
+    docs: int,
+    page_budget: int,
+    workers: int,
+) -> List[Dict[str, object]]:
+    """
+    Benchmark every scenario in every mode, each in its own process.
+
+    Args:
+        corpus_dir (str): Directory the synthetic PDFs are written to
+        scenarios (List[str]): Scenario names from bench.anreu.corpus
+        modes (List[str]): Modes from MODES
+        docs (int): Documents parsed per scenario and mode
+        page_budget (int): Caps docs so one measurement parses at most this
+            many pages, keeping the 500-page scenarios affordable
+        workers (int): Worker processes for the batch mode
+
+    Returns:
+        One result record per scenario and mode
+    """
+    paths = write_corpus(corpus_dir, scenarios)
+    # Forking from this small process keeps peak RSS comparable while letting
+    # the batch mode's own workers inherit the quieter logging setup
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    results = []
+    for name in scenarios:
+        scenario_docs = max(3, min(docs, page_budget // SCENARIOS[name]["pages"]))
+        for mode in modes:
+            # A fresh process per measurement keeps peak RSS meaningful
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                record = executor.submit(_measure, mode, paths[name], scenario_docs, workers).result()
+            record = {"scenario": name, "mode": mode, **record}
+            print(
+                f"{name:32} {mode:12} {record['docs_per_sec']:9.2f} docs/s "
+                f"p50 {record['p50_ms']:9.2f} ms  p99 {record['p99_ms']:9.2f} ms  "
+                f"rss {record['peak_rss_mb']:7.1f} MB",
+                file=sys.stderr,
+            )
+            results.append(record)
+    return results
+
+
+def compare(results: List[Dict[str, object]], baseline: List[Dict[str, object]], tolerance: float) -> List[str]:
+    """
+    Compare results against a saved baseline.
+
+    Returns:
+        Human-readable descriptions of every regression beyond tolerance
+    """
+    previous = {(r["scenario"], r["mode"]): r for r in baseline}
+    regressions = []
+    for record in results:
+        base = previous.get((record["scenario"], record["mode"]))
+        if base is None:
+            continue
+        label = f"{record['scenario']}/{record['mode']}"
+        if record["docs_per_sec"] < base["docs_per_sec"] * (1 - tolerance):
+            regressions.append(f"{label}: docs/sec {base['docs_per_sec']} -> {record['docs_per_sec']}")
+        for key in ("p50_ms", "p99_ms", "peak_rss_mb"):
+            if record[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{label}: {key} {base[key]} -> {record[key]}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bench.anreu.run",
+        description="Benchmark the ANREU parser on a synthetic receipt corpus",
+    )
+    parser.add_argument("--quick", action="store_true", help="run only the small scenarios")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), help="scenarios to run")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="parse modes to run")
+    parser.add_argument("--docs", type=int, default=10, help="documents per scenario and mode")
+    parser.add_argument("--page-budget", type=int, default=200, help="maximum pages parsed per measurement")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="workers for the batch mode")
+    parser.add_argument("--corpus-dir", help="where to write the corpus (default: a temporary directory)")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a results JSON file saved earlier")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown before failing")
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenarios or list(QUICK_SCENARIOS if args.quick else SCENARIOS)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = run_benchmarks(
+            args.corpus_dir or tmpdir, scenarios, args.modes, args.docs, args.page_budget, args.workers
+        )
+
+    from src.anreu.anreu_parser import PARSER_VERSION
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "parser_version": PARSER_VERSION,
+            "workers": args.workers,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,89 +1,1195 @@
+import io
+import os
 import re
+import sys
 import json
+import mmap
 import logging
-from typing import Dict, Union, Optional
-from PyPDF2 import PdfReader
-import pdfplumber
+import argparse
+import bisect
+import threading
+import time
+from time import perf_counter
+from contextlib import closing
+from functools import partial
+from concurrent.futures import as_completed
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+from src.anreu.backends import AdaptiveBackendPolicy, ExtractionBackend, backend_policy
+from src.anreu.event_log import event_pipeline, flush_on_worker_exit
+from src.anreu.lazy_imports import import_seconds, lazy_imports
+from src.anreu.parse_cache import ParseCache, buffer_digest
+from src.anreu.parser_metrics import MetricsHook, ParseStats, metrics_hook
+from src.anreu.template import receipt_templates, receipt_templates_digest
+from src.anreu.ocr import TesseractEngine, ocr_engine
+from src.anreu.triage import LIKELY_ANREU, NEEDS_OCR, triage_pdf
+
+if TYPE_CHECKING:
+    from src.anreu.guardrails import ResourceLimits
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def parse_anreu_pdf(pdf_path: str) -> Dict[str, Union[str, int, None]]:
+# The PDF backends take most of the import time, so they load on first use
+_load = __getattr__ = lazy_imports(
+    globals(),
+    pdfplumber="pdfplumber",
+    PdfReader="PyPDF2:PdfReader",
+    ProcessPoolExecutor="concurrent.futures.process:ProcessPoolExecutor",
+)
+
+# Bump whenever extraction rules change so cached results are not reused
+PARSER_VERSION = "2"
+
+EXTRACTION_FAILED = "Failed to extract text from PDF"
+PARSE_FAILED = "Failed to parse PDF"
+PARSE_CANCELLED = "Parse cancelled"
+LOW_CONFIDENCE = "Low confidence — manual review required"
+NOT_ANREU = "Not an ANREU receipt"
+OCR_REQUIRED = "No text layer — OCR required"
+PARSE_TIMEOUT = "Parse timed out"
+RESOURCE_LIMIT = "PDF exceeds resource limits"
+
+FIELD_NAMES = ("serial_start", "serial_end", "vintage", "project_id", "facility", "from_account", "to_account")
+
+_ERROR_STATUSES = {
+    EXTRACTION_FAILED: "extraction_failed",
+    PARSE_FAILED: "failed",
+    PARSE_CANCELLED: "cancelled",
+    LOW_CONFIDENCE: "low_confidence",
+    NOT_ANREU: "rejected",
+    OCR_REQUIRED: "needs_ocr",
+    PARSE_TIMEOUT: "timeout",
+    RESOURCE_LIMIT: "resource_limit",
+}
+
+# A path, the PDF bytes themselves, or a binary file object holding them
+PdfSource = Union[str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
+
+def parse_anreu_pdf(
+    pdf_path: PdfSource,
+    cache: Optional[ParseCache] = None,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None,
+    triage: bool = False,
+    ocr: Optional[bool] = None,
+) -> Dict[str, Union[str, int, None]]:
     """
     Parse ANREU transfer receipt PDF and extract ACCU data.
 
     Args:
-        pdf_path (str): Path to the PDF file
+        pdf_path (PdfSource): Path to the PDF file, or its contents as bytes,
+            a memoryview, an mmap or a binary file object
+        cache (Optional[ParseCache]): Content-addressed result cache; when
+            given, files already parsed by this PARSER_VERSION are not re-parsed
+        incremental (bool): Scan pages one at a time and stop extracting as
+            soon as every field has been found
+        max_pages (Optional[int]): Only extract text from the first max_pages pages
+        cancel_event (Optional[threading.Event]): Once set, the parse stops
+            at the next page and releases the document
+        triage (bool): Classify the document from its metadata and first
+            page first, and only extract text from likely ANREU receipts
+        ocr (Optional[bool]): OCR pages without a text layer when fields are
+            missing; by default only if an OCR engine is installed
 
     Returns:
         Dict containing extracted data or error message
     """
-    text = ""
+    return parse_anreu_receipt(pdf_path, cache, incremental, max_pages, cancel_event, triage, ocr).as_dict()
+
+
+def parse_anreu_receipt(
+    pdf_path: PdfSource,
+    cache: Optional[ParseCache] = None,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None,
+    triage: bool = False,
+    ocr: Optional[bool] = None,
+) -> "AnreuReceipt":
+    """
+    Parse ANREU transfer receipt PDF into an AnreuReceipt.
+
+    Takes the same arguments as parse_anreu_pdf, which returns the dict view
+    of this result. Unlike that view, a low-confidence receipt keeps the
+    fields that were found; a cache hit restores only what the view holds.
+
+    Returns:
+        AnreuReceipt with the extracted fields, status and confidence
+    """
+    name = _describe_source(pdf_path)
     try:
-        # Extract text using pdfplumber
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+        # With a cache the file has to be read for its digest anyway, so map
+        # it once and let the backends parse from the same bytes
+        pdf_input = _as_pdf_input(pdf_path, map_paths=cache is not None)
+    except OSError as e:
+        logger.error(f"Error reading PDF {name}: {e}")
+        return AnreuReceipt(status="extraction_failed", error=EXTRACTION_FAILED)
+
+    engine = None
+    if ocr is not False:
+        engine = ocr_engine()
+        if engine is None and ocr:
+            logger.warning("OCR requested but no OCR engine is installed")
+
+    if cache is None:
+        receipt = _parse_anreu_pdf(pdf_input, name, incremental, max_pages, cancel_event, triage, engine)
+        _emit_result(name, receipt)
+        return receipt
+
+    digest = buffer_digest(pdf_input)
+
+    # Incremental scans, a page cap, triage, OCR, the backend policy or
+    # templates can change the outcome, so they are part of the cache key
+    version = PARSER_VERSION if max_pages is None else f"{PARSER_VERSION}:max_pages={max_pages}"
+    if incremental:
+        version += ":incremental"
+    if triage:
+        version += ":triage"
+    if engine is not None:
+        version += ":ocr"
+    if backend_policy() is not None:
+        version += ":adaptive"
+    if receipt_templates():
+        version += f":templates={receipt_templates_digest()}"
+    cached = cache.get(digest, version)
+    if cached is not None:
+        receipt = AnreuReceipt.from_result(cached)
+        _emit_result(name, receipt, cached=True)
+        return receipt
+
+    ocr_failed: List[int] = []
+    receipt = _parse_anreu_pdf(pdf_input, name, incremental, max_pages, cancel_event, triage, engine, cache, ocr_failed)
+    # Extraction and OCR failures may be transient (I/O problems, a tesseract
+    # timeout) and memory depends on the process, so never cache them
+    if receipt.status not in ("extraction_failed", "cancelled", "resource_limit") and not ocr_failed:
+        cache.put(digest, version, receipt.as_dict())
+    _emit_result(name, receipt)
+    return receipt
+
+
+def _emit_result(name: str, receipt: "AnreuReceipt", cached: bool = False) -> None:
+    """Queue a parse event on the installed event pipeline, if any."""
+    pipeline = event_pipeline()
+    if pipeline is not None:
+        pipeline.emit({"event": "anreu_parse", "source": name, "cached": cached, **receipt._asdict()})
+
+
+class AnreuReceipt(NamedTuple):
+    """
+    Outcome of parsing one ANREU receipt.
+
+    status is "ok", "low_confidence", "extraction_failed", "cancelled",
+    "failed", with triage "rejected" and "needs_ocr", and under resource
+    limits "timeout" and "resource_limit"; every status but "ok" also
+    carries the error message.
+    """
+
+    serial_start: Optional[int] = None
+    serial_end: Optional[int] = None
+    vintage: Optional[int] = None
+    project_id: Optional[str] = None
+    facility: Optional[str] = None
+    from_account: Optional[str] = None
+    to_account: Optional[str] = None
+    status: str = "ok"
+    confidence: Optional[float] = None  # percentage of FIELD_NAMES found
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Union[str, int, None]]:
+        """Return the result in the shape parse_anreu_pdf has always returned."""
+        if self.error is not None:
+            return {"error": self.error}
+        return dict(zip(FIELD_NAMES, self))
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Union[str, int, None]]) -> "AnreuReceipt":
+        """Build a receipt from a parse_anreu_pdf result dict."""
+        error = result.get("error")
+        if error is not None:
+            return cls(status=_ERROR_STATUSES.get(error, "failed"), error=error)
+        fields = [result.get(name) for name in FIELD_NAMES]
+        found = sum(value is not None for value in fields)
+        return cls(*fields, confidence=(found / len(FIELD_NAMES)) * 100)
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only stream over a memoryview that shares its memory."""
+
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def read(self, size: int = -1) -> bytes:
+        start = min(self._pos, len(self._view))
+        end = len(self._view) if size is None or size < 0 else min(start + size, len(self._view))
+        self._pos = end
+        return self._view[start:end].tobytes()
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def _describe_source(source: PdfSource) -> str:
+    """Return a short label for a PDF source to use in log messages."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    name = getattr(source, "name", None)
+    if isinstance(name, str):
+        return name
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return f"<{memoryview(source).nbytes} byte buffer>"
+    return repr(source)
+
+
+def _map_file(f: BinaryIO) -> memoryview:
+    """Memory-map a binary file, reading it instead when it cannot be mapped."""
+    try:
+        # The mapping is closed once the last view over it is released
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (AttributeError, OSError, ValueError):
+        # Pipes, sockets, empty files and objects without a descriptor
+        return memoryview(f.read())
+
+
+def _as_pdf_input(source: PdfSource, map_paths: bool = False) -> Union[str, memoryview]:
+    """
+    Normalise a PDF source to a path or a read-only view over its bytes.
+
+    Buffers are wrapped without copying and real files are memory mapped,
+    so the bytes are read once and shared by every extraction backend.
+
+    Args:
+        source (PdfSource): Path, buffer or binary file object
+        map_paths (bool): Map paths too instead of passing them through
+
+    Returns:
+        The path, or a memoryview over the whole PDF
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if not map_paths:
+            return os.fspath(source)
+        with open(source, "rb") as f:
+            return _map_file(f)
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return memoryview(source).cast("B")
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer()
+    return _map_file(source)
+
 
-        # Fallback with PyPDF2 if no text extracted
-        if not text.strip():
-            reader = PdfReader(pdf_path)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+def _open_pdf_input(pdf_input: Union[str, memoryview]) -> Union[str, _BufferReader]:
+    """Return what a backend should open: the path or a fresh stream."""
+    if isinstance(pdf_input, str):
+        return pdf_input
+    return _BufferReader(pdf_input)
 
+
+class PageText(NamedTuple):
+    """Text of one PDF page and the backend that produced it."""
+
+    index: int
+    backend: Optional[str]  # None when no backend found any text
+    text: str
+
+
+def iter_pages(pdf_path: PdfSource, max_pages: Optional[int] = None) -> Iterator[PageText]:
+    """
+    Extract text page by page, falling back to PyPDF2 only for empty pages.
+
+    Args:
+        pdf_path (PdfSource): Path to the PDF file, or its contents
+        max_pages (Optional[int]): Only extract text from the first max_pages pages
+
+    Yields:
+        PageText for every page, recording which backend produced its text
+    """
+    with closing(_iter_page_texts(_as_pdf_input(pdf_path), max_pages)) as pages:
+        yield from pages
+
+
+def _iter_page_texts(
+    pdf_input: Union[str, memoryview],
+    max_pages: Optional[int] = None,
+    stats: Optional[ParseStats] = None,
+) -> Iterator[PageText]:
+    """
+    Yield the text of each page, stopping early if the caller does.
+
+    The document is opened once with pdfplumber; PyPDF2 is only opened when
+    a page comes back empty, and then only re-extracts those pages. If
+    pdfplumber cannot open the file at all, PyPDF2 handles every page.
+
+    PyPDF2 cannot share pdfminer's parsed document, so the first empty page
+    makes it parse the file structure (xref and page tree) a second time;
+    receipts with some scanned pages still pay for two opens. Only bytes
+    already in memory are shared between the two.
+
+    Args:
+        pdf_input (Union[str, memoryview]): Path or bytes of the PDF file
+        max_pages (Optional[int]): Only extract text from the first max_pages pages
+        stats (Optional[ParseStats]): Receives open and per-page timings
+
+    Yields:
+        PageText for every page; each pdfplumber page is closed once read,
+        so memory stays bounded by one page however long the document
+    """
+    started = perf_counter()
+    try:
+        plumber = _load("pdfplumber").open(_open_pdf_input(pdf_input))
     except Exception as e:
-        logger.error(f"Error extracting text from PDF {pdf_path}: {e}")
-        return {"error": "Failed to extract text from PDF"}
+        logger.warning(f"pdfplumber could not open PDF, falling back to PyPDF2: {e}")
+        reader = _load("PdfReader")(_open_pdf_input(pdf_input))
+        if stats is not None:
+            stats.open_seconds += perf_counter() - started
+        for index, page in enumerate(reader.pages[:max_pages]):
+            started = perf_counter()
+            page_text = page.extract_text() or ""
+            if stats is not None:
+                stats.add_page("pypdf2", perf_counter() - started)
+            yield PageText(index, "pypdf2", page_text)
+        return
+    if stats is not None:
+        stats.open_seconds += perf_counter() - started
+
+    fallback_pages = None
+    with plumber as pdf:
+        for index, page in enumerate(pdf.pages[:max_pages]):
+            started = perf_counter()
+            try:
+                page_text = page.extract_text()
+            except Exception as e:
+                logger.warning(f"pdfplumber failed on page {index}, falling back to PyPDF2: {e}")
+                page_text = None
+            finally:
+                # pdf.pages keeps every page's parsed layout until it is closed
+                page.close()
+            if stats is not None:
+                stats.add_page("pdfplumber", perf_counter() - started)
+            if page_text and page_text.strip():
+                yield PageText(index, "pdfplumber", page_text)
+                continue
+
+            # Fallback with PyPDF2 for pages without pdfplumber text; this
+            # opens the document a second time, see the docstring
+            started = perf_counter()
+            if fallback_pages is None:
+                try:
+                    fallback_pages = _load("PdfReader")(_open_pdf_input(pdf_input)).pages
+                except Exception as e:
+                    logger.warning(f"PyPDF2 could not open PDF for page fallback: {e}")
+                    fallback_pages = []
+                if stats is not None:
+                    stats.open_seconds += perf_counter() - started
+                    started = perf_counter()
+            fallback_text = fallback_pages[index].extract_text() if index < len(fallback_pages) else None
+            if stats is not None:
+                stats.fallback_pages += 1
+                stats.add_page("pypdf2", perf_counter() - started)
+            if fallback_text and fallback_text.strip():
+                yield PageText(index, "pypdf2", fallback_text)
+            else:
+                yield PageText(index, None, page_text or fallback_text or "")
+
+
+def _iter_backend_pages(
+    backend: ExtractionBackend,
+    pdf_input: Union[str, memoryview],
+    max_pages: Optional[int] = None,
+    stats: Optional[ParseStats] = None,
+) -> Iterator[PageText]:
+    """
+    Yield the text of each page as extracted by a single backend.
+
+    Pages without text are yielded with backend None, as by _iter_page_texts.
+    """
+    started = perf_counter()
+    document = backend.open(_open_pdf_input(pdf_input))
+    if stats is not None:
+        stats.open_seconds += perf_counter() - started
+    try:
+        count = backend.page_count(document)
+        for index in range(count if max_pages is None else min(count, max_pages)):
+            started = perf_counter()
+            page_text = backend.page_text(document, index)
+            if stats is not None:
+                stats.add_page(backend.name, perf_counter() - started)
+            yield PageText(index, backend.name if page_text.strip() else None, page_text)
+    finally:
+        backend.close(document)
 
-    # Extract serial range
-    serial_match = re.search(r"ACCU(\d+)\s*to\s*ACCU(\d+)", text, re.IGNORECASE)
-    serial_start = int(serial_match.group(1)) if serial_match else None
-    serial_end = int(serial_match.group(2)) if serial_match else None
 
-    # Extract vintage
-    vintage_match = re.search(r"Vintage[:\s]*(\d{4})", text, re.IGNORECASE)
-    vintage = int(vintage_match.group(1)) if vintage_match else None
+# (field names, pattern, anchor, anchor offset, converter) in report order.
+# Every match of a pattern contains its anchor at the given offset from the
+# start (case-folded for IGNORECASE patterns), so candidates can be located
+# with str.find and verified with an anchored match instead of a full scan.
+_FIELD_RULES = (
+    (("serial_start", "serial_end"), re.compile(r"ACCU(\d+)\s*to\s*ACCU(\d+)", re.IGNORECASE), "accu", 0, int),
+    (("vintage",), re.compile(r"Vintage[:\s]*(\d{4})", re.IGNORECASE), "vintage", 0, int),
+    (("project_id",), re.compile(r"([A-Z]{3}-\d{4}-\d{3})"), "-", 3, str),
+    (("facility",), re.compile(r"Facility[:\s]*(.+?)(?:\n|$)", re.IGNORECASE), "facility", 0, str.strip),
+    (("from_account",), re.compile(r"From Account[:\s]*(.+?)(?:\n|$)", re.IGNORECASE), "from account", 0, str.strip),
+    (("to_account",), re.compile(r"To Account[:\s]*(.+?)(?:\n|$)", re.IGNORECASE), "to account", 0, str.strip),
+)
 
-    # Extract project ID
-    project_match = re.search(r"([A-Z]{3}-\d{4}-\d{3})", text)
-    project_id = project_match.group(1) if project_match else None
+# Start of a transfer block in a bulk statement
+_SERIAL_RANGE = _FIELD_RULES[0][1]
 
-    # Extract facility
-    facility_match = re.search(r"Facility[:\s]*(.+?)(?:\n|$)", text, re.IGNORECASE)
-    facility = facility_match.group(1).strip() if facility_match else None
+# Trailing run of label separators that a later page could extend
+_TRAILING_SEPARATORS = re.compile(r"[:\s]*\Z")
 
-    # Extract from account
-    from_match = re.search(r"From Account[:\s]*(.+?)(?:\n|$)", text, re.IGNORECASE)
-    from_account = from_match.group(1).strip() if from_match else None
+# Serial range cut off by a page break, e.g. "ACCU1000 to", that the next
+# page may complete
+_OPEN_SERIAL_RANGE = re.compile(r"ACCU\d+\s*(?:to\s*)?\Z", re.IGNORECASE)
 
-    # Extract to account
-    to_match = re.search(r"To Account[:\s]*(.+?)(?:\n|$)", text, re.IGNORECASE)
-    to_account = to_match.group(1).strip() if to_match else None
+
+class _CaseFolded:
+    """Lower-cased copy of an ASCII text, folded lazily in growing blocks."""
+
+    __slots__ = ("text", "folded")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.folded = ""
+
+    def find(self, anchor: str, start: int) -> int:
+        while True:
+            pos = self.folded.find(anchor, start)
+            if pos != -1 or len(self.folded) == len(self.text):
+                return pos
+            # Rescan the tail of the folded prefix so anchors that straddle
+            # the block boundary are not missed
+            start = max(start, len(self.folded) - len(anchor) + 1)
+            size = max(4096, len(self.folded))
+            self.folded += self.text[len(self.folded):len(self.folded) + size].lower()
+
+
+def extract_fields(text: str) -> Dict[str, Union[str, int, None]]:
+    """
+    Extract the ANREU receipt fields from document text.
+
+    Each field takes the first match in the text; fields that are not
+    present are None.
+
+    Args:
+        text (str): Text extracted from the PDF
+
+    Returns:
+        Dict mapping each name in FIELD_NAMES to its value or None
+    """
+    fields = dict.fromkeys(FIELD_NAMES)
+    _search_fields(text, fields)
+    return fields
+
+
+def _search_fields(
+    text: str,
+    fields: Dict[str, Union[str, int, None]],
+    stable_end: Optional[int] = None,
+) -> Optional[int]:
+    """
+    Fill in the fields that are still None from text; found fields are kept.
+
+    Args:
+        text (str): Text to search
+        fields (Dict): Field values found so far, updated in place
+        stable_end (Optional[int]): Matches whose value extends past this
+            offset could still change once more text is appended, so they
+            are held back instead of being recorded
+
+    Returns:
+        Start offset of the earliest held-back match, or None
+    """
+    # Case folding can change string lengths outside ASCII, which would break
+    # the offsets shared with text, so non-ASCII text uses plain searches
+    folded = _CaseFolded(text) if text.isascii() else None
+    held_back = None
+    for names, pattern, anchor, offset, convert in _FIELD_RULES:
+        if fields[names[0]] is not None:
+            continue
+
+        match = None
+        if pattern.flags & re.IGNORECASE and folded is None:
+            match = pattern.search(text)
+        else:
+            haystack = folded if pattern.flags & re.IGNORECASE else text
+            pos = haystack.find(anchor, offset)
+            while pos != -1:
+                match = pattern.match(text, pos - offset)
+                if match:
+                    break
+                pos = haystack.find(anchor, pos + 1)
+
+        if not match:
+            continue
+        if stable_end is not None and match.end(match.lastindex) > stable_end:
+            held_back = match.start() if held_back is None else min(held_back, match.start())
+            continue
+        for name, value in zip(names, match.groups()):
+            fields[name] = convert(value)
+    return held_back
+
+
+def _scan_pages(
+    pdf_input: Union[str, memoryview],
+    name: str,
+    result: Dict[str, Union[str, int, None]],
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None,
+    stats: Optional[ParseStats] = None,
+    backend: Optional[ExtractionBackend] = None,
+) -> Optional[List[int]]:
+    """
+    Extract the text of a PDF and fill in the fields of result that are None.
+
+    Args:
+        backend (Optional[ExtractionBackend]): Extract every page with this
+            backend instead of pdfplumber with the PyPDF2 page fallback
+
+    Returns:
+        Indices of the pages without any text, or None if the parse was cancelled
+
+    Raises:
+        Exception: Whatever the backend raised extracting the text
+    """
+    text = ""
+    blank_pages = []
+    if backend is None:
+        pages = _iter_page_texts(pdf_input, max_pages, stats)
+    else:
+        pages = _iter_backend_pages(backend, pdf_input, max_pages, stats)
+    # closing() releases the open PDF as soon as an incremental scan stops
+    with closing(pages) as page_texts:
+        for page in page_texts:
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info(f"Parse of {name} cancelled at page {page.index}")
+                return None
+            if page.backend is None:
+                blank_pages.append(page.index)
+            if not page.text:
+                continue
+            logger.debug(f"Page {page.index} of {name} extracted with {page.backend}")
+            text += page.text + "\n"
+            if not incremental:
+                continue
+
+            # A label at the very end of the page (e.g. "Facility:") may
+            # take its value from the next page, so such matches are held
+            # back and their lines rescanned together with the next page
+            regex_started = perf_counter()
+            stable_end = _TRAILING_SEPARATORS.search(text).start()
+            held_back = _search_fields(text, result, stable_end)
+            if stats is not None:
+                stats.regex_seconds += perf_counter() - regex_started
+            if all(value is not None for value in result.values()):
+                break
+            text = text[_carry_from(text, result, stable_end, held_back):]
+
+    regex_started = perf_counter()
+    _search_fields(text, result)
+    if stats is not None:
+        stats.regex_seconds += perf_counter() - regex_started
+    return blank_pages
+
+
+def _carry_from(
+    text: str,
+    fields: Dict[str, Union[str, int, None]],
+    stable_end: int,
+    held_back: Optional[int],
+) -> int:
+    """
+    Offset of the earliest text a later page could still complete a match with.
+
+    That is the last line with content, a held-back match, or a serial range
+    the page break cut off before its end.
+    """
+    carry_from = text.rfind("\n", 0, stable_end) + 1
+    if held_back is not None:
+        carry_from = min(carry_from, held_back)
+    if fields["serial_start"] is None:
+        open_range = _OPEN_SERIAL_RANGE.search(text)
+        if open_range is not None:
+            carry_from = min(carry_from, open_range.start())
+    return carry_from
+
+
+def _scan_templates(
+    pdf_input: Union[str, memoryview],
+    name: str,
+    result: Dict[str, Union[str, int, None]],
+    max_pages: Optional[int] = None,
+    stats: Optional[ParseStats] = None,
+) -> bool:
+    """
+    Fill in result from the field regions of the first matching receipt template.
+
+    A template only counts as matching when its regions yield every field;
+    otherwise result is left untouched for full-page extraction.
+
+    Returns:
+        Whether a template supplied every field
+    """
+    for template in receipt_templates():
+        if max_pages is not None and template.pages > max_pages:
+            continue
+        started = perf_counter()
+        text = template.extract_text(_open_pdf_input(pdf_input))
+        if stats is not None:
+            stats.add_page("template", perf_counter() - started)
+        if text is None:
+            continue
+        fields = dict.fromkeys(FIELD_NAMES)
+        _search_fields(text, fields)
+        if all(value is not None for value in fields.values()):
+            logger.debug(f"Extracted {name} with template {template.name}")
+            result.update(fields)
+            return True
+        logger.debug(f"Template {template.name} matched {name} but left fields missing")
+    return False
+
+
+def _scan_adaptively(
+    policy: AdaptiveBackendPolicy,
+    pdf_input: Union[str, memoryview],
+    name: str,
+    result: Dict[str, Union[str, int, None]],
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None,
+    stats: Optional[ParseStats] = None,
+) -> Optional[List[int]]:
+    """
+    Fill in result with the backends of a policy, cheapest expected first.
+
+    Each further backend only runs while the fields found so far fall short
+    of the policy's confidence, and only fills in fields still missing.
+    Every attempt is recorded with the policy so that its order adapts.
+
+    Returns:
+        Indices of the pages no backend found text on, or None if cancelled
+
+    Raises:
+        Exception: The last backend's error if every backend failed
+    """
+    blank_pages = None
+    error = None
+    for backend in policy.order():
+        attempt = dict.fromkeys(FIELD_NAMES)
+        attempt_stats = ParseStats()
+        started = perf_counter()
+        try:
+            backend.load()
+            # A library's one-time import says nothing about its cost per page
+            started = perf_counter()
+            backend_blank = _scan_pages(
+                pdf_input, name, attempt, incremental, max_pages, cancel_event, attempt_stats, backend
+            )
+        except MemoryError:
+            raise
+        except Exception as e:
+            logger.warning(f"{backend.name} could not extract {name}: {e}")
+            policy.record(backend.name, sum(attempt_stats.pages.values()), perf_counter() - started, False)
+            error = e
+            continue
+        finally:
+            if stats is not None:
+                stats.merge(attempt_stats)
+        if backend_blank is None:
+            return None
+        found = sum(value is not None for value in attempt.values())
+        success = found / len(attempt) * 100 >= policy.min_confidence
+        policy.record(backend.name, sum(attempt_stats.pages.values()), perf_counter() - started, success)
+
+        for field, value in attempt.items():
+            if result[field] is None:
+                result[field] = value
+        blank_pages = backend_blank if blank_pages is None else [i for i in blank_pages if i in backend_blank]
+        found = sum(value is not None for value in result.values())
+        if found / len(result) * 100 >= policy.min_confidence:
+            break
+        logger.debug(f"{backend.name} found {found} fields in {name}, escalating")
+    if blank_pages is None:
+        raise error
+    return blank_pages
+
+
+def _parse_anreu_pdf(
+    pdf_input: Union[str, memoryview],
+    name: str,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None,
+    triage: bool = False,
+    engine: Optional[TesseractEngine] = None,
+    cache: Optional[ParseCache] = None,
+    ocr_failed: Optional[List[int]] = None,
+) -> AnreuReceipt:
+    """
+    Parse a PDF without consulting the result cache.
+
+    The cache is only used for the OCR text of individual pages. Pages whose
+    OCR failed are appended to ocr_failed, when given.
+    """
+    started = perf_counter()
+    hook = metrics_hook()
+    stats = ParseStats() if hook is not None else None
+
+    if triage:
+        try:
+            verdict = triage_pdf(_open_pdf_input(pdf_input))
+        except OSError as e:
+            logger.error(f"Error reading PDF {name}: {e}")
+            _report_stats(hook, stats, started, "extraction_failed")
+            return AnreuReceipt(status="extraction_failed", error=EXTRACTION_FAILED)
+        # Scans are worth a full parse when they can be OCRed
+        if verdict.verdict != LIKELY_ANREU and not (verdict.verdict == NEEDS_OCR and engine is not None):
+            logger.info(f"Triage skipped {name}: {verdict.reason}")
+            status = "needs_ocr" if verdict.verdict == NEEDS_OCR else "rejected"
+            _report_stats(hook, stats, started, status)
+            return AnreuReceipt(status=status, error=OCR_REQUIRED if status == "needs_ocr" else NOT_ANREU)
+
+    policy = backend_policy()
+    result = dict.fromkeys(FIELD_NAMES)
+    try:
+        if _scan_templates(pdf_input, name, result, max_pages, stats):
+            blank_pages = []
+        elif policy is None:
+            blank_pages = _scan_pages(pdf_input, name, result, incremental, max_pages, cancel_event, stats)
+        else:
+            blank_pages = _scan_adaptively(policy, pdf_input, name, result, incremental, max_pages, cancel_event, stats)
+    except MemoryError:
+        logger.error(f"Memory limit reached extracting text from PDF {name}")
+        _report_stats(hook, stats, started, "resource_limit")
+        return AnreuReceipt(status="resource_limit", error=RESOURCE_LIMIT)
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF {name}: {e}")
+        _report_stats(hook, stats, started, "extraction_failed")
+        return AnreuReceipt(status="extraction_failed", error=EXTRACTION_FAILED)
+    if blank_pages is None:
+        _report_stats(hook, stats, started, "cancelled")
+        return AnreuReceipt(status="cancelled", error=PARSE_CANCELLED)
+
+    # Pages without a text layer are OCRed only when the text layers of the
+    # other pages left fields missing; their text fills in those fields
+    if engine is not None and blank_pages and any(value is None for value in result.values()):
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info(f"Parse of {name} cancelled before OCR")
+            _report_stats(hook, stats, started, "cancelled")
+            return AnreuReceipt(status="cancelled", error=PARSE_CANCELLED)
+        ocr_started = perf_counter()
+        try:
+            page_texts = engine.ocr_pages(_open_pdf_input(pdf_input), blank_pages, cache)
+        except Exception as e:
+            logger.warning(f"OCR failed for {name}: {e}")
+            page_texts = {}
+        if stats is not None:
+            ocr_seconds = perf_counter() - ocr_started
+            for _ in blank_pages:
+                stats.add_page("ocr", ocr_seconds / len(blank_pages))
+        logger.debug(f"OCRed {len(page_texts)} pages of {name}")
+        if ocr_failed is not None:
+            ocr_failed.extend(index for index in blank_pages if index not in page_texts)
+        _search_fields("\n".join(page_texts[index] for index in sorted(page_texts)), result)
 
     # Calculate confidence
-    fields = [serial_start, serial_end, vintage, project_id, facility, from_account, to_account]
-    found = sum(field is not None for field in fields)
-    confidence = (found / len(fields)) * 100
-
-    result = {
-        "serial_start": serial_start,
-        "serial_end": serial_end,
-        "vintage": vintage,
-        "project_id": project_id,
-        "facility": facility,
-        "from_account": from_account,
-        "to_account": to_account
-    }
+    found = sum(value is not None for value in result.values())
+    confidence = (found / len(result)) * 100
 
     if confidence < 90:
-        logger.warning(".2f")
-        return {"error": "Low confidence — manual review required"}
+        logger.warning(f"Low confidence ({confidence:.2f}%) parsing {name}")
+        _report_stats(hook, stats, started, "low_confidence", confidence)
+        return AnreuReceipt(**result, status="low_confidence", confidence=confidence, error=LOW_CONFIDENCE)
+
+    logger.info(f"Parsed {name} with {confidence:.2f}% confidence")
+    # Log result for ELK integration, unless the event pipeline ships it;
+    # skip the serialisation entirely when INFO is not being logged
+    if event_pipeline() is None and logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(result))
+
+    _report_stats(hook, stats, started, "ok", confidence)
+    return AnreuReceipt(**result, confidence=confidence)
+
+
+def _report_stats(
+    hook: Optional[MetricsHook],
+    stats: Optional[ParseStats],
+    started: float,
+    outcome: str,
+    confidence: Optional[float] = None,
+) -> None:
+    """Complete stats for a finished parse and hand them to the metrics hook."""
+    if hook is None:
+        return
+    stats.total_seconds = perf_counter() - started
+    stats.outcome = outcome
+    stats.confidence = confidence
+    try:
+        hook(stats)
+    except Exception as e:
+        logger.warning(f"Metrics hook failed: {e}")
+
+
+def iter_anreu_transfers(
+    pdf_path: PdfSource,
+    max_pages: Optional[int] = None,
+) -> Iterator[Dict[str, Union[str, int, None]]]:
+    """
+    Stream the transfer blocks of a bulk ANREU statement one at a time.
+
+    A block starts at an "ACCUxxxx to ACCUyyyy" range and runs until the next
+    one, so its other fields are the first matches after its range. Fields
+    that appear before the first range (the statement header, e.g. the From
+    and To accounts of a single receipt) fill in whatever a block lacks.
+
+    Pages are extracted lazily and only the open block plus the current page
+    are held in memory; a block that continues onto the next page is yielded
+    once that page has been read.
+
+    Args:
+        pdf_path (PdfSource): Path to the PDF file, or its contents
+        max_pages (Optional[int]): Only extract text from the first max_pages pages
+
+    Yields:
+        Dict with every name in FIELD_NAMES plus "page", the zero-based page
+        index where the block's serial range starts
+    """
+    with closing(_iter_page_texts(_as_pdf_input(pdf_path), max_pages)) as pages:
+        yield from _iter_transfer_blocks(pages)
+
+
+def _iter_transfer_blocks(pages: Iterable[PageText]) -> Iterator[Dict[str, Union[str, int, None]]]:
+    """Split streamed page texts into transfer records; see iter_anreu_transfers."""
+    header = dict.fromkeys(FIELD_NAMES)
+    text = ""
+    # (offset in text, page index) for every page that still has text buffered
+    page_starts: List[Tuple[int, int]] = []
+    block = None
+    for page in pages:
+        if not page.text:
+            continue
+        page_starts.append((len(text), page.index))
+        text += page.text + "\n"
+
+        if block is None:
+            block = _SERIAL_RANGE.search(text)
+            if block is None:
+                # Still in the header: keep only the lines a later page could
+                # complete, as in the incremental parse
+                stable_end = _TRAILING_SEPARATORS.search(text).start()
+                held_back = _search_fields(text, header, stable_end)
+                text, page_starts = _drop_text(text, page_starts, _carry_from(text, header, stable_end, held_back))
+                continue
+            _search_fields(text[:block.start()], header)
+        else:
+            # The buffer starts with the open block; its range is complete
+            # because the text always ends with a page-break newline
+            block = _SERIAL_RANGE.match(text)
+
+        for following in _SERIAL_RANGE.finditer(text, block.end()):
+            yield _transfer_record(text, block, following.start(), header, page_starts)
+            block = following
+        text, page_starts = _drop_text(text, page_starts, block.start())
+        block = _SERIAL_RANGE.match(text)
+
+    if block is not None:
+        yield _transfer_record(text, block, len(text), header, page_starts)
+
+
+def _drop_text(text: str, page_starts: List[Tuple[int, int]], keep_from: int) -> Tuple[str, List[Tuple[int, int]]]:
+    """Discard text before keep_from and shift the page offsets to match."""
+    first = max(bisect.bisect_right(page_starts, (keep_from, sys.maxsize)) - 1, 0)
+    return text[keep_from:], [(max(offset - keep_from, 0), index) for offset, index in page_starts[first:]]
+
+
+def _transfer_record(
+    text: str,
+    block: "re.Match",
+    end: int,
+    header: Dict[str, Union[str, int, None]],
+    page_starts: List[Tuple[int, int]],
+) -> Dict[str, Union[str, int, None]]:
+    """Build the record of the block whose range is block and which ends at end."""
+    record = dict.fromkeys(FIELD_NAMES)
+    record["serial_start"], record["serial_end"] = (int(value) for value in block.groups())
+    _search_fields(text[block.end():end], record)
+    for name, value in header.items():
+        if record[name] is None:
+            record[name] = value
+    page = bisect.bisect_right(page_starts, (block.start(), sys.maxsize)) - 1
+    record["page"] = page_starts[max(page, 0)][1]
+    return record
+
+
+def _parse_chunk(
+    paths: List[str],
+    receipts: bool = False,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+) -> List[Tuple[str, Union[Dict[str, Union[str, int, None]], AnreuReceipt]]]:
+    """
+    Parse a chunk of PDFs inside a worker, isolating failures per document.
+
+    Args:
+        paths (List[str]): Paths of the PDF files in this chunk
+        receipts (bool): Return AnreuReceipt results instead of dicts
+        incremental (bool): As for parse_anreu_pdf
+        max_pages (Optional[int]): As for parse_anreu_pdf
+
+    Returns:
+        List of (path, result) pairs in input order
+    """
+    parse = parse_anreu_receipt if receipts else parse_anreu_pdf
+    results = []
+    for path in paths:
+        try:
+            results.append((path, parse(path, incremental=incremental, max_pages=max_pages)))
+        except Exception as e:
+            logger.error(f"Unhandled error parsing PDF {path}: {e}")
+            results.append((path, _failed_result(receipts)))
+    return results
+
+
+def _failed_result(receipts: bool) -> Union[Dict[str, Union[str, int, None]], AnreuReceipt]:
+    """Result reported for a document whose parse raised or whose worker died."""
+    if receipts:
+        return AnreuReceipt(status="failed", error=PARSE_FAILED)
+    return {"error": PARSE_FAILED}
+
+
+def parse_anreu_pdfs(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    receipts: bool = False,
+    limits: Optional["ResourceLimits"] = None,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+) -> Iterator[Tuple[str, Union[Dict[str, Union[str, int, None]], AnreuReceipt]]]:
+    """
+    Parse many ANREU transfer receipt PDFs across a process pool.
+
+    Results are yielded as soon as each chunk finishes, so the output order
+    is completion order rather than input order. If a worker process dies,
+    the documents whose chunks had not finished are parsed again one per
+    worker, and only a document that crashes its worker fails.
+
+    Args:
+        paths (Iterable[str]): Paths to the PDF files
+        workers (Optional[int]): Number of worker processes; defaults to the
+            CPU count, and 1 or less parses in the calling process
+        chunksize (int): Number of paths handed to a worker per task
+        receipts (bool): Yield AnreuReceipt results, as parse_anreu_receipt
+            returns them, instead of dicts
+        limits (Optional[ResourceLimits]): Parse in sandboxed workers that
+            enforce these per-document limits, one document at a time;
+            chunksize is then ignored, and workers of 1 still uses a worker
+        incremental (bool): As for parse_anreu_pdf
+        max_pages (Optional[int]): As for parse_anreu_pdf
+
+    Yields:
+        (path, result) pairs, where result is what parse_anreu_pdf returns
+        for that path (extracted data or error message)
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+
+    if limits is not None:
+        from src.anreu.guardrails import parse_guarded
+        yield from parse_guarded(paths, workers, limits, receipts, incremental, max_pages)
+        return
+
+    paths = list(paths)
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+    parse_chunk = partial(_parse_chunk, receipts=receipts, incremental=incremental, max_pages=max_pages)
+
+    if workers is not None and workers <= 1:
+        for chunk in chunks:
+            yield from parse_chunk(chunk)
+        return
+
+    retry: List[str] = []
+    with _load("ProcessPoolExecutor")(max_workers=workers, initializer=flush_on_worker_exit) as executor:
+        futures = {executor.submit(parse_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                chunk_results = future.result()
+            except Exception as e:
+                # A worker died (e.g. a segfault or the OOM killer), which
+                # breaks the pool and fails every chunk still pending in it
+                logger.error(f"Worker failed while parsing {futures[future]}: {e}")
+                retry.extend(futures[future])
+                continue
+            yield from chunk_results
+
+    if retry:
+        # Retry one document per worker process, so that only a document
+        # that crashes a worker by itself is reported as failed
+        from src.anreu.guardrails import ResourceLimits, parse_guarded
+        unlimited = ResourceLimits(None, None, None, None, None)
+        yield from parse_guarded(retry, workers, unlimited, receipts, incremental, max_pages)
+
+
+def parse_files(
+    paths: List[str],
+    workers: int = 1,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+    output: Optional[TextIO] = None,
+) -> int:
+    """
+    Parse PDFs and write one JSON line per file with its path and result.
+
+    Args:
+        paths (List[str]): Paths to the PDF files
+        workers (int): Worker processes; 1 parses in this process, which
+            starts fastest for a handful of files
+        incremental (bool): As for parse_anreu_pdf
+        max_pages (Optional[int]): As for parse_anreu_pdf
+        output (Optional[TextIO]): Where to write the JSON lines; defaults to stdout
+
+    Returns:
+        Number of files parsed
+    """
+    output = output or sys.stdout
+    if workers <= 1:
+        results = ((path, parse_anreu_pdf(path, incremental=incremental, max_pages=max_pages)) for path in paths)
+    else:
+        results = parse_anreu_pdfs(paths, workers=workers, incremental=incremental, max_pages=max_pages)
+    parsed = 0
+    for path, result in results:
+        output.write(json.dumps({"path": path, "result": result}) + "\n")
+        output.flush()
+        parsed += 1
+    return parsed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point: python -m src.anreu.anreu_parser <command>.
+
+    Args:
+        argv (Optional[List[str]]): Arguments, defaulting to sys.argv[1:]
+
+    Returns:
+        Process exit status
+    """
+    # CPU time so far is interpreter start-up plus module imports
+    startup_seconds = time.process_time()
+    parser = argparse.ArgumentParser(prog="python -m src.anreu.anreu_parser", description="Parse ANREU transfer receipt PDFs")
+    parser.add_argument("--log-level", default="INFO", help="logging level (default: INFO)")
+    parser.add_argument("--events", help="append logs and parse events as JSON lines to this file")
+    parser.add_argument("--events-sample", type=float, default=1.0, help="fraction of parse events to keep")
+    parser.add_argument("--events-rate", type=float, default=None, help="maximum parse events per second")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parse_parser = commands.add_parser("parse", help="parse PDFs and print one JSON line per file")
+    parse_parser.add_argument("paths", nargs="+", help="PDF files to parse")
+    parse_parser.add_argument("--workers", type=int, default=1, help="worker processes (default: parse in this process)")
+    parse_parser.add_argument("--incremental", action="store_true", help="stop reading pages once every field is found")
+    parse_parser.add_argument("--max-pages", type=int, default=None, help="only read the first MAX_PAGES pages")
+    parse_parser.add_argument("--import-time", action="store_true", help="report start-up and import times on stderr")
+    parse_parser.add_argument(
+        "--template", action="append", default=[], help="read fields from the regions of this learned template first; repeatable"
+    )
+
+    learn_parser = commands.add_parser("learn-template", help="learn where each field sits on a representative receipt")
+    learn_parser.add_argument("pdf", help="receipt whose fields are all extracted")
+    learn_parser.add_argument("output", help="JSON file to write the template to")
+    learn_parser.add_argument("--name", default="anreu", help="name of the template (default: anreu)")
+
+    serve_parser = commands.add_parser("serve", help="answer JSON-lines parse requests from a warm worker pool")
+    serve_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    serve_parser.add_argument("--max-in-flight", type=int, default=64, help="maximum queued or running requests")
+    serve_parser.add_argument("--socket", help="listen on this Unix socket instead of stdin/stdout")
+    serve_parser.add_argument("--cache", help="SQLite parse cache shared by the workers")
+
+    ingest_parser = commands.add_parser("ingest", help="parse new or changed PDFs in an inbox directory to JSON lines")
+    ingest_parser.add_argument("directory", help="inbox directory, searched recursively")
+    ingest_parser.add_argument("--manifest", help="SQLite manifest (default: DIRECTORY/.anreu-manifest.db)")
+    ingest_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    ingest_parser.add_argument("--follow", action="store_true", help="keep watching the directory for new files")
+    ingest_parser.add_argument("--interval", type=float, default=5.0, help="seconds between scans when following")
+    ingest_parser.add_argument("--settle", type=float, default=None, help="skip files modified within this many seconds")
+    ingest_parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per document")
+    ingest_parser.add_argument("--memory-mb", type=int, default=2048, help="address space allowed per worker process")
+    ingest_parser.add_argument("--page-limit", type=int, default=1000, help="skip documents with more pages")
+    ingest_parser.add_argument("--object-limit", type=int, default=500_000, help="skip documents with more PDF objects")
+    ingest_parser.add_argument("--docs-per-worker", type=int, default=200, help="replace each worker after this many documents")
+
+    args = parser.parse_args(argv)
+    pipeline = None
+    if args.events:
+        from src.anreu.event_log import EventPipeline, set_event_pipeline
+        pipeline = EventPipeline(args.events, sample_rate=args.events_sample, max_events_per_second=args.events_rate)
+        set_event_pipeline(pipeline)
+        logging.basicConfig(level=args.log_level.upper(), handlers=[pipeline.handler()])
+    else:
+        logging.basicConfig(level=args.log_level.upper())
+
+    try:
+        _run_command(args, startup_seconds)
+    finally:
+        if pipeline is not None:
+            set_event_pipeline(None)
+            pipeline.close()
+    return 0
+
+
+def _run_command(args: argparse.Namespace, startup_seconds: float = 0.0) -> None:
+    """Run the subcommand parsed by main."""
+    if args.command == "parse":
+        if args.template:
+            from src.anreu.template import load_template, set_receipt_templates
+            set_receipt_templates(load_template(path) for path in args.template)
+        parse_files(args.paths, args.workers, args.incremental, args.max_pages)
+        if args.import_time:
+            report = {
+                "startup_ms": round(startup_seconds * 1000, 1),
+                "lazy_imports_ms": {spec: round(seconds * 1000, 1) for spec, seconds in import_seconds.items()},
+            }
+            print(json.dumps(report), file=sys.stderr)
+    elif args.command == "learn-template":
+        from src.anreu.template import learn_template, save_template
+        template = learn_template(args.pdf, args.name)
+        save_template(template, args.output)
+        logger.info(f"Learned {len(template.regions)} field regions from {args.pdf}")
+    elif args.command == "serve":
+        from src.anreu.parser_server import serve
+        serve(args.workers, args.max_in_flight, args.socket, args.cache)
+    elif args.command == "ingest":
+        from src.anreu.guardrails import ResourceLimits
+        from src.anreu.ingest import ingest
+        limits = ResourceLimits(args.timeout, args.memory_mb << 20, args.page_limit, args.object_limit, args.docs_per_worker)
+        ingest(args.directory, args.manifest, args.workers, args.follow, args.interval, args.settle, limits=limits)
 
-    logger.info(".2f")
-    # Log result for ELK integration (assuming logging is configured)
-    logger.info(json.dumps(result))
 
-    return result
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import threading
+from functools import partial
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from src.anreu.anreu_parser import PARSE_FAILED, PARSE_TIMEOUT, PdfSource, parse_anreu_pdf
+
+logger = logging.getLogger(__name__)
+
+
+async def parse_anreu_pdf_async(
+    pdf_path: PdfSource,
+    executor: Optional[Executor] = None,
+    timeout: Optional[float] = None,
+    **options: Any,
+) -> Dict[str, Union[str, int, None]]:
+    """
+    Parse an ANREU PDF in an executor without blocking the event loop.
+
+    On timeout or cancellation a thread worker stops at its next page and
+    releases the document. A process worker cannot be signalled, so only a
+    parse that has not started yet is withdrawn from its queue; one that has
+    started keeps its worker busy until it finishes. Use parse_anreu_pdfs
+    with limits where a runaway parse must be killed.
+
+    Args:
+        pdf_path (PdfSource): Path to the PDF file, or its contents
+        executor (Optional[Executor]): Executor to parse in; defaults to the
+            event loop's default thread pool
+        timeout (Optional[float]): Deadline in seconds for this document,
+            counted from when it is handed to the executor
+        **options: Further keyword arguments for parse_anreu_pdf
+
+    Returns:
+        Dict containing extracted data or error message
+    """
+    loop = asyncio.get_running_loop()
+    # A threading.Event cannot be shared with another process
+    cancel_event = None if isinstance(executor, ProcessPoolExecutor) else threading.Event()
+    call = partial(parse_anreu_pdf, pdf_path, cancel_event=cancel_event, **options)
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(executor, call), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Parse timed out after {timeout}s")
+        return {"error": PARSE_TIMEOUT}
+    finally:
+        if cancel_event is not None:
+            cancel_event.set()
+
+
+async def parse_many_async(
+    sources: Iterable[PdfSource],
+    executor: Optional[Executor] = None,
+    concurrency: int = 4,
+    timeout: Optional[float] = None,
+    **options: Any,
+) -> List[Dict[str, Union[str, int, None]]]:
+    """
+    Parse many ANREU PDFs concurrently with bounded concurrency.
+
+    Args:
+        sources (Iterable[PdfSource]): PDF paths or contents
+        executor (Optional[Executor]): Executor to parse in; defaults to the
+            event loop's default thread pool
+        concurrency (int): Maximum number of documents parsed at once
+        timeout (Optional[float]): Deadline in seconds per document, counted
+            from when one of the concurrency slots frees up for it; time
+            spent queued inside a shared executor counts towards it
+        **options: Further keyword arguments for parse_anreu_pdf
+
+    Returns:
+        One result per source, in input order
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def parse_one(source: PdfSource) -> Dict[str, Union[str, int, None]]:
+        async with semaphore:
+            try:
+                return await parse_anreu_pdf_async(source, executor, timeout, **options)
+            except Exception as e:
+                logger.error(f"Unhandled error parsing PDF: {e}")
+                return {"error": PARSE_FAILED}
+
+    return await asyncio.gather(*(parse_one(source) for source in sources))
@@ -0,0 +1,254 @@
+import logging
+import threading
+import importlib.util
+from typing import Any, BinaryIO, Dict, Iterable, List, NamedTuple, Optional, Union
+
+from src.anreu.lazy_imports import lazy_imports
+
+logger = logging.getLogger(__name__)
+
+_load = __getattr__ = lazy_imports(globals(), pdfplumber="pdfplumber", PdfReader="PyPDF2:PdfReader")
+
+# What a backend opens: a path, or a seekable stream over the PDF bytes
+BackendSource = Union[str, BinaryIO]
+
+
+class ExtractionBackend:
+    """
+    A text-layer extractor the adaptive backend policy can choose from.
+
+    Subclasses wrap one PDF library. cost is the expected seconds per page
+    before any pages have been timed, which ranks backends until real
+    measurements take over.
+    """
+
+    name = ""
+    cost = 0.01
+
+    def available(self) -> bool:
+        """Return whether the backend's library can be used here."""
+        return True
+
+    def load(self) -> None:
+        """Import the backend's library, so the one-time import is not timed as parsing."""
+
+    def open(self, source: BackendSource) -> Any:
+        """Open a document; raises if the library cannot read it."""
+        raise NotImplementedError
+
+    def page_count(self, document: Any) -> int:
+        raise NotImplementedError
+
+    def page_text(self, document: Any, index: int) -> str:
+        """Return the text layer of one page, empty if it has none."""
+        raise NotImplementedError
+
+    def close(self, document: Any) -> None:
+        """Release an open document."""
+
+
+class PdfplumberBackend(ExtractionBackend):
+    """pdfplumber, which runs pdfminer's full layout analysis on every page."""
+
+    name = "pdfplumber"
+    cost = 0.02
+
+    def load(self) -> None:
+        _load("pdfplumber")
+
+    def open(self, source: BackendSource) -> Any:
+        return _load("pdfplumber").open(source)
+
+    def page_count(self, document: Any) -> int:
+        return len(document.pages)
+
+    def page_text(self, document: Any, index: int) -> str:
+        page = document.pages[index]
+        try:
+            return page.extract_text() or ""
+        finally:
+            # Release the page's parsed layout, which the document keeps otherwise
+            page.close()
+
+    def close(self, document: Any) -> None:
+        document.close()
+
+
+class PyPDF2Backend(ExtractionBackend):
+    """PyPDF2, which reads content streams in order without layout analysis."""
+
+    name = "pypdf2"
+    cost = 0.003
+
+    def load(self) -> None:
+        _load("PdfReader")
+
+    def open(self, source: BackendSource) -> Any:
+        return _load("PdfReader")(source)
+
+    def page_count(self, document: Any) -> int:
+        return len(document.pages)
+
+    def page_text(self, document: Any, index: int) -> str:
+        return document.pages[index].extract_text() or ""
+
+
+class Pypdfium2Backend(ExtractionBackend):
+    """pdfium's text layer via pypdfium2, when it is installed."""
+
+    name = "pypdfium2"
+    cost = 0.0015
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("pypdfium2") is not None
+
+    def load(self) -> None:
+        import pypdfium2
+
+    def open(self, source: BackendSource) -> Any:
+        import pypdfium2
+        return pypdfium2.PdfDocument(source)
+
+    def page_count(self, document: Any) -> int:
+        return len(document)
+
+    def page_text(self, document: Any, index: int) -> str:
+        page = document[index]
+        try:
+            textpage = page.get_textpage()
+            try:
+                # pdfium ends lines with CRLF; the field rules expect LF
+                return textpage.get_text_range().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+
+    def close(self, document: Any) -> None:
+        document.close()
+
+
+_registry: Dict[str, ExtractionBackend] = {}
+
+
+def register_backend(backend: ExtractionBackend) -> None:
+    """
+    Make a backend available to AdaptiveBackendPolicy, replacing any
+    backend registered under the same name.
+    """
+    _registry[backend.name] = backend
+
+
+def available_backends() -> List[ExtractionBackend]:
+    """Return the registered backends that can run here, cheapest first."""
+    return sorted((backend for backend in _registry.values() if backend.available()), key=lambda b: b.cost)
+
+
+for _backend in (PdfplumberBackend(), PyPDF2Backend(), Pypdfium2Backend()):
+    register_backend(_backend)
+
+
+class BackendStats(NamedTuple):
+    """Attempts of one backend under a policy; seconds include opening."""
+
+    attempts: int = 0
+    successes: int = 0  # attempts that reached the policy's confidence
+    pages: int = 0
+    seconds: float = 0.0
+
+
+class AdaptiveBackendPolicy:
+    """
+    Chooses the order in which extraction backends try a document.
+
+    Backends are ranked by their expected cost of producing a confident
+    parse: measured seconds per page divided by their success rate, each
+    smoothed towards the backend's prior so that a few documents do not
+    settle the order. A parse tries the first backend and escalates to the
+    next only while confidence stays below min_confidence.
+
+    Statistics are kept per process, so each worker of a pool adapts to the
+    documents it sees.
+    """
+
+    def __init__(
+        self,
+        backends: Optional[Iterable[Union[str, ExtractionBackend]]] = None,
+        min_confidence: float = 90.0,
+        prior_weight: float = 5.0,
+    ):
+        """
+        Args:
+            backends: Backends or registered backend names to choose from;
+                defaults to every available registered backend
+            min_confidence (float): Confidence at which no further backend is tried
+            prior_weight (float): Weight of each backend's prior, in attempts
+        """
+        if backends is None:
+            self.backends = available_backends()
+        else:
+            self.backends = [_registry[b] if isinstance(b, str) else b for b in backends]
+        if not self.backends:
+            raise ValueError("AdaptiveBackendPolicy needs at least one backend")
+        self.min_confidence = min_confidence
+        self.prior_weight = prior_weight
+        self._lock = threading.Lock()
+        self._stats = {backend.name: BackendStats() for backend in self.backends}
+
+    def expected_cost(self, backend: ExtractionBackend) -> float:
+        """Expected seconds per page spent per confident parse by a backend."""
+        with self._lock:
+            stats = self._stats[backend.name]
+        seconds_per_page = (stats.seconds + self.prior_weight * backend.cost) / (stats.pages + self.prior_weight)
+        success_rate = (stats.successes + self.prior_weight) / (stats.attempts + self.prior_weight)
+        return seconds_per_page / max(success_rate, 1e-3)
+
+    def order(self) -> List[ExtractionBackend]:
+        """Return the backends in the order a parse should try them."""
+        return sorted(self.backends, key=self.expected_cost)
+
+    def record(self, name: str, pages: int, seconds: float, success: bool) -> None:
+        """
+        Record one attempt of a backend on a document.
+
+        Args:
+            name (str): Name of the backend
+            pages (int): Pages it extracted
+            seconds (float): Time spent, including opening the document
+            success (bool): Whether the attempt reached min_confidence
+        """
+        with self._lock:
+            stats = self._stats[name]
+            self._stats[name] = BackendStats(
+                stats.attempts + 1,
+                stats.successes + success,
+                stats.pages + pages,
+                stats.seconds + seconds,
+            )
+
+    def stats(self) -> Dict[str, BackendStats]:
+        """Return the statistics of every backend by name."""
+        with self._lock:
+            return dict(self._stats)
+
+
+_policy: Optional[AdaptiveBackendPolicy] = None
+
+
+def set_backend_policy(policy: Optional[AdaptiveBackendPolicy]) -> None:
+    """
+    Install the policy that picks extraction backends for each parse.
+
+    With no policy installed (the default) every page goes to pdfplumber,
+    with PyPDF2 re-extracting the pages it leaves empty.
+
+    Args:
+        policy (Optional[AdaptiveBackendPolicy]): Policy, or None for the default
+    """
+    global _policy
+    _policy = policy
+
+
+def backend_policy() -> Optional[AdaptiveBackendPolicy]:
+    """Return the installed backend policy, if any."""
+    return _policy
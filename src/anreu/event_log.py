@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+import multiprocessing.util
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, TextIO, Union
+
+# Event or log record waiting for the flush thread
+_Queued = Union[Dict[str, Any], logging.LogRecord]
+
+
+class EventPipeline:
+    """
+    Structured events written as JSON lines by a background thread.
+
+    emit() only appends to a bounded in-memory queue, so the caller never
+    formats JSON or waits on I/O; when the queue is full the event is
+    dropped and counted instead. The flush thread serialises events in
+    batches and writes each batch with one call. Events can be sampled and
+    rate-limited; log records from handler() always pass both.
+
+    A forked worker process gets its own flush thread on its first event.
+    Events still queued when a worker exits without calling close() are
+    lost, so pool workers call flush_on_worker_exit() from their initializer.
+    """
+
+    def __init__(
+        self,
+        stream: Union[str, TextIO],
+        batch_size: int = 512,
+        flush_interval: float = 1.0,
+        max_queue: int = 65536,
+        sample_rate: float = 1.0,
+        max_events_per_second: Optional[float] = None,
+    ):
+        """
+        Args:
+            stream (Union[str, TextIO]): JSON-lines file to append to, or an
+                open text stream
+            batch_size (int): Queued events that wake the flush thread early
+            flush_interval (float): Seconds between flushes otherwise
+            max_queue (int): Events held before new ones are dropped
+            sample_rate (float): Fraction of events kept, between 0 and 1
+            max_events_per_second (Optional[float]): Cap on kept events per
+                second, with bursts of up to one second's worth
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if batch_size < 1 or max_queue < 1:
+            raise ValueError("batch_size and max_queue must be at least 1")
+        self._owns_stream = isinstance(stream, str)
+        self.stream = open(stream, "a", encoding="utf-8") if self._owns_stream else stream
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.sample_rate = sample_rate
+        self.max_events_per_second = max_events_per_second
+        self.written = 0
+        self.dropped = 0  # lost to a full queue
+        self.skipped = 0  # left out by sampling or the rate limit
+        self._queue: Deque[_Queued] = deque()
+        self._encoder = json.JSONEncoder(default=str, ensure_ascii=False)
+        self._start()
+
+    def _start(self) -> None:
+        self._pid = os.getpid()
+        self._tokens = self.max_events_per_second or 0.0
+        self._refilled = time.monotonic()
+        self._rate_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._flush_periodically, name="anreu-events", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "EventPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def emit(self, event: Dict[str, Any], force: bool = False) -> bool:
+        """
+        Queue one event without blocking.
+
+        Args:
+            event (Dict[str, Any]): JSON-serialisable event; values that are
+                not are written as their str()
+            force (bool): Bypass sampling and the rate limit
+
+        Returns:
+            Whether the event was queued
+        """
+        self._check_fork()
+        if not force:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                self.skipped += 1
+                return False
+            if self.max_events_per_second is not None and not self._take_token():
+                self.skipped += 1
+                return False
+        return self._enqueue(event)
+
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            # Threads do not survive fork, and the parent writes its own queue
+            self._queue.clear()
+            self._start()
+
+    def _enqueue(self, item: _Queued) -> bool:
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        self._queue.append(item)
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _take_token(self) -> bool:
+        with self._rate_lock:
+            now = time.monotonic()
+            rate = self.max_events_per_second
+            self._tokens = min(rate, self._tokens + (now - self._refilled) * rate)
+            self._refilled = now
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def handler(self, level: int = logging.NOTSET) -> logging.Handler:
+        """Return a logging handler that ships records through this pipeline."""
+        return _EventLogHandler(self, level)
+
+    def flush(self) -> int:
+        """
+        Write every queued event now.
+
+        Returns:
+            Number of events written
+        """
+        with self._write_lock:
+            batch: List[str] = []
+            written = 0
+            while self._queue:
+                item = self._queue.popleft()
+                if isinstance(item, logging.LogRecord):
+                    item = _record_event(item)
+                batch.append(self._encoder.encode(item))
+                if len(batch) >= self.batch_size or not self._queue:
+                    self.stream.write("\n".join(batch) + "\n")
+                    written += len(batch)
+                    batch = []
+            if written:
+                self.stream.flush()
+                self.written += written
+            return written
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Reporting through logging could feed the failure back in
+                print(f"anreu event pipeline failed to write: {e}", file=sys.stderr)
+
+    def close(self) -> None:
+        """Stop the flush thread and write the events still queued."""
+        self._closed.set()
+        self._wake.set()
+        if self._pid == os.getpid():
+            self._thread.join()
+        self.flush()
+        if self._owns_stream:
+            self.stream.close()
+
+
+class _EventLogHandler(logging.Handler):
+    """Queues log records for an EventPipeline, which formats them later."""
+
+    def __init__(self, pipeline: EventPipeline, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.pipeline = pipeline
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.pipeline._check_fork()
+        self.pipeline._enqueue(record)
+
+
+def _record_event(record: logging.LogRecord) -> Dict[str, Any]:
+    """Structured event for a log record."""
+    event = {
+        "time": record.created,
+        "level": record.levelname,
+        "logger": record.name,
+        "message": record.getMessage(),
+    }
+    if record.exc_info:
+        event["exception"] = logging.Formatter().formatException(record.exc_info)
+    return event
+
+
+_pipeline: Optional[EventPipeline] = None
+
+
+def set_event_pipeline(pipeline: Optional[EventPipeline]) -> None:
+    """
+    Install the pipeline that receives an event for every parsed document.
+
+    With no pipeline installed (the default) successful parses are logged
+    as JSON at INFO, which costs nothing unless INFO logging is enabled.
+
+    Args:
+        pipeline (Optional[EventPipeline]): Pipeline, or None to disable events
+    """
+    global _pipeline
+    _pipeline = pipeline
+
+
+def event_pipeline() -> Optional[EventPipeline]:
+    """Return the installed event pipeline, if any."""
+    return _pipeline
+
+
+def flush_on_worker_exit() -> None:
+    """
+    Flush the installed pipeline when this worker process exits normally.
+
+    Worker processes skip atexit handlers, but run multiprocessing
+    finalizers before their daemon threads are stopped.
+    """
+    if _pipeline is not None:
+        multiprocessing.util.Finalize(None, _pipeline.flush, exitpriority=10)
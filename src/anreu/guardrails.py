@@ -0,0 +1,262 @@
+import io
+import os
+import time
+import logging
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import Connection, wait
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from src.anreu.anreu_parser import (
+    PARSE_FAILED,
+    PARSE_TIMEOUT,
+    RESOURCE_LIMIT,
+    AnreuReceipt,
+    parse_anreu_receipt,
+)
+from src.anreu.event_log import event_pipeline
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceLimits(NamedTuple):
+    """
+    Bounds on the work one document may cause; None disables a limit.
+
+    The defaults are far beyond what any genuine receipt or statement needs.
+    """
+
+    timeout: Optional[float] = 60.0  # wall-clock seconds per document
+    memory_bytes: Optional[int] = 2 << 30  # address space of a worker process
+    max_pages: Optional[int] = 1000
+    max_objects: Optional[int] = 500_000  # indirect objects in the xref
+    docs_per_worker: Optional[int] = 200  # documents before a worker is replaced
+
+
+def check_pdf_limits(source: Union[str, os.PathLike, bytes], limits: ResourceLimits) -> Optional[str]:
+    """
+    Check a PDF's page and object counts against limits without parsing pages.
+
+    Only the cross-reference table and page tree are read. A file PyPDF2
+    cannot read passes, so the full parse reports why it is unreadable.
+
+    Args:
+        source: Path to the PDF file or its bytes
+        limits (ResourceLimits): Caps to enforce
+
+    Returns:
+        Description of the exceeded limit, or None if the document is within them
+    """
+    if limits.max_pages is None and limits.max_objects is None:
+        return None
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        from PyPDF2 import PdfReader
+        reader = PdfReader(source)
+        if limits.max_objects is not None:
+            objects = sum(len(entries) for entries in reader.xref.values()) + len(reader.xref_objStm)
+            if objects > limits.max_objects:
+                return f"{objects} objects is more than {limits.max_objects}"
+        if limits.max_pages is not None:
+            pages = len(reader.pages)
+            if pages > limits.max_pages:
+                return f"{pages} pages is more than {limits.max_pages}"
+    except MemoryError:
+        return "memory limit reached reading the cross-reference table"
+    except Exception as e:
+        logger.debug(f"Limit check could not read PDF: {e}")
+    return None
+
+
+def _limit_memory(memory_bytes: Optional[int]) -> None:
+    """Cap the address space of the current process, where the OS allows it."""
+    if memory_bytes is None or resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        memory_bytes = min(memory_bytes, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not limit worker memory: {e}")
+
+
+def _parse_guarded(
+    path: str,
+    limits: ResourceLimits,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+) -> AnreuReceipt:
+    """Parse one document inside a worker, turning exhaustion into a result."""
+    try:
+        exceeded = check_pdf_limits(path, limits)
+        if exceeded is not None:
+            logger.warning(f"Skipped {path}: {exceeded}")
+            return AnreuReceipt(status="resource_limit", error=RESOURCE_LIMIT)
+        return parse_anreu_receipt(path, incremental=incremental, max_pages=max_pages)
+    except MemoryError:
+        logger.error(f"Memory limit reached parsing {path}")
+        return AnreuReceipt(status="resource_limit", error=RESOURCE_LIMIT)
+    except Exception as e:
+        logger.error(f"Unhandled error parsing PDF {path}: {e}")
+        return AnreuReceipt(status="failed", error=PARSE_FAILED)
+
+
+def _worker_main(
+    conn: Connection,
+    limits: ResourceLimits,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+) -> None:
+    """
+    Serve paths from conn until told to stop, the document quota is used
+    up, or a document exhausted the memory limit.
+    """
+    _limit_memory(limits.memory_bytes)
+    handled = 0
+    try:
+        while limits.docs_per_worker is None or handled < limits.docs_per_worker:
+            path = conn.recv()
+            if path is None:
+                break
+            receipt = _parse_guarded(path, limits, incremental, max_pages)
+            conn.send(tuple(receipt))
+            handled += 1
+            # Allocators rarely recover cleanly from a MemoryError
+            if receipt.status == "resource_limit":
+                break
+    except (EOFError, OSError):
+        pass
+    finally:
+        conn.close()
+        # Worker processes exit without running atexit handlers
+        pipeline = event_pipeline()
+        if pipeline is not None:
+            pipeline.flush()
+
+
+class _Worker:
+    """A worker process and the document it is parsing."""
+
+    def __init__(
+        self,
+        context: multiprocessing.context.BaseContext,
+        limits: ResourceLimits,
+        incremental: bool = False,
+        max_pages: Optional[int] = None,
+    ):
+        self.conn, child_conn = context.Pipe()
+        args = (child_conn, limits, incremental, max_pages)
+        self.process = context.Process(target=_worker_main, args=args, daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.handled = 0
+        self.path: Optional[str] = None
+        self.deadline: Optional[float] = None
+
+    def submit(self, path: str, timeout: Optional[float]) -> None:
+        self.conn.send(path)
+        self.path = path
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.handled += 1
+
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join()
+        self.conn.close()
+
+
+def parse_guarded(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    limits: Optional[ResourceLimits] = None,
+    receipts: bool = False,
+    incremental: bool = False,
+    max_pages: Optional[int] = None,
+) -> Iterator[Tuple[str, Union[Dict[str, Union[str, int, None]], AnreuReceipt]]]:
+    """
+    Parse PDFs in sandboxed worker processes with per-document limits.
+
+    Every worker runs under a memory cap and parses one document at a time.
+    A document that outlives its timeout has its worker killed and replaced,
+    so one hostile file costs at most the timeout and never stalls the rest
+    of the batch. Workers are also replaced after docs_per_worker documents,
+    which contains slow leaks in the PDF backends.
+
+    Args:
+        paths (Iterable[str]): Paths to the PDF files
+        workers (Optional[int]): Number of worker processes; defaults to the CPU count
+        limits (Optional[ResourceLimits]): Limits to enforce; defaults to ResourceLimits()
+        receipts (bool): Yield AnreuReceipt results instead of dicts
+        incremental (bool): As for parse_anreu_pdf
+        max_pages (Optional[int]): As for parse_anreu_pdf; documents over
+            limits.max_pages are still skipped
+
+    Yields:
+        (path, result) pairs in completion order; a document that ran out of
+        time or memory, or exceeded the page or object cap, has the "timeout"
+        or "resource_limit" status and error message
+    """
+    limits = limits or ResourceLimits()
+    if limits.docs_per_worker is not None and limits.docs_per_worker < 1:
+        raise ValueError("docs_per_worker must be at least 1")
+    workers = max(workers or os.cpu_count() or 1, 1)
+    context = multiprocessing.get_context()
+    pending: Deque[str] = deque(paths)
+    idle: List[_Worker] = []
+    busy: Dict[Connection, _Worker] = {}
+
+    def result(receipt: AnreuReceipt):
+        return receipt if receipts else receipt.as_dict()
+
+    try:
+        while pending or busy:
+            while pending and len(busy) < workers:
+                worker = idle.pop() if idle else _Worker(context, limits, incremental, max_pages)
+                worker.submit(pending.popleft(), limits.timeout)
+                busy[worker.conn] = worker
+
+            deadlines = [worker.deadline for worker in busy.values() if worker.deadline is not None]
+            timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            for conn in wait(list(busy), timeout):
+                worker = busy.pop(conn)
+                try:
+                    receipt = AnreuReceipt(*conn.recv())
+                except (EOFError, OSError):
+                    # The worker died mid-document, e.g. killed by the OOM killer
+                    logger.error(f"Worker {worker.process.pid} died while parsing {worker.path}")
+                    worker.stop(kill=True)
+                    yield worker.path, result(AnreuReceipt(status="failed", error=PARSE_FAILED))
+                    continue
+                if receipt.status == "resource_limit" or (
+                    limits.docs_per_worker is not None and worker.handled >= limits.docs_per_worker
+                ):
+                    worker.stop()
+                else:
+                    idle.append(worker)
+                yield worker.path, result(receipt)
+
+            now = time.monotonic()
+            for conn, worker in list(busy.items()):
+                if worker.deadline is not None and worker.deadline <= now:
+                    del busy[conn]
+                    logger.error(f"Parse of {worker.path} timed out after {limits.timeout} seconds")
+                    worker.stop(kill=True)
+                    yield worker.path, result(AnreuReceipt(status="timeout", error=PARSE_TIMEOUT))
+    finally:
+        for worker in idle:
+            worker.stop()
+        for worker in busy.values():
+            worker.stop(kill=True)
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import time
+import logging
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+from src.anreu.anreu_parser import PARSE_FAILED, PARSER_VERSION, parse_anreu_pdfs
+from src.anreu.guardrails import ResourceLimits
+from src.anreu.parse_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestEntry(NamedTuple):
+    """What the manifest remembers about a file it has ingested."""
+
+    size: int
+    mtime_ns: int
+    digest: str
+    parser_version: str
+
+
+class IngestedFile(NamedTuple):
+    """A file parsed by an ingestion pass."""
+
+    path: str
+    digest: str  # MD5 of the contents, as in anreu_uploads.file_hash
+    result: Dict[str, Union[str, int, None]]
+
+
+class IngestManifest:
+    """
+    SQLite record of the files ingested from an inbox directory.
+
+    Each parsed file is committed as soon as its result is in, so a run that
+    crashes resumes with the files it had not finished.
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS ingest_manifest (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                parser_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                ingested_at INTEGER NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def entries(self) -> Dict[str, ManifestEntry]:
+        """Return the manifest entry of every ingested path."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, digest, parser_version FROM ingest_manifest"
+            ).fetchall()
+        return {path: ManifestEntry(*entry) for path, *entry in rows}
+
+    def record(self, path: str, stat: os.stat_result, digest: str, result: Dict[str, Union[str, int, None]]) -> None:
+        """
+        Checkpoint one parsed file.
+
+        Args:
+            path (str): Path of the file
+            stat (os.stat_result): File status taken before it was hashed
+            digest (str): Content digest of the file
+            result (Dict): Result returned by parse_anreu_pdf
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingest_manifest "
+                "(path, size, mtime_ns, digest, parser_version, result, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest, PARSER_VERSION, json.dumps(result), time.time_ns()),
+            )
+            self._conn.commit()
+
+    def touch(self, path: str, stat: os.stat_result) -> None:
+        """Record a new size and mtime for a file whose contents did not change."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingest_manifest SET size = ?, mtime_ns = ? WHERE path = ?",
+                (stat.st_size, stat.st_mtime_ns, path),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def _inbox_files(directory: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield every PDF below directory with its status, skipping hidden files."""
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or not name.lower().endswith(".pdf"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                yield path, os.stat(path)
+            except OSError:
+                # Removed between listing and stat
+                continue
+
+
+def find_changed_files(
+    directory: str,
+    manifest: IngestManifest,
+    settle_seconds: float = 0.0,
+) -> List[Tuple[str, os.stat_result, str]]:
+    """
+    List the PDFs in directory that are new or changed since they were ingested.
+
+    A file whose size and mtime match the manifest is skipped without being
+    read. Otherwise it is hashed, and a file whose contents turn out to be
+    unchanged only has its new size and mtime recorded. Files ingested by an
+    older PARSER_VERSION count as changed.
+
+    Args:
+        directory (str): Inbox directory, searched recursively
+        manifest (IngestManifest): Manifest of earlier runs
+        settle_seconds (float): Skip files modified more recently than this,
+            as they may still be being written
+
+    Returns:
+        (path, stat, digest) of every file that needs parsing
+    """
+    known = manifest.entries()
+    cutoff = time.time_ns() - int(settle_seconds * 1e9)
+    changed = []
+    for path, stat in _inbox_files(directory):
+        if settle_seconds and stat.st_mtime_ns > cutoff:
+            continue
+        entry = known.get(path)
+        current = entry is not None and entry.parser_version == PARSER_VERSION
+        if current and (entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            continue
+        try:
+            digest = file_digest(path)
+        except OSError as e:
+            logger.warning(f"Could not read {path}: {e}")
+            continue
+        if current and entry.digest == digest:
+            manifest.touch(path, stat)
+            continue
+        changed.append((path, stat, digest))
+    return changed
+
+
+def ingest_directory(
+    directory: str,
+    manifest: IngestManifest,
+    workers: Optional[int] = None,
+    settle_seconds: float = 0.0,
+    limits: Optional[ResourceLimits] = None,
+) -> Iterator[IngestedFile]:
+    """
+    Parse the new and changed PDFs in an inbox directory.
+
+    Each result is checkpointed in the manifest as soon as it arrives, so
+    the work of a run is proportional to the files that changed and an
+    interrupted run picks up where it stopped.
+
+    Args:
+        directory (str): Inbox directory, searched recursively
+        manifest (IngestManifest): Manifest of earlier runs
+        workers (Optional[int]): Worker processes, as for parse_anreu_pdfs
+        settle_seconds (float): Skip files modified more recently than this
+        limits (Optional[ResourceLimits]): Per-document limits, as for
+            parse_anreu_pdfs; a file that exceeds them is recorded with its
+            timeout or resource_limit result and not retried until it changes
+
+    Yields:
+        IngestedFile for every parsed file, in completion order
+    """
+    changed = {path: (stat, digest) for path, stat, digest in find_changed_files(directory, manifest, settle_seconds)}
+    if not changed:
+        return
+    logger.info(f"Ingesting {len(changed)} new or changed files from {directory}")
+    for path, result in parse_anreu_pdfs(list(changed), workers=workers, limits=limits):
+        stat, digest = changed[path]
+        # A crashed worker says nothing about the file, so retry it next run
+        if result.get("error") != PARSE_FAILED:
+            manifest.record(path, stat, digest, result)
+        yield IngestedFile(path, digest, result)
+
+
+def follow_directory(
+    directory: str,
+    manifest: IngestManifest,
+    workers: Optional[int] = None,
+    interval: float = 5.0,
+    settle_seconds: float = 2.0,
+    stop_event: Optional[threading.Event] = None,
+    limits: Optional[ResourceLimits] = None,
+) -> Iterator[IngestedFile]:
+    """
+    Ingest an inbox directory continuously, picking up files as they arrive.
+
+    Args:
+        directory (str): Inbox directory, searched recursively
+        manifest (IngestManifest): Manifest of earlier runs
+        workers (Optional[int]): Worker processes, as for parse_anreu_pdfs
+        interval (float): Seconds to wait between scans
+        settle_seconds (float): Leave files alone until they have not been
+            modified for this long
+        stop_event (Optional[threading.Event]): Once set, following stops
+            after the current pass
+        limits (Optional[ResourceLimits]): Per-document limits, as for ingest_directory
+
+    Yields:
+        IngestedFile for every parsed file
+    """
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        yield from ingest_directory(directory, manifest, workers, settle_seconds, limits)
+        stop_event.wait(interval)
+
+
+def ingest(
+    directory: str,
+    manifest_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    follow: bool = False,
+    interval: float = 5.0,
+    settle_seconds: Optional[float] = None,
+    output: Optional[TextIO] = None,
+    limits: Optional[ResourceLimits] = None,
+) -> int:
+    """
+    Ingest an inbox directory, writing one JSON line per parsed file.
+
+    Args:
+        directory (str): Inbox directory, searched recursively
+        manifest_path (Optional[str]): SQLite manifest; defaults to
+            .anreu-manifest.db inside the directory
+        workers (Optional[int]): Worker processes; defaults to the CPU count
+        follow (bool): Keep watching the directory until interrupted
+        interval (float): Seconds between scans when following
+        settle_seconds (Optional[float]): Skip files modified more recently
+            than this; defaults to 2 seconds when following and 0 otherwise
+        output (Optional[TextIO]): Where to write the JSON lines; defaults to stdout
+        limits (Optional[ResourceLimits]): Per-document limits, as for ingest_directory
+
+    Returns:
+        Number of files parsed
+    """
+    output = output or sys.stdout
+    if settle_seconds is None:
+        settle_seconds = 2.0 if follow else 0.0
+    manifest = IngestManifest(manifest_path or os.path.join(directory, ".anreu-manifest.db"))
+    parsed = 0
+    try:
+        if follow:
+            files = follow_directory(directory, manifest, workers, interval, settle_seconds, limits=limits)
+        else:
+            files = ingest_directory(directory, manifest, workers, settle_seconds, limits)
+        for ingested in files:
+            output.write(json.dumps({"path": ingested.path, "file_hash": ingested.digest, "result": ingested.result}) + "\n")
+            output.flush()
+            parsed += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manifest.close()
+    logger.info(f"Ingested {parsed} files from {directory}")
+    return parsed
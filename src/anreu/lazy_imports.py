@@ -0,0 +1,43 @@
+import importlib
+from time import perf_counter
+from typing import Any, Callable, Dict
+
+# Seconds spent on each lazy import, by import spec, for --import-time
+import_seconds: Dict[str, float] = {}
+
+
+def lazy_imports(namespace: Dict[str, Any], **imports: str) -> Callable[[str], Any]:
+    """
+    Build a loader that imports a module's heavy dependencies on first use.
+
+    Each keyword names a module global and where it comes from, either
+    "package.module" or "package.module:attribute". The loader imports it
+    the first time it is asked for and stores it in namespace, so later
+    lookups are plain dict hits and tests can patch the global as usual.
+    Assign the loader to the module's __getattr__ as well, so that
+    module.name works before the first use.
+
+    Args:
+        namespace (Dict[str, Any]): The module's globals()
+        **imports (str): Global name to import spec
+
+    Returns:
+        Function returning a lazily imported global by name
+    """
+    def load(name: str) -> Any:
+        try:
+            return namespace[name]
+        except KeyError:
+            pass
+        if name not in imports:
+            raise AttributeError(f"module {namespace['__name__']!r} has no attribute {name!r}")
+        module_name, _, attribute = imports[name].partition(":")
+        started = perf_counter()
+        value = importlib.import_module(module_name)
+        import_seconds.setdefault(imports[name], perf_counter() - started)
+        if attribute:
+            value = getattr(value, attribute)
+        namespace[name] = value
+        return value
+
+    return load
@@ -0,0 +1,253 @@
+import io
+import os
+import math
+import shutil
+import hashlib
+import logging
+import threading
+import subprocess
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.anreu.parse_cache import ParseCache
+
+logger = logging.getLogger(__name__)
+
+# Render resolution bounds; scans are rendered at their own resolution
+# within these, pages without images at DEFAULT_DPI
+MIN_DPI = 150
+DEFAULT_DPI = 300
+MAX_DPI = 400
+
+# Cap on rendered pixels per page, so oversized pages get a lower DPI
+MAX_PIXELS = 12_000_000
+
+
+class TesseractEngine:
+    """
+    OCR for pages without a text layer using a local tesseract binary.
+
+    Pages are rendered with pdfium one at a time in the calling thread (pdfium
+    is not thread-safe) and recognised by tesseract processes running in a
+    thread pool, so rendering overlaps recognition. Recognised text is cached
+    by a hash of the rendered page, in memory and optionally in a ParseCache.
+
+    By default the pool has one tesseract process per CPU, or a single one
+    inside a worker process: each worker of a parse pool runs its own
+    engine, so one per CPU there would start CPUs squared processes.
+    """
+
+    def __init__(
+        self,
+        command: str = "tesseract",
+        lang: str = "eng",
+        workers: Optional[int] = None,
+        timeout: float = 60.0,
+        memory_entries: int = 256,
+    ):
+        self.command = command
+        self.lang = lang
+        self.workers = workers
+        self.timeout = timeout
+        self._memory_entries = memory_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def cache_version(self) -> str:
+        """Version tag of this engine's entries in a ParseCache."""
+        return f"ocr:{self.lang}"
+
+    def available(self) -> bool:
+        """Return whether the tesseract binary can be found."""
+        return shutil.which(self.command) is not None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                workers = self.workers or _default_workers()
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="anreu-ocr")
+            return self._executor
+
+    def recognize(self, image: bytes, dpi: int) -> Optional[str]:
+        """
+        Run tesseract on one rendered page.
+
+        Args:
+            image (bytes): Page image in a format tesseract reads, e.g. PGM
+            dpi (int): Resolution the page was rendered at
+
+        Returns:
+            The recognised text, or None if tesseract failed or timed out
+        """
+        try:
+            completed = subprocess.run(
+                [self.command, "stdin", "stdout", "-l", self.lang, "--dpi", str(dpi)],
+                input=image,
+                capture_output=True,
+                timeout=self.timeout,
+                check=True,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"tesseract failed: {e}")
+            return None
+        return completed.stdout.decode("utf-8", errors="replace")
+
+    def _cached(self, key: str, cache: Optional[ParseCache]) -> Optional[str]:
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                return text
+        if cache is not None:
+            cached = cache.get(key, self.cache_version)
+            if cached is not None:
+                self._remember(key, cached["text"])
+                return cached["text"]
+        return None
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._memory_entries:
+                self._memory.popitem(last=False)
+
+    def ocr_pages(
+        self,
+        pdf: Union[str, BinaryIO],
+        page_indices: Iterable[int],
+        cache: Optional[ParseCache] = None,
+    ) -> Dict[int, str]:
+        """
+        Recognise the text of selected pages in parallel.
+
+        Args:
+            pdf (Union[str, BinaryIO]): Path to the PDF or a seekable stream over it
+            page_indices (Iterable[int]): Zero-based indices of the pages to OCR
+            cache (Optional[ParseCache]): Persistent cache for recognised text
+
+        Returns:
+            Mapping of page index to recognised text; pages that could not be
+            rendered or recognised are left out, and failed recognitions are
+            not cached, so a later parse tries them again
+        """
+        import pypdfium2
+
+        pending: List[Tuple[int, str, Future]] = []
+        in_flight: Dict[str, Future] = {}
+        texts: Dict[int, str] = {}
+        try:
+            document = pypdfium2.PdfDocument(pdf)
+        except Exception as e:
+            logger.warning(f"Could not open PDF for OCR: {e}")
+            return texts
+        try:
+            for index in page_indices:
+                try:
+                    image, dpi = _render_page(document[index])
+                except Exception as e:
+                    logger.warning(f"Could not render page {index} for OCR: {e}")
+                    continue
+                key = hashlib.md5(image).hexdigest()
+                text = self._cached(key, cache)
+                if text is not None:
+                    texts[index] = text
+                    continue
+                # Identical pages, e.g. repeated scans, are recognised once
+                future = in_flight.get(key)
+                if future is None:
+                    future = in_flight[key] = self._pool().submit(self.recognize, image, dpi)
+                pending.append((index, key, future))
+        finally:
+            document.close()
+
+        for index, key, future in pending:
+            if future.result() is not None:
+                texts[index] = future.result()
+        for key, future in in_flight.items():
+            if future.result() is None:
+                continue
+            self._remember(key, future.result())
+            if cache is not None:
+                cache.put(key, self.cache_version, {"text": future.result()})
+        return texts
+
+    def close(self) -> None:
+        """Shut the recognition thread pool down."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+def page_dpi(page) -> int:
+    """
+    Choose the render resolution of a pdfium page.
+
+    A page showing a scanned image is rendered at the image's own resolution,
+    so recognition sees the scan's pixels without resampling; other pages use
+    DEFAULT_DPI. The result is clamped to MIN_DPI..MAX_DPI and lowered for
+    pages so large that they would exceed MAX_PIXELS.
+    """
+    import pypdfium2
+
+    dpi = DEFAULT_DPI
+    best_area = 0.0
+    for image in page.get_objects(filter=[pypdfium2.raw.FPDF_PAGEOBJ_IMAGE], max_depth=2):
+        left, bottom, right, top = image.get_bounds()
+        area = (right - left) * (top - bottom)
+        if area > best_area and right > left:
+            best_area = area
+            width_px, _ = image.get_px_size()
+            dpi = width_px / ((right - left) / 72)
+    width, height = page.get_size()
+    pixel_limit = math.sqrt(MAX_PIXELS / max(width / 72 * height / 72, 1e-6))
+    return int(max(MIN_DPI, min(dpi, MAX_DPI, pixel_limit)))
+
+
+def _render_page(page) -> Tuple[bytes, int]:
+    """Render a page to a greyscale PGM image; returns the image and its DPI."""
+    dpi = page_dpi(page)
+    bitmap = page.render(scale=dpi / 72, grayscale=True)
+    buffer = io.BytesIO()
+    bitmap.to_pil().convert("L").save(buffer, format="PPM")
+    return buffer.getvalue(), dpi
+
+
+_engine: Optional[TesseractEngine] = None
+_engine_detected = False
+
+
+def set_ocr_engine(engine: Optional[TesseractEngine]) -> None:
+    """
+    Install the engine used for pages without a text layer.
+
+    By default a TesseractEngine is used when tesseract is on the PATH.
+
+    Args:
+        engine (Optional[TesseractEngine]): Engine, or None to disable OCR
+    """
+    global _engine, _engine_detected
+    _engine = engine
+    _engine_detected = True
+
+
+def _default_workers() -> int:
+    """Size of an engine's tesseract pool when none is given."""
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return os.cpu_count() or 1
+
+
+def ocr_engine() -> Optional[TesseractEngine]:
+    """Return the installed OCR engine, detecting tesseract on first use."""
+    global _engine, _engine_detected
+    if not _engine_detected:
+        engine = TesseractEngine()
+        _engine = engine if engine.available() else None
+        _engine_detected = True
+    return _engine
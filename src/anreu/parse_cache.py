@@ -0,0 +1,137 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Optional, Union
+
+ParseResult = Dict[str, Union[str, int, None]]
+
+
+def file_digest(pdf_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the content digest used to key cached parse results.
+
+    MD5 matches the anreu_uploads.file_hash column, so cache keys line up
+    with the hashes the upload route already stores.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        chunk_size (int): Bytes read per iteration
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.md5()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def buffer_digest(data: Union[bytes, memoryview]) -> str:
+    """
+    Compute the content digest of PDF bytes already held in memory.
+
+    Args:
+        data (Union[bytes, memoryview]): Contents of the PDF file
+
+    Returns:
+        Hex digest of the contents, identical to file_digest of the same file
+    """
+    return hashlib.md5(data).hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent content-addressed cache of ANREU parse results.
+
+    Entries are keyed on the content digest plus a parser-version tag and
+    stored in SQLite. Once the cache holds more than max_entries rows the
+    least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 100_000):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS parse_cache (
+                digest TEXT NOT NULL,
+                parser_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                last_access INTEGER NOT NULL,
+                PRIMARY KEY (digest, parser_version)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_parse_cache_last_access ON parse_cache (last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, digest: str, parser_version: str) -> Optional[ParseResult]:
+        """
+        Look up a cached result and mark it as recently used.
+
+        Args:
+            digest (str): Content digest of the PDF
+            parser_version (str): Parser version the result was produced by
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM parse_cache WHERE digest = ? AND parser_version = ?",
+                (digest, parser_version),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE parse_cache SET last_access = ? WHERE digest = ? AND parser_version = ?",
+                (time.time_ns(), digest, parser_version),
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, digest: str, parser_version: str, result: ParseResult) -> None:
+        """
+        Store a parse result, evicting least recently used entries if full.
+
+        Args:
+            digest (str): Content digest of the PDF
+            parser_version (str): Parser version that produced the result
+            result (ParseResult): Result returned by parse_anreu_pdf
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (digest, parser_version, result, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (digest, parser_version, json.dumps(result), time.time_ns()),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM parse_cache WHERE rowid IN "
+                    "(SELECT rowid FROM parse_cache ORDER BY last_access, rowid LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
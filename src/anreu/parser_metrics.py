@@ -0,0 +1,154 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+# Upper bounds, in seconds, of the total-latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ParseStats:
+    """Per-stage measurements of one parse_anreu_pdf call; times are in seconds."""
+
+    __slots__ = (
+        "open_seconds",
+        "page_seconds",
+        "pages",
+        "fallback_pages",
+        "regex_seconds",
+        "confidence",
+        "total_seconds",
+        "outcome",
+    )
+
+    def __init__(self):
+        self.open_seconds = 0.0
+        self.page_seconds: Dict[str, float] = {}  # extraction time per backend
+        self.pages: Dict[str, int] = {}  # pages extracted per backend
+        self.fallback_pages = 0  # pages pdfplumber left empty
+        self.regex_seconds = 0.0
+        self.confidence: Optional[float] = None
+        self.total_seconds = 0.0
+        self.outcome = ""
+
+    def add_page(self, backend: str, seconds: float) -> None:
+        """Record one page extraction attempt by a backend."""
+        self.page_seconds[backend] = self.page_seconds.get(backend, 0.0) + seconds
+        self.pages[backend] = self.pages.get(backend, 0) + 1
+
+    def merge(self, other: "ParseStats") -> None:
+        """Add the extraction measurements of other, e.g. of one backend's attempt."""
+        self.open_seconds += other.open_seconds
+        self.regex_seconds += other.regex_seconds
+        self.fallback_pages += other.fallback_pages
+        for backend, seconds in other.page_seconds.items():
+            self.page_seconds[backend] = self.page_seconds.get(backend, 0.0) + seconds
+        for backend, pages in other.pages.items():
+            self.pages[backend] = self.pages.get(backend, 0) + pages
+
+    def as_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+MetricsHook = Callable[[ParseStats], None]
+
+_hook: Optional[MetricsHook] = None
+
+
+def set_metrics_hook(hook: Optional[MetricsHook]) -> None:
+    """
+    Install the callback that receives a ParseStats after every parse.
+
+    With no hook installed (the default) the parser skips all timing work.
+
+    Args:
+        hook (Optional[MetricsHook]): Callback, or None to disable metrics
+    """
+    global _hook
+    _hook = hook
+
+
+def metrics_hook() -> Optional[MetricsHook]:
+    """Return the installed metrics callback, if any."""
+    return _hook
+
+
+class PrometheusCollector:
+    """
+    Metrics hook that aggregates ParseStats into Prometheus counters.
+
+    Install it with set_metrics_hook(collector) and serve render() from a
+    /metrics endpoint.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.documents: Dict[str, int] = {}
+        self.pages: Dict[str, int] = {}
+        self.page_seconds: Dict[str, float] = {}
+        self.fallback_pages = 0
+        self.stage_seconds = {"open": 0.0, "regex": 0.0}
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.latency_counts = [0] * len(buckets)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+
+    def __call__(self, stats: ParseStats) -> None:
+        with self._lock:
+            self.documents[stats.outcome] = self.documents.get(stats.outcome, 0) + 1
+            for backend, count in stats.pages.items():
+                self.pages[backend] = self.pages.get(backend, 0) + count
+                self.page_seconds[backend] = self.page_seconds.get(backend, 0.0) + stats.page_seconds[backend]
+            self.fallback_pages += stats.fallback_pages
+            self.stage_seconds["open"] += stats.open_seconds
+            self.stage_seconds["regex"] += stats.regex_seconds
+            if stats.confidence is not None:
+                self.confidence_sum += stats.confidence
+                self.confidence_count += 1
+            for i, bound in enumerate(self.buckets):
+                if stats.total_seconds <= bound:
+                    self.latency_counts[i] += 1
+            self.latency_sum += stats.total_seconds
+            self.latency_count += 1
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines: List[str] = [
+                "# HELP anreu_parse_documents_total Parsed documents by outcome.",
+                "# TYPE anreu_parse_documents_total counter",
+            ]
+            lines += [f'anreu_parse_documents_total{{outcome="{k}"}} {v}' for k, v in sorted(self.documents.items())]
+            lines += [
+                "# HELP anreu_parse_pages_total Page extractions by backend.",
+                "# TYPE anreu_parse_pages_total counter",
+            ]
+            lines += [f'anreu_parse_pages_total{{backend="{k}"}} {v}' for k, v in sorted(self.pages.items())]
+            lines += [
+                "# HELP anreu_parse_fallback_pages_total Pages pdfplumber returned no text for.",
+                "# TYPE anreu_parse_fallback_pages_total counter",
+                f"anreu_parse_fallback_pages_total {self.fallback_pages}",
+                "# HELP anreu_parse_stage_seconds_total Time spent per parse stage.",
+                "# TYPE anreu_parse_stage_seconds_total counter",
+            ]
+            stages = dict(self.stage_seconds)
+            stages.update({f"extract_{k}": v for k, v in self.page_seconds.items()})
+            lines += [f'anreu_parse_stage_seconds_total{{stage="{k}"}} {v:.6f}' for k, v in sorted(stages.items())]
+            lines += [
+                "# HELP anreu_parse_confidence Field confidence of parsed documents.",
+                "# TYPE anreu_parse_confidence summary",
+                f"anreu_parse_confidence_sum {self.confidence_sum:.6f}",
+                f"anreu_parse_confidence_count {self.confidence_count}",
+                "# HELP anreu_parse_seconds Total parse latency.",
+                "# TYPE anreu_parse_seconds histogram",
+            ]
+            lines += [
+                f'anreu_parse_seconds_bucket{{le="{bound}"}} {count}'
+                for bound, count in zip(self.buckets, self.latency_counts)
+            ]
+            lines += [
+                f'anreu_parse_seconds_bucket{{le="+Inf"}} {self.latency_count}',
+                f"anreu_parse_seconds_sum {self.latency_sum:.6f}",
+                f"anreu_parse_seconds_count {self.latency_count}",
+            ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,307 @@
+import io
+import os
+import sys
+import json
+import time
+import queue
+import base64
+import logging
+import threading
+import socketserver
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from src.anreu.anreu_parser import PARSE_FAILED, parse_anreu_pdf
+from src.anreu.event_log import flush_on_worker_exit
+from src.anreu.parse_cache import ParseCache
+
+logger = logging.getLogger(__name__)
+
+# Request options forwarded to parse_anreu_pdf
+REQUEST_OPTIONS = ("incremental", "max_pages", "triage", "ocr")
+
+# Per-worker cache, opened by the pool initializer
+_worker_cache: Optional[ParseCache] = None
+
+
+def _init_worker(cache_path: Optional[str]) -> None:
+    """Flush the worker's events when it exits and open the shared parse cache once."""
+    global _worker_cache
+    flush_on_worker_exit()
+    if cache_path:
+        _worker_cache = ParseCache(cache_path)
+
+
+def _warm_worker() -> int:
+    """No-op task used to start a worker before the first request arrives."""
+    return os.getpid()
+
+
+def _parse_request(source: Any, options: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    """
+    Parse one request inside a worker.
+
+    Returns:
+        The parse result and the time spent parsing in milliseconds
+    """
+    start = time.perf_counter()
+    result = parse_anreu_pdf(source, cache=_worker_cache, **options)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _decode_request(line: str) -> Tuple[Any, Any, Dict[str, Any]]:
+    """
+    Decode a JSON-lines request into (id, source, options).
+
+    A request holds an "id", either a "path" or base64 "data", and any of
+    the REQUEST_OPTIONS, e.g. {"id": 1, "path": "receipt.pdf", "incremental": true}.
+    """
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    if "path" in request:
+        source = request["path"]
+    elif "data" in request:
+        source = base64.b64decode(request["data"], validate=True)
+    else:
+        raise ValueError("request needs a path or base64 data")
+    options = {key: request[key] for key in REQUEST_OPTIONS if key in request}
+    return request.get("id"), source, options
+
+
+class ParserServer:
+    """
+    Warm pool of parser processes answering JSON-lines requests.
+
+    At most max_in_flight requests are queued or running at once; reading
+    the next request blocks until a slot frees up, which pushes back on the
+    client through the pipe or socket. Responses are written in completion
+    order and carry the request id plus queue and parse timings.
+
+    Each stream writes its responses from a thread of its own, so a client
+    that is slow to read them holds up only its own requests. A worker that
+    dies breaks the whole pool: the requests it held are answered with an
+    error and a fresh pool takes over.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_in_flight: int = 64, cache_path: Optional[str] = None):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight
+        self._cache_path = cache_path
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool_lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._cache_path,),
+        )
+
+    def _start_workers(self, executor: ProcessPoolExecutor) -> List[Future]:
+        return [executor.submit(_warm_worker) for _ in range(self.workers)]
+
+    def warm(self) -> None:
+        """Start every worker process so the first requests skip startup."""
+        for future in self._start_workers(self._executor):
+            future.result()
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> None:
+        """Swap a broken pool for a fresh one, unless another thread already has."""
+        with self._pool_lock:
+            if self._executor is not broken:
+                return
+            logger.error("A worker process died; starting a new worker pool")
+            self._executor = self._new_executor()
+            # Warm the new workers without waiting for them
+            self._start_workers(self._executor)
+        broken.shutdown(wait=False)
+
+    def _submit_parse(self, source: Any, options: Dict[str, Any]) -> Tuple[ProcessPoolExecutor, Future]:
+        executor = self._executor
+        try:
+            return executor, executor.submit(_parse_request, source, options)
+        except BrokenProcessPool:
+            self._replace_broken(executor)
+            executor = self._executor
+            return executor, executor.submit(_parse_request, source, options)
+
+    def submit(self, line: str, respond: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Queue one request line, blocking while max_in_flight are pending.
+
+        Args:
+            line (str): JSON-encoded request
+            respond (Callable): Called with the response once it is ready,
+                on the pool's result thread, so it must not block
+        """
+        received = time.perf_counter()
+        try:
+            request_id, source, options = _decode_request(line)
+        except (ValueError, TypeError) as e:
+            respond({"id": None, "error": f"Invalid request: {e}"})
+            return
+
+        self._slots.acquire()
+
+        def done(future: Future) -> None:
+            total_ms = (time.perf_counter() - received) * 1000
+            try:
+                result, parse_ms = future.result()
+                response = {
+                    "id": request_id,
+                    "result": result,
+                    "timing": {
+                        "queue_ms": round(total_ms - parse_ms, 3),
+                        "parse_ms": round(parse_ms, 3),
+                        "total_ms": round(total_ms, 3),
+                    },
+                }
+            except Exception as e:
+                logger.error(f"Worker failed on request {request_id}: {e}")
+                if isinstance(e, BrokenProcessPool):
+                    self._replace_broken(executor)
+                response = {"id": request_id, "error": PARSE_FAILED}
+            try:
+                respond(response)
+            finally:
+                self._slots.release()
+
+        try:
+            executor, future = self._submit_parse(source, options)
+            future.add_done_callback(done)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def handle_stream(self, reader: TextIO, writer: TextIO) -> None:
+        """
+        Answer every request read from reader, then wait for the responses.
+
+        At most max_in_flight responses of the stream are waiting to be
+        written at once. Once writing fails, e.g. because the client has
+        disconnected, no further requests are read and the remaining
+        responses are discarded.
+
+        Args:
+            reader (TextIO): Source of JSON-lines requests
+            writer (TextIO): Destination of JSON-lines responses
+        """
+        responses: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        pending = threading.Condition()
+        in_flight = 0
+        disconnected = False
+
+        def write_responses() -> None:
+            nonlocal in_flight, disconnected
+            while True:
+                response = responses.get()
+                if response is None:
+                    return
+                try:
+                    if not disconnected:
+                        writer.write(json.dumps(response) + "\n")
+                        writer.flush()
+                except OSError as e:
+                    logger.warning(f"Could not write response, dropping the rest of the stream: {e}")
+                    disconnected = True
+                finally:
+                    with pending:
+                        in_flight -= 1
+                        pending.notify_all()
+
+        thread = threading.Thread(target=write_responses, name="anreu-responses", daemon=True)
+        thread.start()
+        try:
+            for line in reader:
+                if not line.strip():
+                    continue
+                with pending:
+                    pending.wait_for(lambda: in_flight < self.max_in_flight)
+                    if disconnected:
+                        break
+                    in_flight += 1
+                try:
+                    self.submit(line, responses.put)
+                except Exception:
+                    with pending:
+                        in_flight -= 1
+                    raise
+        finally:
+            with pending:
+                pending.wait_for(lambda: in_flight == 0)
+            responses.put(None)
+            thread.join()
+
+    def close(self) -> None:
+        """Shut the worker pool down."""
+        with self._pool_lock:
+            executor = self._executor
+        executor.shutdown()
+
+
+def serve_stdio(server: ParserServer, stdin: Optional[TextIO] = None, stdout: Optional[TextIO] = None) -> None:
+    """Serve JSON-lines requests from stdin until it is closed."""
+    server.handle_stream(stdin or sys.stdin, stdout or sys.stdout)
+
+
+def serve_unix_socket(server: ParserServer, socket_path: str) -> socketserver.ThreadingUnixStreamServer:
+    """
+    Create a Unix socket server where each connection speaks JSON lines.
+
+    The caller runs serve_forever() on the returned server and shuts it down.
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            text_in = io.TextIOWrapper(self.rfile, encoding="utf-8")
+            text_out = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+            try:
+                server.handle_stream(text_in, text_out)
+            finally:
+                # The handler closes the underlying socket files itself
+                text_in.detach()
+                text_out.detach()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    unix_server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    unix_server.daemon_threads = True
+    return unix_server
+
+
+def serve(
+    workers: Optional[int] = None,
+    max_in_flight: int = 64,
+    socket_path: Optional[str] = None,
+    cache_path: Optional[str] = None,
+) -> None:
+    """
+    Run the warm parser worker until stdin closes or the process is stopped.
+
+    Args:
+        workers (Optional[int]): Number of worker processes; defaults to the CPU count
+        max_in_flight (int): Maximum queued or running requests
+        socket_path (Optional[str]): Listen on this Unix socket instead of stdin/stdout
+        cache_path (Optional[str]): SQLite parse cache shared by the workers
+    """
+    server = ParserServer(workers, max_in_flight, cache_path)
+    try:
+        server.warm()
+        if socket_path is None:
+            serve_stdio(server)
+            return
+        unix_server = serve_unix_socket(server, socket_path)
+        logger.info(f"ANREU parser listening on {socket_path}")
+        try:
+            unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            unix_server.server_close()
+            os.unlink(socket_path)
+    finally:
+        server.close()
@@ -0,0 +1,173 @@
+import csv
+import json
+import math
+from array import array
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from src.anreu.anreu_parser import AnreuReceipt
+
+# Column order of the JSONL and CSV output
+COLUMNS = ("source",) + AnreuReceipt._fields
+
+_INT_COLUMNS = ("serial_start", "serial_end", "vintage")
+_STRING_COLUMNS = ("project_id", "facility", "from_account", "to_account", "status", "error")
+
+# Stored for absent int fields; the parser only extracts non-negative numbers
+_MISSING = -1
+
+# Stored for int fields too large for an int64, whose values are kept aside
+_OVERFLOW = -2
+
+# Largest value an int64 column can hold
+_INT64_MAX = (1 << 63) - 1
+
+# Rows serialised per write call
+_WRITE_CHUNK = 1024
+
+
+class ReceiptBatch:
+    """
+    Column-oriented store for the results of a large parse job.
+
+    Serials and vintages live in int64 arrays and confidences in a float
+    array. Strings are interned: every distinct project, facility, account,
+    status and error text is stored once and rows hold 32-bit codes, which
+    keeps millions of receipts from the same registry accounts compact.
+    The rare serial too large for an int64, e.g. from a garbled receipt, is
+    kept in a per-column dict by row so that it still reads back unchanged.
+    """
+
+    def __init__(self):
+        self._sources: List[Optional[str]] = []
+        self._ints = {name: array("q") for name in _INT_COLUMNS}
+        self._overflow: Dict[str, Dict[int, int]] = {name: {} for name in _INT_COLUMNS}
+        self._codes = {name: array("I") for name in _STRING_COLUMNS}
+        self._confidence = array("d")
+        self._strings: List[Optional[str]] = [None]  # code 0 is None
+        self._string_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def __getitem__(self, index: int) -> AnreuReceipt:
+        if index < 0:
+            index += len(self)
+        values = {name: self._int_value(name, index) for name in _INT_COLUMNS}
+        values.update((name, self._strings[self._codes[name][index]]) for name in _STRING_COLUMNS)
+        confidence = self._confidence[index]
+        return AnreuReceipt(**values, confidence=None if math.isnan(confidence) else confidence)
+
+    def __iter__(self) -> Iterator[AnreuReceipt]:
+        for source, *values in self._rows():
+            yield AnreuReceipt(*values)
+
+    def source(self, index: int) -> Optional[str]:
+        """Return the path or other label the receipt at index was added with."""
+        return self._sources[index]
+
+    def items(self) -> Iterator[Tuple[Optional[str], AnreuReceipt]]:
+        """Yield (source, receipt) pairs in insertion order."""
+        return zip(self._sources, self)
+
+    def _int_value(self, name: str, index: int) -> Optional[int]:
+        value = self._ints[name][index]
+        if value == _MISSING:
+            return None
+        if value == _OVERFLOW:
+            return self._overflow[name][index]
+        return value
+
+    def _int_column(self, name: str) -> Iterator[Optional[int]]:
+        if self._overflow[name]:
+            return (self._int_value(name, index) for index in range(len(self)))
+        return (None if value == _MISSING else value for value in self._ints[name])
+
+    def _intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._string_codes.get(value)
+        if code is None:
+            code = self._string_codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def append(
+        self,
+        result: Union[AnreuReceipt, Dict[str, Union[str, int, None]]],
+        source: Optional[str] = None,
+    ) -> None:
+        """
+        Add one parse result.
+
+        Args:
+            result (Union[AnreuReceipt, Dict]): An AnreuReceipt or a
+                parse_anreu_pdf result dict
+            source (Optional[str]): Path or other label for the document
+        """
+        receipt = result if isinstance(result, AnreuReceipt) else AnreuReceipt.from_result(result)
+        for name in _INT_COLUMNS:
+            value = getattr(receipt, name)
+            if value is None:
+                value = _MISSING
+            elif value > _INT64_MAX:
+                self._overflow[name][len(self._sources)] = value
+                value = _OVERFLOW
+            self._ints[name].append(value)
+        for name in _STRING_COLUMNS:
+            self._codes[name].append(self._intern(getattr(receipt, name)))
+        self._confidence.append(math.nan if receipt.confidence is None else receipt.confidence)
+        self._sources.append(source)
+
+    def extend(self, results: Iterable[Tuple[str, Union[AnreuReceipt, Dict[str, Union[str, int, None]]]]]) -> None:
+        """
+        Add (source, result) pairs, e.g. straight from parse_anreu_pdfs.
+
+        Args:
+            results (Iterable[Tuple[str, Union[AnreuReceipt, Dict]]]): Pairs to add
+        """
+        for source, result in results:
+            self.append(result, source)
+
+    def _rows(self) -> Iterator[tuple]:
+        """Yield each row as a tuple of plain values in COLUMNS order."""
+        strings = self._strings
+        ints = [self._int_column(name) for name in _INT_COLUMNS]
+        codes = [(strings[code] for code in self._codes[name]) for name in _STRING_COLUMNS]
+        project, facility, from_account, to_account, status, error = codes
+        confidence = (None if math.isnan(value) else value for value in self._confidence)
+        return zip(self._sources, *ints, project, facility, from_account, to_account, status, confidence, error)
+
+    def write_jsonl(self, f: TextIO) -> int:
+        """
+        Write one JSON object per receipt, with every field in COLUMNS.
+
+        Args:
+            f (TextIO): Text file to write to
+
+        Returns:
+            Number of rows written
+        """
+        rows = self._rows()
+        written = 0
+        while True:
+            chunk = list(islice(rows, _WRITE_CHUNK))
+            if not chunk:
+                return written
+            f.writelines(json.dumps(dict(zip(COLUMNS, row))) + "\n" for row in chunk)
+            written += len(chunk)
+
+    def write_csv(self, f: TextIO) -> int:
+        """
+        Write the receipts as CSV with a COLUMNS header; missing values are empty.
+
+        Args:
+            f (TextIO): Text file opened with newline=""
+
+        Returns:
+            Number of rows written
+        """
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(self._rows())
+        return len(self)
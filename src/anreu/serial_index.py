@@ -0,0 +1,277 @@
+import re
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from src.anreu.anreu_parser import AnreuReceipt
+
+# "ACCU1000000-ACCU1000999" as stored in reserve_allocations.serial_range,
+# with or without the ACCU prefixes
+_SERIAL_RANGE_TEXT = re.compile(r"\s*(?:ACCU)?(\d+)\s*(?:-|to)\s*(?:ACCU)?(\d+)\s*", re.IGNORECASE)
+
+# Smallest and largest serials the int64 arrays of the index can hold
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class SerialRange(NamedTuple):
+    """Inclusive range of ACCU serial numbers and what it belongs to."""
+
+    start: int
+    end: int
+    key: Optional[str] = None  # e.g. the upload id or PDF path
+
+
+def parse_serial_range(text: str) -> Tuple[int, int]:
+    """
+    Parse a serial_range column value such as "ACCU1000000-ACCU1000999".
+
+    Args:
+        text (str): Range text, with or without ACCU prefixes
+
+    Returns:
+        (start, end) serial numbers
+
+    Raises:
+        ValueError: If the text is not a serial range
+    """
+    match = _SERIAL_RANGE_TEXT.fullmatch(text)
+    if not match:
+        raise ValueError(f"Invalid serial range: {text!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+class SerialRangeIndex:
+    """
+    Sorted index of disjoint ACCU serial ranges for overlap checks.
+
+    Ranges live in int64 arrays split into blocks of about load_factor
+    entries, so a lookup is two binary searches and an insert moves at most
+    one block, regardless of how many millions of ranges are held. Because
+    the indexed ranges never overlap, both their starts and their ends are
+    sorted and a query only has to scan the ranges it actually hits.
+    """
+
+    def __init__(self, load_factor: int = 1024):
+        if load_factor < 2:
+            raise ValueError("load_factor must be at least 2")
+        self._load = load_factor
+        self._starts: List[array] = []
+        self._ends: List[array] = []
+        self._keys: List[List[Optional[str]]] = []
+        self._block_ends: List[int] = []  # last (largest) end of each block
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[SerialRange]:
+        for starts, ends, keys in zip(self._starts, self._ends, self._keys):
+            for start, end, key in zip(starts, ends, keys):
+                yield SerialRange(start, end, key)
+
+    def _locate(self, serial: int) -> Tuple[int, int]:
+        """Return (block, offset) of the first range whose end is >= serial."""
+        block = bisect_left(self._block_ends, serial)
+        if block == len(self._ends):
+            return block, 0
+        return block, bisect_left(self._ends[block], serial)
+
+    def overlaps(self, start: int, end: int) -> List[SerialRange]:
+        """
+        Find the indexed ranges that share a serial with start..end.
+
+        Args:
+            start (int): First serial of the range, inclusive
+            end (int): Last serial of the range, inclusive
+
+        Returns:
+            Overlapping ranges in serial order, empty if there are none
+        """
+        found = []
+        block, offset = self._locate(start)
+        while block < len(self._starts):
+            starts = self._starts[block]
+            stop = bisect_right(starts, end, offset)
+            ends, keys = self._ends[block], self._keys[block]
+            found.extend(SerialRange(starts[i], ends[i], keys[i]) for i in range(offset, stop))
+            if stop < len(starts):
+                break
+            block, offset = block + 1, 0
+        return found
+
+    def has_overlap(self, start: int, end: int) -> bool:
+        """Return whether any indexed range shares a serial with start..end."""
+        block, offset = self._locate(start)
+        return block < len(self._starts) and self._starts[block][offset] <= end
+
+    def insert(self, start: int, end: int, key: Optional[str] = None) -> List[SerialRange]:
+        """
+        Add a range unless it overlaps one that is already indexed.
+
+        Args:
+            start (int): First serial of the range, inclusive
+            end (int): Last serial of the range, inclusive
+            key (Optional[str]): What the range belongs to
+
+        Returns:
+            The conflicting ranges; the range was inserted only if this is empty
+
+        Raises:
+            ValueError: If start is after end or either serial does not fit an int64
+        """
+        _check_range(start, end)
+        conflicts = self.overlaps(start, end)
+        if conflicts:
+            return conflicts
+
+        block, offset = self._locate(start)
+        if not self._starts:
+            self._starts.append(array("q"))
+            self._ends.append(array("q"))
+            self._keys.append([])
+            self._block_ends.append(end)
+        elif block == len(self._starts):
+            # Beyond every indexed range: append to the last block
+            block -= 1
+            offset = len(self._starts[block])
+            self._block_ends[block] = end
+        self._starts[block].insert(offset, start)
+        self._ends[block].insert(offset, end)
+        self._keys[block].insert(offset, key)
+        self._size += 1
+
+        if len(self._starts[block]) > 2 * self._load:
+            self._split(block)
+        return []
+
+    def _split(self, block: int) -> None:
+        """Split an oversized block in two halves."""
+        half = len(self._starts[block]) // 2
+        for column in (self._starts, self._ends, self._keys):
+            column.insert(block + 1, column[block][half:])
+            del column[block][half:]
+        self._block_ends.insert(block, self._ends[block][-1])
+
+    def bulk_load(self, ranges: Iterable[Tuple[int, ...]]) -> List[SerialRange]:
+        """
+        Add many ranges at once, sorting them instead of inserting one by one.
+
+        Ranges already indexed take precedence; among the new ones the range
+        with the lower start wins, and of equal ranges the first one given.
+        Anything that would overlap is skipped.
+
+        Args:
+            ranges (Iterable[Tuple[int, ...]]): (start, end) or (start, end, key) tuples
+
+        Returns:
+            The ranges that were skipped because they overlap
+
+        Raises:
+            ValueError: If a range starts after it ends or does not fit an int64
+        """
+        rejected = []
+        candidates = []
+        for item in ranges:
+            candidate = SerialRange(*item)
+            _check_range(candidate.start, candidate.end)
+            if self._size and self.has_overlap(candidate.start, candidate.end):
+                rejected.append(candidate)
+            else:
+                candidates.append(candidate)
+
+        accepted = []
+        last_end = None
+        # Keys may be None or str, so only the serials are compared
+        for candidate in sorted(candidates, key=_serial_order):
+            if last_end is not None and candidate.start <= last_end:
+                rejected.append(candidate)
+                continue
+            accepted.append(candidate)
+            last_end = candidate.end
+
+        merged = list(heapq.merge(self, accepted, key=_serial_order)) if self._size else accepted
+        self._starts, self._ends, self._keys, self._block_ends = [], [], [], []
+        for i in range(0, len(merged), self._load):
+            chunk = merged[i:i + self._load]
+            self._starts.append(array("q", (r.start for r in chunk)))
+            self._ends.append(array("q", (r.end for r in chunk)))
+            self._keys.append([r.key for r in chunk])
+            self._block_ends.append(chunk[-1].end)
+        self._size = len(merged)
+        return rejected
+
+    def load_results(self, results: Iterable[Tuple[str, Dict[str, Union[str, int, None]]]]) -> List[SerialRange]:
+        """
+        Bulk load the serial ranges of earlier parse results.
+
+        Args:
+            results (Iterable[Tuple[str, Dict]]): (key, result) pairs as yielded
+                by parse_anreu_pdfs, with dicts or AnreuReceipts; results without a serial range are ignored
+
+        Returns:
+            The ranges that were skipped because they overlap
+        """
+        ranges = ((_serials(result), key) for key, result in results)
+        return self.bulk_load((*serials, key) for serials, key in ranges if serials is not None)
+
+    def check_results(
+        self,
+        results: Iterable[Tuple[str, Dict[str, Union[str, int, None]]]],
+        insert: bool = False,
+    ) -> List[Optional[List[SerialRange]]]:
+        """
+        Check a batch of parse results against the index and each other.
+
+        A result conflicts with an indexed range or with an earlier result of
+        the same batch that did not itself conflict.
+
+        Args:
+            results (Iterable[Tuple[str, Dict]]): (key, result) pairs as yielded
+                by parse_anreu_pdfs, with dicts or AnreuReceipts
+            insert (bool): Also index every result that has no conflicts
+
+        Returns:
+            Per result, in input order, the ranges it overlaps, or None when
+            the result has no usable serial range (e.g. a parse error)
+        """
+        batch = self if insert else SerialRangeIndex(self._load)
+        report: List[Optional[List[SerialRange]]] = []
+        for key, result in results:
+            serials = _serials(result)
+            if serials is None:
+                report.append(None)
+                continue
+            start, end = serials
+            conflicts = self.overlaps(start, end)
+            if batch is not self:
+                conflicts += batch.overlaps(start, end)
+            if not conflicts:
+                batch.insert(start, end, key)
+            report.append(conflicts)
+        return report
+
+
+def _check_range(start: int, end: int) -> None:
+    """Raise ValueError unless start..end is a range the index can hold."""
+    if start > end:
+        raise ValueError(f"Serial range starts after it ends: {start}-{end}")
+    if start < _INT64_MIN or end > _INT64_MAX:
+        raise ValueError(f"Serial range does not fit an int64: {start}-{end}")
+
+
+def _serial_order(serial_range: SerialRange) -> Tuple[int, int]:
+    return serial_range.start, serial_range.end
+
+
+def _serials(result: Union[Dict[str, Union[str, int, None]], "AnreuReceipt"]) -> Optional[Tuple[int, int]]:
+    """Return the serial range of a parse result dict or AnreuReceipt, if usable."""
+    if not isinstance(result, dict):
+        result = result.as_dict()
+    start, end = result.get("serial_start"), result.get("serial_end")
+    if "error" in result or not isinstance(start, int) or not isinstance(end, int) or start > end:
+        return None
+    if start < _INT64_MIN or end > _INT64_MAX:
+        return None
+    return start, end
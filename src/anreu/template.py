@@ -0,0 +1,242 @@
+import json
+import hashlib
+import logging
+from typing import Any, BinaryIO, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_VERSION = 1
+
+# Points added around learned line boxes; less than the gap between lines
+_PADDING = 1.0
+
+# Largest difference in page size, in points, that still matches a template
+_SIZE_TOLERANCE = 1.0
+
+# (left, bottom, right, top) in PDF points, origin at the bottom left
+BBox = Tuple[float, float, float, float]
+
+
+class TemplateRegion(NamedTuple):
+    """A box on one page of a receipt template."""
+
+    page: int
+    bbox: BBox
+    text: str = ""  # what an anchor region must read
+    fields: Tuple[str, ...] = ()  # the fields a field region holds
+
+
+class ReceiptTemplate(NamedTuple):
+    """
+    Where each field sits on a fixed-layout receipt.
+
+    A document matches when it has the same number and size of pages and
+    every anchor region reads the anchor's text. Only the field regions of
+    a matching document are then read.
+    """
+
+    name: str
+    pages: int
+    page_size: Tuple[float, float]
+    anchors: Tuple[TemplateRegion, ...]
+    regions: Tuple[TemplateRegion, ...]
+
+    def to_json(self) -> Dict[str, Any]:
+        """Return the template as a JSON-serialisable dict."""
+        return {
+            "version": TEMPLATE_VERSION,
+            "name": self.name,
+            "pages": self.pages,
+            "page_size": list(self.page_size),
+            "anchors": [{"page": a.page, "bbox": list(a.bbox), "text": a.text} for a in self.anchors],
+            "regions": [{"page": r.page, "bbox": list(r.bbox), "fields": list(r.fields)} for r in self.regions],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ReceiptTemplate":
+        """Build a template from the dict to_json returns."""
+        if data.get("version") != TEMPLATE_VERSION:
+            raise ValueError(f"Unsupported template version: {data.get('version')}")
+        return cls(
+            data["name"],
+            data["pages"],
+            tuple(data["page_size"]),
+            tuple(TemplateRegion(a["page"], tuple(a["bbox"]), text=a["text"]) for a in data["anchors"]),
+            tuple(TemplateRegion(r["page"], tuple(r["bbox"]), fields=tuple(r["fields"])) for r in data["regions"]),
+        )
+
+    def extract_text(self, source: Union[str, BinaryIO]) -> Optional[str]:
+        """
+        Read the field regions of a document that matches this template.
+
+        Text is taken from pdfium's char stream inside each region, so no
+        other text on the page is extracted or laid out.
+
+        Args:
+            source (Union[str, BinaryIO]): Path to the PDF or a seekable stream over it
+
+        Returns:
+            The regions' text, one region per line, or None if the document
+            does not match or pypdfium2 is not installed
+        """
+        try:
+            import pypdfium2
+        except ImportError:
+            return None
+        try:
+            document = pypdfium2.PdfDocument(source)
+        except Exception as e:
+            logger.debug(f"Template {self.name} could not open PDF: {e}")
+            return None
+        try:
+            if len(document) != self.pages:
+                return None
+            textpages = {}
+            try:
+                for index in sorted({region.page for region in self.anchors + self.regions}):
+                    page = document[index]
+                    width, height = page.get_size()
+                    if abs(width - self.page_size[0]) > _SIZE_TOLERANCE or abs(height - self.page_size[1]) > _SIZE_TOLERANCE:
+                        return None
+                    textpages[index] = page.get_textpage()
+                for anchor in self.anchors:
+                    if _bounded_text(textpages[anchor.page], anchor.bbox).strip() != anchor.text:
+                        return None
+                return "\n".join(_bounded_text(textpages[region.page], region.bbox) for region in self.regions)
+            finally:
+                for textpage in textpages.values():
+                    textpage.close()
+        except Exception as e:
+            logger.debug(f"Template {self.name} could not read PDF: {e}")
+            return None
+        finally:
+            document.close()
+
+
+def _bounded_text(textpage: Any, bbox: BBox) -> str:
+    # pdfium ends lines with CRLF; the field rules expect LF
+    return textpage.get_text_bounded(*bbox).replace("\r\n", "\n")
+
+
+def learn_template(source: Union[str, BinaryIO], name: str = "anreu") -> ReceiptTemplate:
+    """
+    Learn a template from a receipt whose fields are all extracted.
+
+    Each field's region is the line it appears on, or the two lines when
+    its value follows the label on the next line, widened to the right page
+    edge for longer values. The first line of every page with fields, when
+    it holds no field itself, becomes an anchor.
+
+    Args:
+        source (Union[str, BinaryIO]): Path to a representative receipt or a
+            seekable stream over it
+        name (str): Name of the template
+
+    Returns:
+        The learned template
+
+    Raises:
+        ValueError: If the receipt does not yield every field
+        ImportError: If pypdfium2 is not installed
+    """
+    import pypdfium2
+    from src.anreu.anreu_parser import FIELD_NAMES, extract_fields
+
+    document = pypdfium2.PdfDocument(source)
+    try:
+        lines: List[Tuple[int, BBox, str]] = []
+        for index in range(len(document)):
+            page = document[index]
+            width, height = page.get_size()
+            if index == 0:
+                page_size = (width, height)
+            textpage = page.get_textpage()
+            try:
+                for i in range(textpage.count_rects()):
+                    left, bottom, right, top = textpage.get_rect(i)
+                    bbox = (left - _PADDING, bottom - _PADDING, width, top + _PADDING)
+                    text = _bounded_text(textpage, bbox).strip()
+                    if text:
+                        lines.append((index, bbox, text))
+            finally:
+                textpage.close()
+        pages = len(document)
+    finally:
+        document.close()
+
+    expected = extract_fields("\n".join(text for _, _, text in lines))
+    missing = [field for field in FIELD_NAMES if expected[field] is None]
+    if missing:
+        raise ValueError(f"Cannot learn a template from a receipt missing {', '.join(missing)}")
+
+    def new_fields(text: str, exclude: Iterable[str] = ()) -> Tuple[str, ...]:
+        found = extract_fields(text)
+        return tuple(
+            field for field in FIELD_NAMES
+            if field not in learned and field not in exclude and found[field] is not None and found[field] == expected[field]
+        )
+
+    regions: List[TemplateRegion] = []
+    learned = set()
+    for i, (page, bbox, text) in enumerate(lines):
+        fields = new_fields(text)
+        if not fields and i + 1 < len(lines) and lines[i + 1][0] == page:
+            # A label whose value is on the next line
+            next_bbox, next_text = lines[i + 1][1:]
+            fields = new_fields(text + "\n" + next_text, exclude=new_fields(next_text))
+            bbox = (bbox[0], next_bbox[1], bbox[2], bbox[3])
+        if fields:
+            regions.append(TemplateRegion(page, bbox, fields=fields))
+            learned.update(fields)
+    missing = [field for field in FIELD_NAMES if field not in learned]
+    if missing:
+        raise ValueError(f"Could not locate {', '.join(missing)} on one or two lines")
+
+    anchors = []
+    region_lines = {(region.page, region.bbox[3]) for region in regions}
+    for page in sorted({region.page for region in regions}):
+        first = next(line for line in lines if line[0] == page)
+        if (page, first[1][3]) not in region_lines:
+            anchors.append(TemplateRegion(page, first[1], text=first[2]))
+    return ReceiptTemplate(name, pages, page_size, tuple(anchors), tuple(regions))
+
+
+def load_template(path: str) -> ReceiptTemplate:
+    """Load a template saved with save_template."""
+    with open(path, encoding="utf-8") as f:
+        return ReceiptTemplate.from_json(json.load(f))
+
+
+def save_template(template: ReceiptTemplate, path: str) -> None:
+    """Save a template as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(template.to_json(), f, indent=2)
+
+
+_templates: Tuple[ReceiptTemplate, ...] = ()
+_templates_digest = ""
+
+
+def set_receipt_templates(templates: Iterable[ReceiptTemplate]) -> None:
+    """
+    Install the templates tried before full-page extraction.
+
+    With no templates installed (the default) every page is extracted in full.
+
+    Args:
+        templates (Iterable[ReceiptTemplate]): Templates in the order to try them
+    """
+    global _templates, _templates_digest
+    _templates = tuple(templates)
+    encoded = json.dumps([template.to_json() for template in _templates], sort_keys=True)
+    _templates_digest = hashlib.md5(encoded.encode()).hexdigest() if _templates else ""
+
+
+def receipt_templates() -> Tuple[ReceiptTemplate, ...]:
+    """Return the installed receipt templates."""
+    return _templates
+
+
+def receipt_templates_digest() -> str:
+    """Return a digest identifying the installed templates, empty if there are none."""
+    return _templates_digest
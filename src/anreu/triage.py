@@ -0,0 +1,131 @@
+import io
+import os
+import re
+import logging
+from typing import BinaryIO, NamedTuple, Optional, Union
+
+from src.anreu.lazy_imports import lazy_imports
+
+logger = logging.getLogger(__name__)
+
+_load = __getattr__ = lazy_imports(globals(), PdfReader="PyPDF2:PdfReader")
+
+LIKELY_ANREU = "likely_anreu"
+NEEDS_OCR = "needs_ocr"
+REJECT = "reject"
+
+# Documents with more pages than this are not receipts
+MAX_TRIAGE_PAGES = 50
+
+# Vocabulary of ANREU receipts and statements. One strong marker, or three
+# distinct weak ones, make a document worth a full parse.
+_STRONG_MARKERS = re.compile(
+    r"\bANREU\b|\bACCU\s*\d|National Registry of Emissions Units|Clean Energy Regulator|\bVintage\b",
+    re.IGNORECASE,
+)
+_WEAK_MARKERS = re.compile(
+    r"\b(registry|emissions?|carbon|accounts?|facility|project|transfer|units?|holding|surrender|issuance)\b",
+    re.IGNORECASE,
+)
+_MIN_WEAK_MARKERS = 3
+
+_METADATA_KEYS = ("/Title", "/Subject", "/Author", "/Creator", "/Producer", "/Keywords")
+
+
+class TriageResult(NamedTuple):
+    """Cheap verdict on whether a PDF is worth a full ANREU parse."""
+
+    verdict: str  # LIKELY_ANREU, NEEDS_OCR or REJECT
+    reason: str
+    pages: Optional[int] = None
+
+
+def triage_pdf(
+    source: Union[str, os.PathLike, bytes, BinaryIO],
+    max_pages: int = MAX_TRIAGE_PAGES,
+) -> TriageResult:
+    """
+    Classify a PDF from its header, metadata, page count and page-1 text.
+
+    Only the cross-reference table, the document info and the first page's
+    content stream are read, so this costs a fraction of a full extraction.
+
+    Args:
+        source: Path to the PDF file, its bytes or a seekable binary stream
+        max_pages (int): Reject documents with more pages than this
+
+    Returns:
+        TriageResult with the verdict and the reason for it
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    if not _has_pdf_header(source):
+        return TriageResult(REJECT, "not a PDF file")
+
+    try:
+        reader = _load("PdfReader")(source)
+        if reader.is_encrypted and not reader.decrypt(""):
+            return TriageResult(REJECT, "encrypted")
+        pages = len(reader.pages)
+    except Exception as e:
+        logger.debug(f"Triage could not read PDF: {e}")
+        return TriageResult(REJECT, "unreadable PDF")
+
+    if pages == 0:
+        return TriageResult(REJECT, "no pages", pages)
+    if pages > max_pages:
+        return TriageResult(REJECT, f"{pages} pages is more than a receipt", pages)
+
+    try:
+        metadata = reader.metadata or {}
+        described = " ".join(str(metadata[key]) for key in _METADATA_KEYS if key in metadata)
+    except Exception:
+        described = ""
+    if _STRONG_MARKERS.search(described):
+        return TriageResult(LIKELY_ANREU, "registry metadata", pages)
+
+    first_page = reader.pages[0]
+    try:
+        text = first_page.extract_text() or ""
+    except Exception as e:
+        logger.debug(f"Triage could not extract page 1: {e}")
+        text = ""
+
+    if not text.strip():
+        if _has_images(first_page):
+            return TriageResult(NEEDS_OCR, "page 1 has images but no text layer", pages)
+        return TriageResult(REJECT, "page 1 is blank", pages)
+
+    if _STRONG_MARKERS.search(text):
+        return TriageResult(LIKELY_ANREU, "registry terms on page 1", pages)
+    weak = {match.lower().rstrip("s") for match in _WEAK_MARKERS.findall(text)}
+    if len(weak) >= _MIN_WEAK_MARKERS:
+        return TriageResult(LIKELY_ANREU, "registry vocabulary on page 1", pages)
+    return TriageResult(REJECT, "no registry terms on page 1", pages)
+
+
+def _has_pdf_header(source: Union[str, os.PathLike, BinaryIO]) -> bool:
+    """Check for the %PDF- signature, which may follow up to 1 KiB of junk."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            head = f.read(1024)
+    else:
+        position = source.tell()
+        head = source.read(1024)
+        source.seek(position)
+    return b"%PDF-" in head
+
+
+def _has_images(page) -> bool:
+    """Return whether a page's resources hold an image XObject."""
+    try:
+        resources = page["/Resources"]
+        if "/XObject" not in resources:
+            return False
+        xobjects = resources["/XObject"]
+        return any(xobjects[name].get("/Subtype") == "/Image" for name in xobjects)
+    except Exception:
+        return False
@@ -0,0 +1,270 @@
+import json
+import uuid
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.anreu.anreu_parser import FIELD_NAMES, AnreuReceipt
+
+logger = logging.getLogger(__name__)
+
+# anreu_uploads from src/db/schema/anreu.sql, in types SQLite accepts
+SQLITE_SCHEMA = """CREATE TABLE IF NOT EXISTS anreu_uploads (
+  id VARCHAR(36) PRIMARY KEY,
+  user_id VARCHAR(36) NOT NULL,
+  file_name TEXT NOT NULL,
+  file_hash VARCHAR(32) UNIQUE NOT NULL,
+  parsed_data TEXT NOT NULL,
+  is_valid BOOLEAN NOT NULL DEFAULT false,
+  validation_errors TEXT,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)"""
+
+_COLUMNS = ("id", "user_id", "file_name", "file_hash", "parsed_data", "is_valid", "validation_errors")
+
+# Re-parsing a file refreshes its parse outcome but keeps its id and owner
+_ON_CONFLICT = (
+    " ON CONFLICT (file_hash) DO UPDATE SET"
+    " file_name = excluded.file_name,"
+    " parsed_data = excluded.parsed_data,"
+    " is_valid = excluded.is_valid,"
+    " validation_errors = excluded.validation_errors"
+)
+
+_PLACEHOLDERS = {"qmark": "?", "format": "%s"}
+
+
+class SQLiteConnector:
+    """Local SQLite database holding an anreu_uploads table."""
+
+    paramstyle = "qmark"
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SQLITE_SCHEMA)
+        self._conn.commit()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            yield self._conn
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class PoolConnector:
+    """
+    Connections borrowed from a DB-API pool with getconn() and putconn(),
+    such as psycopg2.pool.ThreadedConnectionPool.
+    """
+
+    def __init__(self, pool: Any, paramstyle: str = "format"):
+        if paramstyle not in _PLACEHOLDERS:
+            raise ValueError(f"Unsupported paramstyle: {paramstyle}")
+        self.paramstyle = paramstyle
+        self._pool = pool
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        conn = self._pool.getconn()
+        try:
+            yield conn
+        finally:
+            self._pool.putconn(conn)
+
+    def close(self) -> None:
+        """Leave the pool open; it belongs to the caller."""
+
+
+def upload_row(
+    file_hash: str,
+    file_name: str,
+    result: Union[AnreuReceipt, Dict[str, Union[str, int, None]]],
+    user_id: str,
+) -> Tuple[str, str, str, str, str, bool, str]:
+    """
+    Build the anreu_uploads column values for one parse result.
+
+    parsed_data holds every field, including those a low-confidence parse
+    did find; validation_errors is the error message list, empty when valid,
+    as the upload route reports it.
+
+    Returns:
+        Values in the order id, user_id, file_name, file_hash, parsed_data,
+        is_valid, validation_errors
+    """
+    receipt = result if isinstance(result, AnreuReceipt) else AnreuReceipt.from_result(result)
+    parsed_data = dict(zip(FIELD_NAMES, receipt))
+    errors = [] if receipt.error is None else [receipt.error]
+    return (
+        str(uuid.uuid4()),
+        user_id,
+        file_name,
+        file_hash,
+        json.dumps(parsed_data),
+        receipt.status == "ok",
+        json.dumps(errors),
+    )
+
+
+class AnreuUploadSink:
+    """
+    Buffers parse results and upserts them into anreu_uploads in batches.
+
+    Rows are keyed on file_hash, so re-parsing a file updates its row. A
+    batch is written once batch_size results are buffered, and a background
+    thread writes whatever is buffered every flush_interval seconds. Use it
+    as a context manager, or call close(), to write the final batch.
+
+    For example, to backfill an inbox:
+
+        with AnreuUploadSink(SQLiteConnector("uploads.db"), user_id) as sink:
+            for f in ingest_directory(inbox, manifest):
+                sink.add(f.digest, os.path.basename(f.path), f.result)
+    """
+
+    def __init__(
+        self,
+        connector: Union[SQLiteConnector, PoolConnector],
+        user_id: str,
+        batch_size: int = 1000,
+        flush_interval: Optional[float] = 5.0,
+        rows_per_statement: int = 500,
+    ):
+        """
+        Args:
+            connector: Source of connections, e.g. SQLiteConnector or PoolConnector
+            user_id (str): Owner recorded on new rows
+            batch_size (int): Buffered results that trigger a write
+            flush_interval (Optional[float]): Seconds between background
+                writes, or None to write only on batch_size and close()
+            rows_per_statement (int): Rows per multi-row INSERT statement
+        """
+        if batch_size < 1 or rows_per_statement < 1:
+            raise ValueError("batch_size and rows_per_statement must be at least 1")
+        self.connector = connector
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.rows_per_statement = rows_per_statement
+        self.written = 0
+        self._buffer: Dict[str, Tuple] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval is not None:
+            self._flusher = threading.Thread(target=self._flush_periodically, args=(flush_interval,), daemon=True)
+            self._flusher.start()
+
+    def __enter__(self) -> "AnreuUploadSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(
+        self,
+        file_hash: str,
+        file_name: str,
+        result: Union[AnreuReceipt, Dict[str, Union[str, int, None]]],
+        user_id: Optional[str] = None,
+    ) -> None:
+        """
+        Buffer one parse result, writing a batch once batch_size are buffered.
+
+        A later result for the same file_hash replaces a buffered one.
+
+        Args:
+            file_hash (str): MD5 of the PDF, as from file_digest
+            file_name (str): Name of the uploaded file
+            result (Union[AnreuReceipt, Dict]): Parser output
+            user_id (Optional[str]): Owner of this upload instead of the sink's
+
+        Raises:
+            Exception: The error of a failed background write, once
+        """
+        self._raise_pending_error()
+        row = upload_row(file_hash, file_name, result, user_id or self.user_id)
+        with self._lock:
+            self._buffer[file_hash] = row
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write every buffered result in one transaction.
+
+        On failure the rows go back into the buffer and the error is raised.
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = list(self._buffer.values()), {}
+            if not rows:
+                return 0
+            try:
+                self._write(rows)
+            except Exception:
+                with self._lock:
+                    # Results added meanwhile are newer than the failed ones
+                    retry = {row[3]: row for row in rows}
+                    retry.update(self._buffer)
+                    self._buffer = retry
+                raise
+            self.written += len(rows)
+            # Rows a failed background write put back are now stored too
+            self._error = None
+            return len(rows)
+
+    def _write(self, rows: List[Tuple]) -> None:
+        placeholder = _PLACEHOLDERS[self.connector.paramstyle]
+        row_values = "(" + ", ".join([placeholder] * len(_COLUMNS)) + ")"
+        with self.connector.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for i in range(0, len(rows), self.rows_per_statement):
+                    chunk = rows[i:i + self.rows_per_statement]
+                    sql = (
+                        f"INSERT INTO anreu_uploads ({', '.join(_COLUMNS)}) VALUES "
+                        + ", ".join([row_values] * len(chunk))
+                        + _ON_CONFLICT
+                    )
+                    cursor.execute(sql, [value for row in chunk for value in row])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Background write to anreu_uploads failed: {e}")
+                self._error = e
+
+    def _raise_pending_error(self) -> None:
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Stop the background thread and write the remaining results."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self._raise_pending_error()
@@ -1,6 +1,18 @@
+import io
+import os
+import sys
+import json
+import mmap
+import tempfile
+import threading
 import unittest
+import subprocess
 from unittest.mock import patch, MagicMock
-from src.anreu.anreu_parser import parse_anreu_pdf
+from bench.anreu.corpus import make_receipt_pdf
+from src.anreu.anreu_parser import (
+    AnreuReceipt, extract_fields, iter_anreu_transfers, iter_pages, parse_anreu_pdf, parse_anreu_pdfs, parse_anreu_receipt,
+    parse_files
+)
 
 class TestAnreuParser(unittest.TestCase):
 
@@ -106,5 +118,347 @@ To Account: Test To"""
         self.assertNotIn('error', result)
         self.assertEqual(result['serial_start'], 1000000)
 
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_pages_closed_once_read(self, mock_reader, mock_pdfplumber):
+        """Test every pdfplumber page is closed before the next one is read"""
+        pages = [MagicMock() for _ in range(3)]
+        for index, page in enumerate(pages):
+            def extract_text(index=index):
+                self.assertTrue(all(earlier.close.called for earlier in pages[:index]))
+                return f"ACCU{index} to ACCU{index}"
+            page.extract_text.side_effect = extract_text
+        mock_pdf = MagicMock()
+        mock_pdf.pages = pages
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        self.assertEqual(len(list(iter_anreu_transfers('dummy.pdf'))), 3)
+        for page in pages:
+            page.close.assert_called_once()
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_incremental_stops_after_fields_found(self, mock_reader, mock_pdfplumber):
+        """Test incremental mode skips pages once every field is found"""
+        pages = [MagicMock() for _ in range(5)]
+        pages[0].extract_text.return_value = """From Account: Seller Pty Ltd (ACC123)
+To Account: Buyer Pty Ltd (ACC456)
+ACCU1000000 to ACCU1000099
+Vintage: 2024"""
+        pages[1].extract_text.return_value = """Project ID: CAR-2024-001
+Facility:"""
+        pages[2].extract_text.return_value = "XYZ Reforestation Project"
+        for page in pages[3:]:
+            page.extract_text.return_value = "Facility: Later Facility"
+        mock_pdf = MagicMock()
+        mock_pdf.pages = pages
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        result = parse_anreu_pdf('dummy.pdf', incremental=True)
+        self.assertEqual(result, parse_anreu_pdf('dummy.pdf'))
+        self.assertEqual(result['facility'], 'XYZ Reforestation Project')
+        self.assertEqual(pages[2].extract_text.call_count, 2)
+        self.assertEqual(pages[3].extract_text.call_count, 1)
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_incremental_serial_range_across_pages(self, mock_reader, mock_pdfplumber):
+        """Test incremental mode keeps a serial range the page break cuts off"""
+        for texts in (["ACCU1000\nto", "ACCU2000\nVintage: 2024"], ["Header\nACCU1000", "to ACCU2000"]):
+            pages = [MagicMock() for _ in texts]
+            for page, text in zip(pages, texts):
+                page.extract_text.return_value = text
+            mock_pdf = MagicMock()
+            mock_pdf.pages = pages
+            mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+            full = parse_anreu_receipt('dummy.pdf')
+            self.assertEqual((full.serial_start, full.serial_end), (1000, 2000))
+            self.assertEqual(parse_anreu_receipt('dummy.pdf', incremental=True), full)
+            self.assertEqual(next(iter_anreu_transfers('dummy.pdf'))['serial_end'], 2000)
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_max_pages_cap(self, mock_reader, mock_pdfplumber):
+        """Test fields beyond max_pages are not extracted"""
+        first = MagicMock()
+        first.extract_text.return_value = "ACCU1000000 to ACCU1000099"
+        second = MagicMock()
+        second.extract_text.return_value = """Vintage: 2024
+Project ID: CAR-2024-001
+Facility: Test Facility
+From Account: Test From
+To Account: Test To"""
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [first, second]
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        self.assertNotIn('error', parse_anreu_pdf('dummy.pdf', incremental=True))
+        result = parse_anreu_pdf('dummy.pdf', incremental=True, max_pages=1)
+        self.assertIn('error', result)
+        second.extract_text.assert_called_once()
+
+    def test_in_memory_sources(self):
+        """Test bytes, memoryview, file objects and mmaps parse like the path"""
+        path = 'test-data/valid_anreu.pdf'
+        expected = parse_anreu_pdf(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            sources = [data, bytearray(data), memoryview(data), io.BytesIO(data), mapped, f]
+            for source in sources:
+                self.assertEqual(parse_anreu_pdf(source), expected)
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_backends_share_one_buffer(self, mock_reader, mock_pdfplumber):
+        """Test both backends read the caller's buffer rather than a copy"""
+        mock_page = MagicMock()
+        mock_page.extract_text.return_value = ""
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [mock_page]
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+        mock_reader.return_value.pages = []
+
+        data = bytearray(b'%PDF-1.4 receipt')
+        parse_anreu_pdf(data)
+        streams = [mock_pdfplumber.call_args[0][0], mock_reader.call_args[0][0]]
+        data[:4] = b'%XYZ'
+        for stream in streams:
+            stream.seek(0)
+            self.assertEqual(stream.read(4), b'%XYZ')
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_fallback_only_for_empty_pages(self, mock_reader, mock_pdfplumber):
+        """Test PyPDF2 only re-extracts pages pdfplumber left empty"""
+        text_page, scanned_page = MagicMock(), MagicMock()
+        text_page.extract_text.return_value = "ACCU1000000 to ACCU1000099"
+        scanned_page.extract_text.return_value = None
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [text_page, scanned_page]
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        fallback_pages = [MagicMock(), MagicMock()]
+        fallback_pages[1].extract_text.return_value = "Vintage: 2024"
+        mock_reader.return_value.pages = fallback_pages
+
+        pages = list(iter_pages('dummy.pdf'))
+        self.assertEqual([(page.backend, page.text) for page in pages], [
+            ('pdfplumber', 'ACCU1000000 to ACCU1000099'),
+            ('pypdf2', 'Vintage: 2024'),
+        ])
+        fallback_pages[0].extract_text.assert_not_called()
+        mock_reader.assert_called_once()
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_no_fallback_when_every_page_has_text(self, mock_reader, mock_pdfplumber):
+        """Test PyPDF2 is never opened when pdfplumber finds text everywhere"""
+        mock_page = MagicMock()
+        mock_page.extract_text.return_value = "Vintage: 2024"
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [mock_page, mock_page]
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        self.assertEqual([page.backend for page in iter_pages('dummy.pdf')], ['pdfplumber', 'pdfplumber'])
+        mock_reader.assert_not_called()
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_cancel_event_stops_parse(self, mock_reader, mock_pdfplumber):
+        """Test a set cancel_event stops extraction at the next page"""
+        pages = [MagicMock(), MagicMock()]
+        for page in pages:
+            page.extract_text.return_value = "Vintage: 2024"
+        mock_pdf = MagicMock()
+        mock_pdf.pages = pages
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        cancel_event = threading.Event()
+        cancel_event.set()
+        result = parse_anreu_pdf('dummy.pdf', cancel_event=cancel_event)
+        self.assertEqual(result, {'error': 'Parse cancelled'})
+        pages[1].extract_text.assert_not_called()
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_iter_transfers_across_pages(self, mock_reader, mock_pdfplumber):
+        """Test every transfer block is yielded, including blocks split over pages"""
+        pages = [MagicMock() for _ in range(3)]
+        pages[0].extract_text.return_value = """From Account: Seller Pty Ltd (ACC123)
+To Account: Buyer Pty Ltd (ACC456)
+ACCU1000000 to ACCU1000099
+Vintage: 2023
+Project ID: CAR-2023-001
+Facility:"""
+        pages[1].extract_text.return_value = """XYZ Reforestation Project
+ACCU1000100 to ACCU1000199
+Vintage: 2024
+ACCU1000200 to"""
+        pages[2].extract_text.return_value = """ACCU1000299
+To Account: Other Buyer (ACC789)"""
+        mock_pdf = MagicMock()
+        mock_pdf.pages = pages
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        transfers = list(iter_anreu_transfers('dummy.pdf'))
+        self.assertEqual([(t['serial_start'], t['serial_end'], t['page']) for t in transfers], [
+            (1000000, 1000099, 0),
+            (1000100, 1000199, 1),
+            (1000200, 1000299, 1),
+        ])
+        self.assertEqual(transfers[0]['facility'], 'XYZ Reforestation Project')
+        self.assertEqual(transfers[0]['project_id'], 'CAR-2023-001')
+        self.assertEqual(transfers[1]['vintage'], 2024)
+        self.assertIsNone(transfers[1]['facility'])
+        # Header fields fill in what a block lacks; block fields take precedence
+        self.assertEqual(transfers[1]['from_account'], 'Seller Pty Ltd (ACC123)')
+        self.assertEqual(transfers[2]['to_account'], 'Other Buyer (ACC789)')
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_iter_transfers_streams_pages(self, mock_reader, mock_pdfplumber):
+        """Test a block is yielded before later pages are extracted"""
+        pages = [MagicMock() for _ in range(4)]
+        for i, page in enumerate(pages):
+            page.extract_text.return_value = f"ACCU{i}00 to ACCU{i}99\nVintage: 202{i}"
+        mock_pdf = MagicMock()
+        mock_pdf.pages = pages
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        transfers = iter_anreu_transfers('dummy.pdf')
+        first = next(transfers)
+        self.assertEqual((first['serial_start'], first['vintage']), (0, 2020))
+        self.assertEqual(pages[2].extract_text.call_count, 0)
+        transfers.close()
+        mock_pdfplumber.return_value.__exit__.assert_called_once()
+        self.assertEqual(list(iter_anreu_transfers('dummy.pdf', max_pages=2))[-1]['serial_end'], 199)
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_receipt_keeps_low_confidence_fields(self, mock_reader, mock_pdfplumber):
+        """Test parse_anreu_receipt reports status and confidence with partial fields"""
+        mock_page = MagicMock()
+        mock_page.extract_text.return_value = "ACCU1000000 to ACCU1000099\nVintage: 2024"
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [mock_page]
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        receipt = parse_anreu_receipt('dummy.pdf')
+        self.assertEqual(receipt.status, 'low_confidence')
+        self.assertAlmostEqual(receipt.confidence, 300 / 7)
+        self.assertEqual((receipt.serial_start, receipt.vintage), (1000000, 2024))
+        self.assertEqual(receipt.as_dict(), parse_anreu_pdf('dummy.pdf'))
+        self.assertEqual(receipt.as_dict(), {'error': 'Low confidence — manual review required'})
+
+    def test_receipt_from_result(self):
+        """Test dict results convert to receipts with a status"""
+        fields = extract_fields("ACCU1 to ACCU2\nVintage: 2024")
+        receipt = AnreuReceipt.from_result(fields)
+        self.assertEqual(receipt.status, 'ok')
+        self.assertEqual(receipt.as_dict(), fields)
+        failed = AnreuReceipt.from_result({'error': 'Failed to extract text from PDF'})
+        self.assertEqual((failed.status, failed.error), ('extraction_failed', 'Failed to extract text from PDF'))
+        self.assertEqual(AnreuReceipt.from_result({'error': 'something else'}).status, 'failed')
+
+    def test_batch_parsing_receipts(self):
+        """Test batch parsing can yield receipts instead of dicts"""
+        results = dict(parse_anreu_pdfs(['test-data/missing.pdf'], workers=1, receipts=True))
+        self.assertEqual(results['test-data/missing.pdf'].status, 'extraction_failed')
+
+    def test_extract_fields_first_match_wins(self):
+        """Test extract_fields keeps the first match of each field"""
+        text = """facility:
+XYZ Reforestation Project
+FROM ACCOUNT: Seller Pty Ltd (ACC123)
+ACCU12 to
+ACCU34 then ACCU56 to ACCU78
+Vintage 2024 Vintage 2025
+FACILITY-2024-001 CAR-2024-002
+From Account: Later Seller"""
+        self.assertEqual(extract_fields(text), {
+            "serial_start": 12,
+            "serial_end": 34,
+            "vintage": 2024,
+            "project_id": "ITY-2024-001",
+            "facility": "XYZ Reforestation Project",
+            "from_account": "Seller Pty Ltd (ACC123)",
+            "to_account": None
+        })
+
+    def test_batch_parsing_matches_single_parse(self):
+        """Test batch parsing returns the same results as parse_anreu_pdf per path"""
+        paths = ['test-data/valid_anreu.pdf', 'test-data/invalid_vintage.pdf', 'test-data/missing.pdf']
+        results = dict(parse_anreu_pdfs(paths, workers=2, chunksize=2))
+        self.assertEqual(set(results), set(paths))
+        for path in paths:
+            self.assertEqual(results[path], parse_anreu_pdf(path))
+        self.assertIn('error', results['test-data/missing.pdf'])
+
+    @patch('src.anreu.anreu_parser.parse_anreu_pdf')
+    def test_batch_parsing_isolates_failures(self, mock_parse):
+        """Test an unexpected exception only fails its own document"""
+        mock_parse.side_effect = lambda path, **options: {'path': path} if path != 'bad.pdf' else 1 / 0
+        results = list(parse_anreu_pdfs(['a.pdf', 'bad.pdf', 'b.pdf'], workers=1))
+        self.assertEqual(results, [
+            ('a.pdf', {'path': 'a.pdf'}),
+            ('bad.pdf', {'error': 'Failed to parse PDF'}),
+            ('b.pdf', {'path': 'b.pdf'}),
+        ])
+
+    def test_batch_parsing_survives_worker_crash(self):
+        """Test a worker that dies only fails its own document"""
+        from src.anreu import anreu_parser, guardrails
+
+        def crashing(parse):
+            def parse_or_crash(path, **options):
+                if path == 'crash.pdf':
+                    os._exit(1)
+                return parse(path, **options)
+            return parse_or_crash
+
+        paths = ['test-data/valid_anreu.pdf'] * 6 + ['crash.pdf']
+        with patch.object(anreu_parser, 'parse_anreu_pdf', crashing(parse_anreu_pdf)), \
+                patch.object(guardrails, 'parse_anreu_receipt', crashing(parse_anreu_receipt)):
+            results = list(parse_anreu_pdfs(paths, workers=2, chunksize=2))
+        self.assertEqual(len(results), len(paths))
+        expected = parse_anreu_pdf('test-data/valid_anreu.pdf')
+        for path, result in results:
+            self.assertEqual(result, {'error': 'Failed to parse PDF'} if path == 'crash.pdf' else expected)
+
+    def test_import_leaves_backends_unloaded(self):
+        """Test importing the parser does not import the PDF libraries"""
+        code = 'import sys, src.anreu.anreu_parser; print(sorted({"pdfplumber", "PyPDF2"} & set(sys.modules)))'
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_parse_files_writes_json_lines(self):
+        """Test the parse command prints one result per file and an import-time report"""
+        output = io.StringIO()
+        self.assertEqual(parse_files(['test-data/missing.pdf'], output=output), 1)
+        self.assertEqual(json.loads(output.getvalue()),
+                         {'path': 'test-data/missing.pdf', 'result': {'error': 'Failed to extract text from PDF'}})
+        completed = subprocess.run(
+            [sys.executable, '-m', 'src.anreu.anreu_parser', 'parse', 'test-data/valid_anreu.pdf', '--import-time'],
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(json.loads(completed.stdout)['path'], 'test-data/valid_anreu.pdf')
+        report = json.loads(completed.stderr.splitlines()[-1])
+        self.assertIn('pdfplumber', report['lazy_imports_ms'])
+
+    def test_parse_files_forwards_options_to_workers(self):
+        """Test max_pages applies when files are parsed in worker processes"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'statement.pdf')
+            with open(path, 'wb') as f:
+                f.write(make_receipt_pdf(pages=2, field_page='last'))
+            for workers in (1, 2):
+                output = io.StringIO()
+                parse_files([path, path], workers=workers, incremental=True, max_pages=1, output=output)
+                results = [json.loads(line)['result'] for line in output.getvalue().splitlines()]
+                self.assertEqual(results, [parse_anreu_pdf(path, max_pages=1)] * 2)
+                self.assertIn('error', results[0])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import time
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+from src.anreu.anreu_parser import PARSE_TIMEOUT, parse_anreu_pdf
+from src.anreu.async_parser import parse_anreu_pdf_async, parse_many_async
+
+def slow_parse(pdf_path, cancel_event=None, **options):
+    """Stand-in parse that runs until cancelled, like a huge PDF"""
+    while not cancel_event.wait(0.01):
+        pass
+    slow_parse.cancelled.set()
+    return {"error": "Parse cancelled"}
+
+class TestAsyncParser(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        slow_parse.cancelled = threading.Event()
+
+    async def test_parse_many_matches_sync_results(self):
+        """Test batch results come back in input order and match parse_anreu_pdf"""
+        paths = ['test-data/valid_anreu.pdf', 'test-data/missing.pdf', 'test-data/invalid_vintage.pdf']
+        results = await parse_many_async(paths, concurrency=2)
+        self.assertEqual(results, [parse_anreu_pdf(path) for path in paths])
+
+    @patch('src.anreu.async_parser.parse_anreu_pdf', side_effect=slow_parse)
+    async def test_timeout_stops_worker(self, mock_parse):
+        """Test a deadline returns an error and stops the worker thread"""
+        start = time.monotonic()
+        result = await parse_anreu_pdf_async('huge.pdf', timeout=0.05)
+        self.assertEqual(result, {'error': PARSE_TIMEOUT})
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(await asyncio.to_thread(slow_parse.cancelled.wait, 1))
+
+    @patch('src.anreu.async_parser.parse_anreu_pdf', side_effect=slow_parse)
+    async def test_cancellation_stops_worker(self, mock_parse):
+        """Test cancelling the task propagates and stops the worker thread"""
+        task = asyncio.create_task(parse_anreu_pdf_async('huge.pdf'))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(await asyncio.to_thread(slow_parse.cancelled.wait, 1))
+
+    @patch('src.anreu.async_parser.parse_anreu_pdf')
+    async def test_concurrency_limit(self, mock_parse):
+        """Test no more than `concurrency` documents are parsed at once"""
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def tracked_parse(pdf_path, cancel_event=None, **options):
+            with lock:
+                active.append(pdf_path)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(pdf_path)
+            return {'path': pdf_path}
+
+        mock_parse.side_effect = tracked_parse
+        results = await parse_many_async([f'{i}.pdf' for i in range(8)], concurrency=2)
+        self.assertEqual(results, [{'path': f'{i}.pdf'} for i in range(8)])
+        self.assertLessEqual(max(peak), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+from bench.anreu.corpus import make_receipt_pdf
+from src.anreu.anreu_parser import parse_anreu_pdf, parse_anreu_receipt
+from src.anreu.backends import (
+    AdaptiveBackendPolicy, ExtractionBackend, PdfplumberBackend, Pypdfium2Backend, available_backends, set_backend_policy
+)
+
+RECEIPT_TEXT = """From Account: Seller Pty Ltd (ACC123)
+To Account: Buyer Pty Ltd (ACC456)
+ACCU1000000 to ACCU1000099
+Vintage: 2024
+Project ID: CAR-2024-001
+Facility: XYZ Reforestation Project"""
+
+class FakeBackend(ExtractionBackend):
+
+    def __init__(self, name, cost, pages=None, error=None):
+        self.name, self.cost, self.pages, self.error = name, cost, pages or [], error
+        self.opened = 0
+
+    def open(self, source):
+        self.opened += 1
+        if self.error:
+            raise self.error
+        return self.pages
+
+    def page_count(self, document):
+        return len(document)
+
+    def page_text(self, document, index):
+        return document[index]
+
+class TestBackends(unittest.TestCase):
+
+    def tearDown(self):
+        set_backend_policy(None)
+
+    def test_registry_orders_cheapest_first(self):
+        """Test the built-in backends rank raw text extractors before layout analysis"""
+        names = [backend.name for backend in available_backends()]
+        self.assertEqual(names[-1], 'pdfplumber')
+        self.assertLess(names.index('pypdf2'), names.index('pdfplumber'))
+
+    def test_cheapest_backend_is_enough(self):
+        """Test a confident parse never opens the more expensive backends"""
+        cheap, costly = FakeBackend('cheap', 0.001, [RECEIPT_TEXT]), FakeBackend('costly', 0.1, [RECEIPT_TEXT])
+        policy = AdaptiveBackendPolicy([costly, cheap])
+        set_backend_policy(policy)
+        self.assertEqual(parse_anreu_receipt(b'%PDF-1.4').status, 'ok')
+        self.assertEqual((cheap.opened, costly.opened), (1, 0))
+        self.assertEqual(policy.stats()['cheap'].successes, 1)
+
+    def test_escalates_on_low_confidence_and_failure(self):
+        """Test further backends fill in only the fields still missing"""
+        broken = FakeBackend('broken', 0.0001, error=ValueError('bad xref'))
+        partial = FakeBackend('partial', 0.001, ["ACCU1 to ACCU2\nVintage: 2023"])
+        full = FakeBackend('full', 0.1, [RECEIPT_TEXT])
+        set_backend_policy(AdaptiveBackendPolicy([full, partial, broken]))
+        result = parse_anreu_pdf(b'%PDF-1.4')
+        self.assertEqual((result['serial_start'], result['vintage'], result['to_account']),
+                         (1, 2023, 'Buyer Pty Ltd (ACC456)'))
+        self.assertEqual((broken.opened, partial.opened, full.opened), (1, 1, 1))
+
+    def test_pdfplumber_pages_closed(self):
+        """Test the pdfplumber backend releases each page once its text is read"""
+        document = MagicMock()
+        document.pages[0].extract_text.return_value = RECEIPT_TEXT
+        self.assertEqual(PdfplumberBackend().page_text(document, 0), RECEIPT_TEXT)
+        document.pages[0].close.assert_called_once()
+
+    def test_library_import_not_timed(self):
+        """Test the one-time library import is left out of a backend's recorded seconds"""
+        class SlowImportBackend(FakeBackend):
+            imported = False
+
+            def load(self):
+                if not self.imported:
+                    time.sleep(0.2)
+                    self.imported = True
+
+            def open(self, source):
+                self.load()
+                return super().open(source)
+
+        backend = SlowImportBackend('slow_import', 0.001, [RECEIPT_TEXT])
+        policy = AdaptiveBackendPolicy([backend])
+        set_backend_policy(policy)
+        parse_anreu_receipt(b'%PDF-1.4')
+        self.assertLess(policy.stats()['slow_import'].seconds, 0.1)
+
+    def test_order_adapts_to_measurements(self):
+        """Test a cheap backend that keeps failing is tried after a reliable one"""
+        cheap, reliable = FakeBackend('cheap', 0.001), FakeBackend('reliable', 0.002)
+        policy = AdaptiveBackendPolicy([cheap, reliable])
+        self.assertEqual([backend.name for backend in policy.order()], ['cheap', 'reliable'])
+        for _ in range(10):
+            policy.record('cheap', 1, 0.001, False)
+            policy.record('reliable', 1, 0.002, True)
+        self.assertEqual([backend.name for backend in policy.order()], ['reliable', 'cheap'])
+        self.assertEqual(policy.stats()['cheap'].attempts, 10)
+
+    def test_adaptive_parse_matches_default(self):
+        """Test the real backends agree with the default extraction on a receipt"""
+        pdf = make_receipt_pdf(pages=3, field_page='last')
+        expected = parse_anreu_pdf(pdf)
+        set_backend_policy(AdaptiveBackendPolicy())
+        self.assertEqual(parse_anreu_pdf(pdf), expected)
+        if Pypdfium2Backend().available():
+            set_backend_policy(AdaptiveBackendPolicy(['pypdfium2']))
+            self.assertEqual(parse_anreu_pdf(pdf), expected)
+
+if __name__ == '__main__':
+    unittest.main()
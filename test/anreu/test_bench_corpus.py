@@ -0,0 +1,43 @@
+import unittest
+from bench.anreu.corpus import make_receipt_pdf
+from bench.anreu.run import _percentile, compare
+from src.anreu.anreu_parser import iter_pages, parse_anreu_pdf
+
+class TestBenchCorpus(unittest.TestCase):
+
+    def test_generated_receipt_parses(self):
+        """Test a synthetic receipt yields every field"""
+        result = parse_anreu_pdf(make_receipt_pdf())
+        self.assertNotIn('error', result)
+        self.assertEqual(result['serial_start'], 1000000)
+        self.assertEqual(result['project_id'], 'CAR-2024-001')
+
+    def test_field_page_and_image_pages(self):
+        """Test fields land on the requested page and scans have no text layer"""
+        pages = list(iter_pages(make_receipt_pdf(pages=4, field_page='last', image_every=2)))
+        self.assertEqual(len(pages), 4)
+        self.assertIn('Vintage: 2024', pages[3].text)
+        self.assertNotIn('Vintage', pages[0].text)
+        self.assertEqual(pages[1].text.strip(), '')
+        self.assertIsNone(pages[1].backend)
+
+    def test_generation_is_deterministic(self):
+        """Test the same arguments always produce the same bytes"""
+        self.assertEqual(make_receipt_pdf(pages=3, seed=7), make_receipt_pdf(pages=3, seed=7))
+
+    def test_compare_flags_regressions(self):
+        """Test slower results than the baseline are reported"""
+        base = {'scenario': 's', 'mode': 'single', 'docs_per_sec': 10.0, 'p50_ms': 100.0, 'p99_ms': 150.0, 'peak_rss_mb': 50.0}
+        self.assertEqual(compare([dict(base, p50_ms=105.0)], [base], 0.1), [])
+        regressions = compare([dict(base, docs_per_sec=5.0, p99_ms=300.0)], [base], 0.1)
+        self.assertEqual(len(regressions), 2)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(_percentile(values, 50), 50)
+        self.assertEqual(_percentile(values, 99), 99)
+        self.assertEqual(_percentile([3.0], 99), 3.0)
+
+if __name__ == '__main__':
+    unittest.main()
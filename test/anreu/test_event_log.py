@@ -0,0 +1,93 @@
+import io
+import os
+import sys
+import json
+import logging
+import tempfile
+import unittest
+import subprocess
+from bench.anreu.corpus import make_receipt_pdf
+from src.anreu.anreu_parser import parse_anreu_pdfs, parse_anreu_receipt
+from src.anreu.event_log import EventPipeline, set_event_pipeline
+
+def lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+class TestEventLog(unittest.TestCase):
+
+    def tearDown(self):
+        set_event_pipeline(None)
+
+    def test_events_written_in_batches(self):
+        """Test queued events reach the stream as JSON lines on flush and close"""
+        stream = io.StringIO()
+        pipeline = EventPipeline(stream, batch_size=2, flush_interval=60)
+        for i in range(3):
+            self.assertTrue(pipeline.emit({'n': i, 'path': object()}))
+        self.assertEqual(pipeline.flush(), 3)
+        pipeline.emit({'n': 3})
+        pipeline.close()
+        self.assertEqual([event['n'] for event in lines(stream)], [0, 1, 2, 3])
+        self.assertEqual(pipeline.written, 4)
+
+    def test_sampling_rate_limit_and_full_queue(self):
+        """Test events are skipped by sampling and the rate limit, and dropped when the queue is full"""
+        with EventPipeline(io.StringIO(), sample_rate=0.0, flush_interval=60) as pipeline:
+            self.assertFalse(pipeline.emit({}))
+            self.assertTrue(pipeline.emit({}, force=True))
+            self.assertEqual(pipeline.skipped, 1)
+        with EventPipeline(io.StringIO(), max_events_per_second=5, flush_interval=60) as pipeline:
+            kept = sum(pipeline.emit({}) for _ in range(100))
+            self.assertLessEqual(kept, 6)
+        with EventPipeline(io.StringIO(), max_queue=2, flush_interval=60) as pipeline:
+            self.assertEqual([pipeline.emit({}) for _ in range(3)], [True, True, False])
+            self.assertEqual(pipeline.dropped, 1)
+
+    def test_log_records_formatted_off_thread(self):
+        """Test the handler ships log records as structured events"""
+        stream = io.StringIO()
+        pipeline = EventPipeline(stream, sample_rate=0.0, flush_interval=60)
+        log = logging.getLogger('test_event_log')
+        log.addHandler(pipeline.handler())
+        try:
+            log.warning('disk %s full', 'sda')
+        finally:
+            log.handlers.clear()
+        pipeline.close()
+        self.assertEqual([(e['level'], e['logger'], e['message']) for e in lines(stream)],
+                         [('WARNING', 'test_event_log', 'disk sda full')])
+
+    def test_parse_emits_event(self):
+        """Test every parse queues an event with its status instead of logging JSON"""
+        stream = io.StringIO()
+        pipeline = EventPipeline(stream, flush_interval=60)
+        set_event_pipeline(pipeline)
+        parse_anreu_receipt('test-data/missing.pdf')
+        pipeline.close()
+        [event] = lines(stream)
+        self.assertEqual((event['event'], event['status'], event['cached']), ('anreu_parse', 'extraction_failed', False))
+
+    def test_pool_workers_flush_on_exit(self):
+        """Test events queued in worker processes are written when the pool shuts down"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'receipt.pdf')
+            with open(path, 'wb') as f:
+                f.write(make_receipt_pdf())
+            events = os.path.join(directory, 'events.jsonl')
+            pipeline = EventPipeline(events, flush_interval=60)
+            set_event_pipeline(pipeline)
+            results = list(parse_anreu_pdfs([path] * 3, workers=2))
+            pipeline.close()
+            with open(events) as f:
+                parsed = [json.loads(line) for line in f]
+        self.assertEqual(len(results), 3)
+        self.assertEqual([event['event'] for event in parsed], ['anreu_parse'] * 3)
+
+    def test_import_leaves_logging_alone(self):
+        """Test importing the parser does not configure the root logger"""
+        code = 'import logging, src.anreu.anreu_parser; print(len(logging.getLogger().handlers))'
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), '0')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import time
+import unittest
+from unittest.mock import patch
+from bench.anreu.corpus import make_receipt_pdf
+from src.anreu.anreu_parser import AnreuReceipt, parse_anreu_pdf, parse_anreu_pdfs
+from src.anreu.guardrails import ResourceLimits, check_pdf_limits, parse_guarded
+
+def slow_or_pid(path, **options):
+    if 'slow' in path:
+        time.sleep(60)
+    return AnreuReceipt(project_id=str(os.getpid()))
+
+def allocate(path, **options):
+    return AnreuReceipt(project_id=str(len(bytearray(8 << 30))))
+
+class TestGuardrails(unittest.TestCase):
+
+    def test_page_and_object_caps(self):
+        """Test oversized documents are caught from the xref and page tree"""
+        pdf = make_receipt_pdf(pages=3)
+        self.assertIsNone(check_pdf_limits(pdf, ResourceLimits()))
+        self.assertEqual(check_pdf_limits(pdf, ResourceLimits(max_pages=2)), '3 pages is more than 2')
+        self.assertIn('objects is more than 5', check_pdf_limits(pdf, ResourceLimits(max_objects=5)))
+        self.assertIsNone(check_pdf_limits(b'not a pdf', ResourceLimits(max_pages=2)))
+
+    def test_guarded_batch_matches_single_parse(self):
+        """Test sandboxed parsing returns the same results as parse_anreu_pdf"""
+        paths = ['test-data/valid_anreu.pdf', 'test-data/invalid_vintage.pdf', 'test-data/missing.pdf']
+        results = dict(parse_anreu_pdfs(paths, workers=2, limits=ResourceLimits()))
+        self.assertEqual(results, {path: parse_anreu_pdf(path) for path in paths})
+        results = dict(parse_anreu_pdfs(paths[:1], limits=ResourceLimits(max_pages=0), receipts=True))
+        self.assertEqual(results[paths[0]].status, 'resource_limit')
+
+    @patch('src.anreu.guardrails.parse_anreu_receipt', side_effect=slow_or_pid)
+    def test_timeout_kills_only_its_document(self, mock_parse):
+        """Test a hung document times out and a fresh worker takes the rest"""
+        started = time.monotonic()
+        results = dict(parse_guarded(['a.pdf', 'slow.pdf', 'b.pdf'], workers=1, limits=ResourceLimits(timeout=1)))
+        self.assertLess(time.monotonic() - started, 30)
+        self.assertEqual(results['slow.pdf'], {'error': 'Parse timed out'})
+        self.assertNotEqual(results['a.pdf']['project_id'], results['b.pdf']['project_id'])
+
+    @patch('src.anreu.guardrails.parse_anreu_receipt', side_effect=slow_or_pid)
+    def test_workers_are_recycled(self, mock_parse):
+        """Test each worker is replaced after docs_per_worker documents"""
+        paths = [f'{i}.pdf' for i in range(4)]
+        results = parse_guarded(paths, workers=1, limits=ResourceLimits(docs_per_worker=2), receipts=True)
+        pids = [receipt.project_id for _, receipt in results]
+        self.assertEqual((pids[0] == pids[1], pids[1] == pids[2], pids[2] == pids[3]), (True, False, True))
+
+    @patch('src.anreu.guardrails.parse_anreu_receipt', side_effect=allocate)
+    def test_memory_limit(self, mock_parse):
+        """Test a document exhausting the memory cap gets a resource error"""
+        results = dict(parse_guarded(['big.pdf'], workers=1, limits=ResourceLimits(memory_bytes=1 << 30)))
+        self.assertEqual(results['big.pdf'], {'error': 'PDF exceeds resource limits'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import io
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from src.anreu.ingest import IngestManifest, follow_directory, ingest, ingest_directory
+from src.anreu.parse_cache import file_digest
+
+def fake_parse(paths, workers=None, limits=None):
+    for path in paths:
+        yield path, {'error': 'Failed to parse PDF'} if 'crash' in path else {'name': os.path.basename(path)}
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.inbox = os.path.join(self.tmpdir, 'inbox')
+        os.makedirs(os.path.join(self.inbox, 'sub'))
+        self.manifest = IngestManifest(os.path.join(self.tmpdir, 'manifest.db'))
+
+    def tearDown(self):
+        self.manifest.close()
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data=b'%PDF-1.4'):
+        path = os.path.join(self.inbox, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def run_pass(self):
+        return sorted(os.path.basename(f.path) for f in ingest_directory(self.inbox, self.manifest, workers=1))
+
+    @patch('src.anreu.ingest.parse_anreu_pdfs', side_effect=fake_parse)
+    def test_only_new_or_changed_files_are_parsed(self, mock_parse):
+        """Test unchanged files are skipped on later runs"""
+        first = self.write('a.pdf', b'%PDF a')
+        self.write('sub/b.PDF', b'%PDF b')
+        self.write('notes.txt')
+        self.write('.partial.pdf')
+        self.assertEqual(self.run_pass(), ['a.pdf', 'b.PDF'])
+        self.assertEqual(self.run_pass(), [])
+
+        # Same contents with a new mtime is only re-stamped
+        os.utime(first, ns=(1, 1))
+        self.assertEqual(self.run_pass(), [])
+        self.assertEqual(self.manifest.entries()[first].mtime_ns, 1)
+
+        self.write('a.pdf', b'%PDF a changed')
+        self.write('c.pdf')
+        self.assertEqual(self.run_pass(), ['a.pdf', 'c.pdf'])
+        self.assertEqual(self.manifest.entries()[first].digest, file_digest(first))
+
+    @patch('src.anreu.ingest.parse_anreu_pdfs', side_effect=fake_parse)
+    def test_interrupted_run_resumes(self, mock_parse):
+        """Test files checkpointed before an interruption are not parsed again"""
+        for name in ('a.pdf', 'b.pdf', 'c.pdf'):
+            self.write(name, name.encode())
+        files = ingest_directory(self.inbox, self.manifest, workers=1)
+        next(files)
+        files.close()
+        self.assertEqual(self.run_pass(), ['b.pdf', 'c.pdf'])
+
+    @patch('src.anreu.ingest.parse_anreu_pdfs', side_effect=fake_parse)
+    def test_worker_crashes_are_retried(self, mock_parse):
+        """Test a document whose worker failed is not recorded"""
+        self.write('crash.pdf')
+        self.assertEqual(self.run_pass(), ['crash.pdf'])
+        self.assertEqual(self.run_pass(), ['crash.pdf'])
+
+    @patch('src.anreu.ingest.parse_anreu_pdfs', side_effect=fake_parse)
+    def test_follow_skips_files_still_being_written(self, mock_parse):
+        """Test follow mode leaves recently modified files for a later scan"""
+        self.write('old.pdf')
+        os.utime(os.path.join(self.inbox, 'old.pdf'), (0, 0))
+        self.write('new.pdf')
+        stop = threading.Event()
+        files = follow_directory(self.inbox, self.manifest, workers=1, interval=0, settle_seconds=60, stop_event=stop)
+        self.assertEqual(os.path.basename(next(files).path), 'old.pdf')
+        stop.set()
+        self.assertEqual(list(files), [])
+
+    @patch('src.anreu.ingest.parse_anreu_pdfs', side_effect=fake_parse)
+    def test_ingest_writes_json_lines(self, mock_parse):
+        """Test the ingest command reports each file with its hash"""
+        path = self.write('a.pdf')
+        out = io.StringIO()
+        manifest_path = os.path.join(self.tmpdir, 'cli.db')
+        self.assertEqual(ingest(self.inbox, manifest_path, workers=1, output=out), 1)
+        self.assertEqual(json.loads(out.getvalue()), {
+            'path': path, 'file_hash': file_digest(path), 'result': {'name': 'a.pdf'}
+        })
+        self.assertEqual(ingest(self.inbox, manifest_path, workers=1, output=out), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import unittest
+import subprocess
+import pypdfium2
+from unittest.mock import patch
+from bench.anreu.corpus import RECEIPT_LINES, make_receipt_pdf
+from src.anreu import ocr
+from src.anreu.anreu_parser import parse_anreu_pdf, parse_anreu_receipt
+from src.anreu.ocr import TesseractEngine, page_dpi, set_ocr_engine
+from src.anreu.parse_cache import ParseCache
+
+RECEIPT_TEXT = "\n".join(RECEIPT_LINES)
+
+def tesseract_output(*args, **kwargs):
+    return subprocess.CompletedProcess(args, 0, stdout=RECEIPT_TEXT.encode())
+
+class TestOcr(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = (ocr._engine, ocr._engine_detected)
+        self.engine = TesseractEngine(workers=2)
+
+    def tearDown(self):
+        self.engine.close()
+        ocr._engine, ocr._engine_detected = self.saved
+
+    def test_adaptive_dpi(self):
+        """Test scans render at their own resolution within bounds, text pages at the default"""
+        document = pypdfium2.PdfDocument(make_receipt_pdf(pages=2, image_every=2))
+        try:
+            self.assertEqual(page_dpi(document[0]), ocr.DEFAULT_DPI)
+            # A 200 pixel scan over 480 points is 30 DPI, raised to the minimum
+            self.assertEqual(page_dpi(document[1]), ocr.MIN_DPI)
+        finally:
+            document.close()
+
+    @patch('src.anreu.ocr.subprocess.run', side_effect=tesseract_output)
+    def test_ocr_pages_cached_per_page(self, mock_run):
+        """Test each rendered page is recognised once and then served from cache"""
+        pdf = make_receipt_pdf(pages=3, field_page=None, image_every=1)
+        texts = self.engine.ocr_pages(pdf, [0, 2])
+        self.assertEqual(texts, {0: RECEIPT_TEXT, 2: RECEIPT_TEXT})
+        # All three scans show the same image, so page 1 is a cache hit too
+        self.assertEqual(mock_run.call_count, 1)
+        command = mock_run.call_args[0][0]
+        self.assertEqual(command[:3], ['tesseract', 'stdin', 'stdout'])
+        self.assertEqual(command[-2:], ['--dpi', '150'])
+        self.assertEqual(self.engine.ocr_pages(pdf, [1]), {1: RECEIPT_TEXT})
+        self.assertEqual(mock_run.call_count, 1)
+
+    @patch('src.anreu.ocr.subprocess.run', side_effect=tesseract_output)
+    def test_persistent_page_cache(self, mock_run):
+        """Test OCR text is shared through a ParseCache"""
+        tmpdir = tempfile.mkdtemp()
+        cache = ParseCache(os.path.join(tmpdir, 'cache.db'))
+        try:
+            pdf = make_receipt_pdf(pages=1, field_page=None, image_every=1)
+            self.engine.ocr_pages(pdf, [0], cache)
+            other = TesseractEngine()
+            self.assertEqual(other.ocr_pages(pdf, [0], cache), {0: RECEIPT_TEXT})
+            self.assertEqual(mock_run.call_count, 1)
+        finally:
+            cache.close()
+            shutil.rmtree(tmpdir)
+
+    def test_one_tesseract_per_pool_worker(self):
+        """Test engines inside worker processes default to a single tesseract"""
+        engine = TesseractEngine()
+        try:
+            with patch('src.anreu.ocr.multiprocessing.parent_process', return_value=object()):
+                self.assertEqual(engine._pool()._max_workers, 1)
+        finally:
+            engine.close()
+        self.assertEqual(self.engine._pool()._max_workers, 2)
+
+    @patch('src.anreu.ocr.subprocess.run', side_effect=subprocess.TimeoutExpired('tesseract', 60))
+    def test_recognition_failure_yields_no_text(self, mock_run):
+        """Test a failing tesseract yields no text instead of raising"""
+        self.assertIsNone(self.engine.recognize(b'P5', 300))
+
+    def test_failed_recognition_is_not_cached(self):
+        """Test a tesseract timeout poisons neither the page nor the document cache"""
+        tmpdir = tempfile.mkdtemp()
+        cache = ParseCache(os.path.join(tmpdir, 'cache.db'))
+        try:
+            set_ocr_engine(self.engine)
+            scan = make_receipt_pdf(pages=1, field_page=None, image_every=1)
+            with patch('src.anreu.ocr.subprocess.run', side_effect=subprocess.TimeoutExpired('tesseract', 60)):
+                self.assertEqual(self.engine.ocr_pages(scan, [0], cache), {})
+                self.assertEqual(parse_anreu_receipt(scan, cache=cache).status, 'low_confidence')
+            with patch('src.anreu.ocr.subprocess.run', side_effect=tesseract_output) as mock_run:
+                self.assertEqual(parse_anreu_receipt(scan, cache=cache).status, 'ok')
+                self.assertEqual(TesseractEngine().ocr_pages(scan, [0], cache), {0: RECEIPT_TEXT})
+                self.assertEqual(mock_run.call_count, 1)
+        finally:
+            cache.close()
+            shutil.rmtree(tmpdir)
+
+    @patch('src.anreu.ocr.subprocess.run', side_effect=tesseract_output)
+    def test_scanned_receipt_is_parsed(self, mock_run):
+        """Test pages without a text layer are OCRed when fields are missing"""
+        set_ocr_engine(self.engine)
+        scan = make_receipt_pdf(pages=2, field_page=None, image_every=1)
+        receipt = parse_anreu_receipt(scan)
+        self.assertEqual((receipt.status, receipt.serial_start), ('ok', 1000000))
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(parse_anreu_pdf(scan, ocr=False), {'error': 'Low confidence — manual review required'})
+
+        # Text layers that already hold every field skip OCR
+        mock_run.reset_mock()
+        self.assertNotIn('error', parse_anreu_pdf(make_receipt_pdf(pages=3, image_every=2)))
+        mock_run.assert_not_called()
+
+    def test_triage_passes_scans_to_ocr(self):
+        """Test triage only stops scans when no OCR engine is installed"""
+        scan = make_receipt_pdf(pages=1, field_page=None, image_every=1)
+        set_ocr_engine(None)
+        self.assertEqual(parse_anreu_receipt(scan, triage=True).status, 'needs_ocr')
+        set_ocr_engine(self.engine)
+        with patch('src.anreu.ocr.subprocess.run', side_effect=tesseract_output):
+            self.assertEqual(parse_anreu_receipt(scan, triage=True).status, 'ok')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from src.anreu.anreu_parser import parse_anreu_pdf, PARSER_VERSION
+from src.anreu.parse_cache import ParseCache, buffer_digest, file_digest
+
+COMPLETE_TEXT = """From Account: Seller Pty Ltd (ACC123)
+To Account: Buyer Pty Ltd (ACC456)
+ACCU1000000 to ACCU1000099
+Vintage: 2024
+Project ID: CAR-2024-001
+Facility: XYZ Reforestation Project"""
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ParseCache(os.path.join(self.tmpdir, 'cache.db'), max_entries=2)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_hit_and_miss_counters(self):
+        """Test get/put round trip and hit/miss accounting"""
+        self.assertIsNone(self.cache.get('abc', '1'))
+        self.cache.put('abc', '1', {'vintage': 2024})
+        self.assertEqual(self.cache.get('abc', '1'), {'vintage': 2024})
+        self.assertIsNone(self.cache.get('abc', '2'))
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 2, 'entries': 1})
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted past max_entries"""
+        self.cache.put('a', '1', {'n': 1})
+        self.cache.put('b', '1', {'n': 2})
+        self.cache.get('a', '1')
+        self.cache.put('c', '1', {'n': 3})
+        self.assertIsNotNone(self.cache.get('a', '1'))
+        self.assertIsNone(self.cache.get('b', '1'))
+        self.assertIsNotNone(self.cache.get('c', '1'))
+
+    def test_file_digest_matches_md5(self):
+        """Test the digest is the MD5 stored in anreu_uploads.file_hash"""
+        digest = file_digest('test-data/valid_anreu.pdf')
+        self.assertEqual(len(digest), 32)
+        with open('test-data/valid_anreu.pdf', 'rb') as f:
+            self.assertEqual(buffer_digest(f.read()), digest)
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_parse_uses_cache_for_duplicate_content(self, mock_reader, mock_pdfplumber):
+        """Test re-uploads of identical content skip the PDF parse"""
+        mock_page = MagicMock()
+        mock_page.extract_text.return_value = COMPLETE_TEXT
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [mock_page]
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+
+        first = os.path.join(self.tmpdir, 'first.pdf')
+        second = os.path.join(self.tmpdir, 'second.pdf')
+        for path in (first, second):
+            with open(path, 'wb') as f:
+                f.write(b'%PDF-1.4 same bytes')
+
+        result = parse_anreu_pdf(first, cache=self.cache)
+        self.assertEqual(parse_anreu_pdf(second, cache=self.cache), result)
+        self.assertEqual(mock_pdfplumber.call_count, 1)
+        self.assertEqual(self.cache.get(file_digest(second), PARSER_VERSION), result)
+
+    def test_extraction_failures_are_not_cached(self):
+        """Test a missing file reports an error and leaves the cache empty"""
+        result = parse_anreu_pdf(os.path.join(self.tmpdir, 'missing.pdf'), cache=self.cache)
+        self.assertIn('Failed to extract text', result['error'])
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from src.anreu.anreu_parser import parse_anreu_pdf
+from src.anreu.parser_metrics import ParseStats, PrometheusCollector, set_metrics_hook
+
+class TestParserMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = []
+        set_metrics_hook(self.stats.append)
+
+    def tearDown(self):
+        set_metrics_hook(None)
+
+    def test_stats_for_real_pdf(self):
+        """Test a parse reports per-stage timings, confidence and outcome"""
+        parse_anreu_pdf('test-data/valid_anreu.pdf')
+        (stats,) = self.stats
+        self.assertEqual(stats.pages, {'pdfplumber': 1})
+        self.assertEqual(stats.fallback_pages, 0)
+        self.assertEqual(stats.outcome, 'low_confidence')
+        self.assertAlmostEqual(stats.confidence, 100 * 2 / 7)
+        self.assertGreater(stats.open_seconds, 0)
+        self.assertGreater(stats.regex_seconds, 0)
+        self.assertGreaterEqual(stats.total_seconds, stats.open_seconds + stats.page_seconds['pdfplumber'])
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    @patch('src.anreu.anreu_parser.PdfReader')
+    def test_fallback_pages_counted(self, mock_reader, mock_pdfplumber):
+        """Test pages re-extracted by PyPDF2 are counted as fallbacks"""
+        mock_page = MagicMock()
+        mock_page.extract_text.return_value = ""
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [mock_page, mock_page]
+        mock_pdfplumber.return_value.__enter__.return_value = mock_pdf
+        mock_page2 = MagicMock()
+        mock_page2.extract_text.return_value = ""
+        mock_reader.return_value.pages = [mock_page2, mock_page2]
+
+        parse_anreu_pdf('dummy.pdf')
+        (stats,) = self.stats
+        self.assertEqual(stats.fallback_pages, 2)
+        self.assertEqual(stats.pages, {'pdfplumber': 2, 'pypdf2': 2})
+
+    def test_failing_hook_does_not_break_parse(self):
+        """Test an exception in the hook is contained"""
+        set_metrics_hook(MagicMock(side_effect=RuntimeError('boom')))
+        self.assertIn('error', parse_anreu_pdf('test-data/valid_anreu.pdf'))
+
+    def test_prometheus_rendering(self):
+        """Test the collector aggregates stats into Prometheus text"""
+        collector = PrometheusCollector(buckets=(0.1, 1.0))
+        stats = ParseStats()
+        stats.add_page('pdfplumber', 0.05)
+        stats.outcome = 'ok'
+        stats.confidence = 100.0
+        stats.total_seconds = 0.5
+        collector(stats)
+        text = collector.render()
+        self.assertIn('anreu_parse_documents_total{outcome="ok"} 1', text)
+        self.assertIn('anreu_parse_pages_total{backend="pdfplumber"} 1', text)
+        self.assertIn('anreu_parse_seconds_bucket{le="0.1"} 0', text)
+        self.assertIn('anreu_parse_seconds_bucket{le="1.0"} 1', text)
+        self.assertIn('anreu_parse_confidence_sum 100.000000', text)
+
+if __name__ == '__main__':
+    unittest.main()
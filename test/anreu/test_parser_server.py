@@ -0,0 +1,125 @@
+import io
+import os
+import json
+import base64
+import socket
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from src.anreu.anreu_parser import parse_anreu_pdf
+from src.anreu.parser_server import ParserServer, serve_unix_socket
+
+VALID_PDF = 'test-data/valid_anreu.pdf'
+
+class TestParserServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ParserServer(workers=2, max_in_flight=2)
+        cls.server.warm()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def test_json_lines_round_trip(self):
+        """Test each request gets a response with its id, result and timings"""
+        with open(VALID_PDF, 'rb') as f:
+            data = base64.b64encode(f.read()).decode()
+        requests = [
+            {'id': 1, 'path': VALID_PDF},
+            {'id': 2, 'data': data, 'incremental': True},
+            {'id': 3, 'path': 'test-data/missing.pdf'},
+        ]
+        output = io.StringIO()
+        self.server.handle_stream(io.StringIO(''.join(json.dumps(r) + '\n' for r in requests)), output)
+
+        responses = {r['id']: r for r in map(json.loads, output.getvalue().splitlines())}
+        self.assertEqual(set(responses), {1, 2, 3})
+        self.assertEqual(responses[1]['result'], parse_anreu_pdf(VALID_PDF))
+        self.assertEqual(responses[2]['result'], responses[1]['result'])
+        self.assertIn('error', responses[3]['result'])
+        for response in responses.values():
+            self.assertEqual(set(response['timing']), {'queue_ms', 'parse_ms', 'total_ms'})
+
+    def test_invalid_request(self):
+        """Test malformed lines are answered with an error instead of dropped"""
+        output = io.StringIO()
+        self.server.handle_stream(io.StringIO('not json\n{"id": 7}\n'), output)
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(responses), 2)
+        self.assertTrue(all(r['error'].startswith('Invalid request') for r in responses))
+
+    def test_disconnected_client(self):
+        """Test a stream whose writes fail still finishes instead of waiting forever"""
+        class ClosedWriter(io.StringIO):
+            def write(self, text):
+                raise BrokenPipeError('client went away')
+
+        requests = ''.join(json.dumps({'id': i, 'path': VALID_PDF}) + '\n' for i in range(4))
+        thread = threading.Thread(target=self.server.handle_stream, args=(io.StringIO(requests), ClosedWriter()))
+        thread.start()
+        thread.join(30)
+        self.assertFalse(thread.is_alive())
+
+    def test_slow_reader_does_not_block_other_streams(self):
+        """Test one stream's stalled writer leaves other streams' responses flowing"""
+        release = threading.Event()
+
+        class StalledWriter(io.StringIO):
+            def write(self, text):
+                release.wait()
+                return super().write(text)
+
+        stalled = threading.Thread(target=self.server.handle_stream, args=(
+            io.StringIO(json.dumps({'id': 1, 'path': VALID_PDF}) + '\n'), StalledWriter()))
+        stalled.start()
+        try:
+            output = io.StringIO()
+            self.server.handle_stream(io.StringIO(json.dumps({'id': 2, 'path': VALID_PDF}) + '\n'), output)
+            self.assertEqual(json.loads(output.getvalue())['id'], 2)
+        finally:
+            release.set()
+            stalled.join(30)
+
+    def test_recovers_from_worker_crash(self):
+        """Test a crashed worker fails its request and a fresh pool serves the next stream"""
+        def parse_or_crash(source, **options):
+            if source == 'crash.pdf':
+                os._exit(1)
+            return parse_anreu_pdf(source, **options)
+
+        with patch('src.anreu.parser_server.parse_anreu_pdf', parse_or_crash):
+            server = ParserServer(workers=1)
+            try:
+                output = io.StringIO()
+                server.handle_stream(io.StringIO(json.dumps({'id': 1, 'path': 'crash.pdf'}) + '\n'), output)
+                self.assertEqual(json.loads(output.getvalue()), {'id': 1, 'error': 'Failed to parse PDF'})
+                output = io.StringIO()
+                server.handle_stream(io.StringIO(json.dumps({'id': 2, 'path': VALID_PDF}) + '\n'), output)
+                self.assertEqual(json.loads(output.getvalue())['result'], parse_anreu_pdf(VALID_PDF))
+            finally:
+                server.close()
+
+    def test_unix_socket(self):
+        """Test requests over a Unix socket connection"""
+        socket_path = os.path.join(tempfile.mkdtemp(), 'parser.sock')
+        unix_server = serve_unix_socket(self.server, socket_path)
+        thread = threading.Thread(target=unix_server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socket_path)
+                client.sendall((json.dumps({'id': 'a', 'path': VALID_PDF}) + '\n').encode())
+                client.shutdown(socket.SHUT_WR)
+                response = json.loads(client.makefile().readline())
+            self.assertEqual(response['id'], 'a')
+            self.assertEqual(response['result'], parse_anreu_pdf(VALID_PDF))
+        finally:
+            unix_server.shutdown()
+            unix_server.server_close()
+            os.unlink(socket_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import csv
+import json
+import unittest
+from src.anreu.anreu_parser import AnreuReceipt
+from src.anreu.receipt_batch import COLUMNS, ReceiptBatch
+
+COMPLETE = {
+    "serial_start": 1000000,
+    "serial_end": 1000099,
+    "vintage": 2024,
+    "project_id": "CAR-2024-001",
+    "facility": "XYZ Reforestation Project",
+    "from_account": "Seller Pty Ltd (ACC123)",
+    "to_account": "Buyer Pty Ltd (ACC456)"
+}
+
+class TestReceiptBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.batch = ReceiptBatch()
+        self.batch.extend([
+            ('a.pdf', COMPLETE),
+            ('b.pdf', {'error': 'Low confidence — manual review required'}),
+            ('c.pdf', AnreuReceipt(serial_start=5, vintage=2023, facility='XYZ Reforestation Project',
+                                   status='low_confidence', confidence=28.57,
+                                   error='Low confidence — manual review required')),
+        ])
+
+    def test_round_trip(self):
+        """Test receipts read back from the columns are unchanged"""
+        self.assertEqual(len(self.batch), 3)
+        self.assertEqual(self.batch[0], AnreuReceipt(**COMPLETE, confidence=100.0))
+        self.assertEqual(self.batch[0].as_dict(), COMPLETE)
+        self.assertEqual(self.batch[1].status, 'low_confidence')
+        self.assertIsNone(self.batch[1].confidence)
+        self.assertEqual(self.batch[2].serial_end, None)
+        self.assertEqual(list(self.batch), [self.batch[i] for i in range(3)])
+        self.assertEqual([source for source, _ in self.batch.items()], ['a.pdf', 'b.pdf', 'c.pdf'])
+
+    def test_oversized_serials_round_trip(self):
+        """Test a serial beyond int64 reads back unchanged instead of failing the batch"""
+        oversized = dict(COMPLETE, serial_start=10 ** 20, serial_end=10 ** 20 + 99)
+        self.batch.append(oversized, 'garbled.pdf')
+        self.assertEqual(self.batch[3].as_dict(), oversized)
+        self.assertEqual(self.batch[-1], self.batch[3])
+        self.assertEqual(list(self.batch)[3], self.batch[3])
+        output = io.StringIO()
+        self.batch.write_jsonl(output)
+        self.assertEqual(json.loads(output.getvalue().splitlines()[3])['serial_start'], 10 ** 20)
+
+    def test_strings_are_interned(self):
+        """Test repeated strings are stored once"""
+        for _ in range(100):
+            self.batch.append(COMPLETE)
+        facilities = [s for s in self.batch._strings if s == 'XYZ Reforestation Project']
+        self.assertEqual(len(facilities), 1)
+        self.assertIs(self.batch[50].facility, self.batch[2].facility)
+
+    def test_write_jsonl(self):
+        """Test JSONL output has one object per receipt"""
+        out = io.StringIO()
+        self.assertEqual(self.batch.write_jsonl(out), 3)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(list(rows[0]), list(COLUMNS))
+        self.assertEqual(rows[0]['source'], 'a.pdf')
+        self.assertEqual(rows[0]['vintage'], 2024)
+        self.assertEqual(rows[2]['confidence'], 28.57)
+        self.assertIsNone(rows[1]['serial_start'])
+
+    def test_write_csv(self):
+        """Test CSV output has a header and empty cells for missing values"""
+        out = io.StringIO(newline='')
+        self.assertEqual(self.batch.write_csv(out), 3)
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+        self.assertEqual(tuple(rows[0]), COLUMNS)
+        self.assertEqual(rows[1][1:4], ['1000000', '1000099', '2024'])
+        self.assertEqual(rows[2][1], '')
+        self.assertEqual(len(rows), 4)
+
+if __name__ == '__main__':
+    unittest.main()
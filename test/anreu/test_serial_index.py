@@ -0,0 +1,93 @@
+import random
+import unittest
+from src.anreu.anreu_parser import AnreuReceipt
+from src.anreu.serial_index import SerialRange, SerialRangeIndex, parse_serial_range
+
+class TestSerialRangeIndex(unittest.TestCase):
+
+    def test_insert_and_overlap_queries(self):
+        """Test inserts are rejected when they overlap an indexed range"""
+        index = SerialRangeIndex()
+        self.assertEqual(index.insert(100, 199, 'a'), [])
+        self.assertEqual(index.insert(300, 399, 'b'), [])
+        self.assertEqual(index.insert(150, 350, 'c'), [SerialRange(100, 199, 'a'), SerialRange(300, 399, 'b')])
+        self.assertEqual(len(index), 2)
+        self.assertTrue(index.has_overlap(199, 199))
+        self.assertFalse(index.has_overlap(200, 299))
+        self.assertEqual(index.overlaps(400, 500), [])
+        with self.assertRaises(ValueError):
+            index.insert(10, 5)
+
+    def test_matches_brute_force_across_blocks(self):
+        """Test queries agree with a linear scan when ranges span many blocks"""
+        rng = random.Random(7)
+        index = SerialRangeIndex(load_factor=2)
+        kept = []
+        for _ in range(300):
+            start = rng.randrange(5000)
+            end = start + rng.randrange(20)
+            if not index.insert(start, end):
+                kept.append((start, end))
+        self.assertEqual([(r.start, r.end) for r in index], sorted(kept))
+        for _ in range(300):
+            start = rng.randrange(5100)
+            end = start + rng.randrange(40)
+            expected = [r for r in sorted(kept) if r[0] <= end and r[1] >= start]
+            self.assertEqual([(r.start, r.end) for r in index.overlaps(start, end)], expected)
+
+    def test_bulk_load_skips_overlaps(self):
+        """Test bulk loading keeps indexed ranges and the lowest new start"""
+        index = SerialRangeIndex(load_factor=2)
+        index.insert(50, 59, 'existing')
+        rejected = index.bulk_load([(30, 40, 'x'), (55, 70, 'y'), (0, 9, 'z'), (35, 45, 'w'), (100, 100)])
+        self.assertEqual(sorted(rejected), [SerialRange(35, 45, 'w'), SerialRange(55, 70, 'y')])
+        self.assertEqual([r.key for r in index], ['z', 'x', 'existing', None])
+        self.assertTrue(index.has_overlap(100, 200))
+
+    def test_bulk_load_equal_ranges_with_and_without_key(self):
+        """Test equal new ranges keep the first one even when only one has a key"""
+        index = SerialRangeIndex()
+        self.assertEqual(index.bulk_load([(1, 5, 'a'), (1, 5)]), [SerialRange(1, 5)])
+        self.assertEqual(list(index), [SerialRange(1, 5, 'a')])
+
+    def test_oversized_serials(self):
+        """Test ranges beyond int64 are refused by inserts and ignored in results"""
+        index = SerialRangeIndex()
+        with self.assertRaises(ValueError):
+            index.insert(1, 10 ** 20)
+        with self.assertRaises(ValueError):
+            index.bulk_load([(1, 10 ** 20)])
+        self.assertEqual(index.check_results([('a.pdf', {'serial_start': 1, 'serial_end': 10 ** 20})]), [None])
+        self.assertEqual(index.load_results([('a.pdf', AnreuReceipt(serial_start=1, serial_end=10 ** 20))]), [])
+        self.assertEqual(len(index), 0)
+
+    def test_check_results_batch(self):
+        """Test a batch is checked against the index and against itself"""
+        index = SerialRangeIndex()
+        index.load_results([('old.pdf', {'serial_start': 1000, 'serial_end': 1099})])
+        batch = [
+            ('a.pdf', {'serial_start': 1050, 'serial_end': 1150}),
+            ('b.pdf', {'serial_start': 2000, 'serial_end': 2099}),
+            ('c.pdf', {'error': 'Low confidence — manual review required'}),
+            ('d.pdf', AnreuReceipt(serial_start=2099, serial_end=2100)),
+        ]
+        report = index.check_results(batch)
+        self.assertEqual(report, [
+            [SerialRange(1000, 1099, 'old.pdf')],
+            [],
+            None,
+            [SerialRange(2000, 2099, 'b.pdf')],
+        ])
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.check_results(batch, insert=True), report)
+        self.assertEqual([r.key for r in index], ['old.pdf', 'b.pdf'])
+
+    def test_parse_serial_range(self):
+        """Test serial_range column values are parsed with or without prefixes"""
+        self.assertEqual(parse_serial_range('ACCU1000000-ACCU1000999'), (1000000, 1000999))
+        self.assertEqual(parse_serial_range('1000000-1000100'), (1000000, 1000100))
+        with self.assertRaises(ValueError):
+            parse_serial_range('ACCU1000000')
+
+if __name__ == '__main__':
+    unittest.main()
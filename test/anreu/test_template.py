@@ -0,0 +1,88 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from bench.anreu.corpus import make_receipt_pdf
+from src.anreu.anreu_parser import parse_anreu_pdf, parse_anreu_receipt
+from src.anreu.parse_cache import ParseCache
+from src.anreu.template import (
+    ReceiptTemplate, learn_template, load_template, save_template, set_receipt_templates
+)
+
+VALID_PDF = os.path.join(os.path.dirname(__file__), '..', '..', 'test-data', 'valid_anreu.pdf')
+
+class TestTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf = make_receipt_pdf()
+        self.template = learn_template(self._stream(self.pdf))
+
+    def tearDown(self):
+        set_receipt_templates(())
+
+    def _stream(self, data):
+        return io.BytesIO(data)
+
+    def test_learns_one_region_per_line(self):
+        """Test every field is located on the receipt's first page"""
+        fields = [field for region in self.template.regions for field in region.fields]
+        self.assertCountEqual(fields, ['serial_start', 'serial_end', 'vintage', 'project_id',
+                                       'facility', 'from_account', 'to_account'])
+        self.assertEqual({region.page for region in self.template.regions}, {0})
+        self.assertEqual(self.template.pages, 1)
+
+    def test_save_and_load_round_trip(self):
+        """Test a saved template loads back unchanged"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'anreu.json')
+            save_template(self.template, path)
+            self.assertEqual(load_template(path), self.template)
+
+    def test_rejects_unknown_version(self):
+        """Test templates written by a newer format are refused"""
+        data = dict(self.template.to_json(), version=99)
+        with self.assertRaises(ValueError):
+            ReceiptTemplate.from_json(data)
+
+    def test_matching_receipt_skips_full_page_extraction(self):
+        """Test a matching receipt is read from its regions alone"""
+        expected = parse_anreu_pdf(self.pdf)
+        set_receipt_templates([self.template])
+        with patch('src.anreu.anreu_parser.pdfplumber.open') as mock_open:
+            receipt = parse_anreu_receipt(self.pdf)
+        mock_open.assert_not_called()
+        self.assertEqual(receipt.status, 'ok')
+        self.assertEqual(receipt.as_dict(), expected)
+
+    def test_cache_key_tracks_installed_templates(self):
+        """Test a changed template set is not served results cached under the old one"""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParseCache(os.path.join(directory, 'cache.db'))
+            try:
+                set_receipt_templates([self.template])
+                parse_anreu_pdf(self.pdf, cache=cache)
+                parse_anreu_pdf(self.pdf, cache=cache)
+                set_receipt_templates([self.template._replace(name='relearned')])
+                parse_anreu_pdf(self.pdf, cache=cache)
+                self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (1, 2))
+            finally:
+                cache.close()
+
+    def test_other_layouts_fall_back(self):
+        """Test documents that do not match the template are extracted in full"""
+        set_receipt_templates([self.template])
+        for pdf in (make_receipt_pdf(pages=2), open(VALID_PDF, 'rb').read()):
+            self.assertIsNone(self.template.extract_text(self._stream(pdf)))
+            set_receipt_templates(())
+            expected = parse_anreu_pdf(pdf)
+            set_receipt_templates([self.template])
+            self.assertEqual(parse_anreu_pdf(pdf), expected)
+
+    def test_learning_needs_every_field(self):
+        """Test a receipt missing fields cannot be learned"""
+        with self.assertRaises(ValueError):
+            learn_template(self._stream(make_receipt_pdf(field_page=None)))
+
+if __name__ == '__main__':
+    unittest.main()
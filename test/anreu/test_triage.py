@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from bench.anreu.corpus import make_receipt_pdf
+from src.anreu.anreu_parser import parse_anreu_pdf, parse_anreu_receipt
+from src.anreu.triage import LIKELY_ANREU, NEEDS_OCR, REJECT, triage_pdf
+
+def mock_reader(text, pages=1, metadata=None):
+    reader = MagicMock()
+    reader.is_encrypted = False
+    reader.metadata = metadata or {}
+    page = MagicMock()
+    page.extract_text.return_value = text
+    reader.pages = [page] * pages
+    return reader
+
+class TestTriage(unittest.TestCase):
+
+    def test_receipts_are_likely_anreu(self):
+        """Test receipts and statements pass, even with fields on a later page"""
+        self.assertEqual(triage_pdf(make_receipt_pdf()).verdict, LIKELY_ANREU)
+        self.assertEqual(triage_pdf(make_receipt_pdf(pages=5, field_page='last')).verdict, LIKELY_ANREU)
+        self.assertEqual(triage_pdf('test-data/valid_anreu.pdf').verdict, LIKELY_ANREU)
+
+    def test_scans_need_ocr(self):
+        """Test an image-only first page is sent to OCR"""
+        result = triage_pdf(make_receipt_pdf(pages=3, field_page=None, image_every=1))
+        self.assertEqual((result.verdict, result.pages), (NEEDS_OCR, 3))
+
+    def test_rejects(self):
+        """Test non-PDFs, oversized documents and unrelated text are rejected"""
+        self.assertEqual(triage_pdf(b'PK\x03\x04 not a pdf').verdict, REJECT)
+        self.assertEqual(triage_pdf(make_receipt_pdf(pages=3), max_pages=2).verdict, REJECT)
+        with patch('src.anreu.triage.PdfReader', return_value=mock_reader("Tax Invoice\nTotal due: $120 incl. GST")):
+            self.assertEqual(triage_pdf(b'%PDF-1.4').reason, 'no registry terms on page 1')
+        with self.assertRaises(OSError):
+            triage_pdf('test-data/missing.pdf')
+
+    @patch('src.anreu.triage.PdfReader')
+    def test_metadata_marks_registry_documents(self, mock_pdf_reader):
+        """Test registry metadata is enough without reading page 1"""
+        mock_pdf_reader.return_value = mock_reader("", metadata={'/Producer': 'ANREU Reports'})
+        self.assertEqual(triage_pdf(b'%PDF-1.4').reason, 'registry metadata')
+        mock_pdf_reader.return_value.pages[0].extract_text.assert_not_called()
+
+    @patch('src.anreu.anreu_parser.pdfplumber.open')
+    def test_parse_with_triage_skips_extraction(self, mock_pdfplumber):
+        """Test only likely receipts reach full extraction"""
+        receipt = parse_anreu_receipt(make_receipt_pdf(pages=2, field_page=None, image_every=1), triage=True)
+        self.assertEqual((receipt.status, receipt.error), ('needs_ocr', 'No text layer — OCR required'))
+        self.assertEqual(parse_anreu_pdf(b'junk', triage=True), {'error': 'Not an ANREU receipt'})
+        self.assertEqual(parse_anreu_pdf('test-data/missing.pdf', triage=True),
+                         {'error': 'Failed to extract text from PDF'})
+        mock_pdfplumber.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.anreu.anreu_parser import AnreuReceipt
+from src.anreu.upload_sink import AnreuUploadSink, PoolConnector, SQLiteConnector
+
+COMPLETE = {
+    "serial_start": 1000000,
+    "serial_end": 1000099,
+    "vintage": 2024,
+    "project_id": "CAR-2024-001",
+    "facility": "XYZ Reforestation Project",
+    "from_account": "Seller Pty Ltd (ACC123)",
+    "to_account": "Buyer Pty Ltd (ACC456)"
+}
+
+class TestUploadSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'uploads.db')
+        self.connector = SQLiteConnector(self.db_path)
+
+    def tearDown(self):
+        self.connector.close()
+        shutil.rmtree(self.tmpdir)
+
+    def rows(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(
+                "SELECT id, user_id, file_name, file_hash, parsed_data, is_valid, validation_errors "
+                "FROM anreu_uploads ORDER BY file_hash"
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def test_batches_and_upserts_on_file_hash(self):
+        """Test rows are written per batch and re-parses update in place"""
+        sink = AnreuUploadSink(self.connector, 'user-1', batch_size=2, flush_interval=None)
+        sink.add('a' * 32, 'a.pdf', COMPLETE)
+        self.assertEqual(self.rows(), [])
+        sink.add('b' * 32, 'b.pdf', {'error': 'Low confidence — manual review required'})
+        self.assertEqual(len(self.rows()), 2)
+
+        first_id = self.rows()[0][0]
+        sink.add('a' * 32, 'a-again.pdf', AnreuReceipt(serial_start=7, status='low_confidence',
+                                                       error='Low confidence — manual review required'))
+        sink.close()
+        self.assertEqual(sink.written, 3)
+
+        (a_id, user, name, _, parsed, valid, errors), (_, _, _, _, b_parsed, b_valid, b_errors) = self.rows()
+        self.assertEqual((a_id, user, name), (first_id, 'user-1', 'a-again.pdf'))
+        self.assertEqual(json.loads(parsed)['serial_start'], 7)
+        self.assertEqual(valid, 0)
+        self.assertEqual(json.loads(errors), ['Low confidence — manual review required'])
+        self.assertEqual(json.loads(b_parsed)['vintage'], None)
+        self.assertEqual((b_valid, json.loads(b_errors)), (0, ['Low confidence — manual review required']))
+
+    def test_valid_row(self):
+        """Test a complete result is stored as valid with no errors"""
+        with AnreuUploadSink(self.connector, 'user-1', flush_interval=None) as sink:
+            sink.add('c' * 32, 'c.pdf', COMPLETE)
+        (_, _, _, _, parsed, valid, errors), = self.rows()
+        self.assertEqual(json.loads(parsed), COMPLETE)
+        self.assertEqual((valid, json.loads(errors)), (1, []))
+
+    def test_flush_interval(self):
+        """Test the background thread writes a partial batch"""
+        with AnreuUploadSink(self.connector, 'user-1', batch_size=100, flush_interval=0.05) as sink:
+            sink.add('d' * 32, 'd.pdf', COMPLETE)
+            deadline = time.time() + 5
+            while not self.rows() and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(self.rows()), 1)
+
+    def test_failed_write_keeps_rows(self):
+        """Test a failed batch is rolled back and retried by the next flush"""
+        conn = MagicMock()
+        conn.cursor.return_value.execute.side_effect = [RuntimeError('db down'), None]
+        pool = MagicMock()
+        pool.getconn.return_value = conn
+        sink = AnreuUploadSink(PoolConnector(pool), 'user-1', flush_interval=None)
+        sink.add('e' * 32, 'e.pdf', COMPLETE)
+        with self.assertRaises(RuntimeError):
+            sink.flush()
+        conn.rollback.assert_called_once()
+        self.assertEqual(sink.flush(), 1)
+        sql, params = conn.cursor.return_value.execute.call_args[0]
+        self.assertIn('VALUES (%s, %s, %s, %s, %s, %s, %s) ON CONFLICT (file_hash)', sql)
+        self.assertEqual(params[1:4], ['user-1', 'e.pdf', 'e' * 32])
+        self.assertEqual(pool.putconn.call_count, 2)
+
+    def test_multi_row_statements(self):
+        """Test a batch larger than one statement is written completely"""
+        with AnreuUploadSink(self.connector, 'user-1', batch_size=1000, flush_interval=None, rows_per_statement=3) as sink:
+            for i in range(10):
+                sink.add(f'{i:032d}', f'{i}.pdf', COMPLETE)
+        self.assertEqual(len(self.rows()), 10)
+
+if __name__ == '__main__':
+    unittest.main()